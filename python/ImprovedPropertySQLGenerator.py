@@ -4,146 +4,464 @@
 Improved Property Data SQL Insert Generator with better Japanese OCR
 """
 
+import os
 import re
 import argparse
 import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional
-from PIL import Image, ImageEnhance, ImageFilter
-import pytesseract
-import cv2
-import numpy as np
+from typing import Dict, Any, Optional, Tuple
+from ocr_cache import OCRCache, hash_file, add_cache_arguments, cache_from_args
+from ocr_backends import OCRBackend, create_backend, add_backend_arguments, backend_from_args
+from field_scanner import scan_labels
+from tracing import NULL_TRACER, Tracer, quiet_print, add_trace_arguments, tracer_from_args, run_profiled
+from candidate_ranking import (
+    CandidateRanker, layout_fingerprint, add_ranking_arguments, ranker_from_args, format_ranking_report
+)
+from text_scale import (
+    TextScale, add_normalize_arguments, text_height_from_args, scaled_image_hash, format_scale_report
+)
+# Image/scoring modules import numpy, OpenCV and PIL; they are imported where
+# OCR actually runs so --help and parse-only use start quickly
+
+# OCR configurations to try. 'priority' is the expected-yield rank used by the
+# adaptive search (lower is tried first); list order is the exhaustive order.
+OCR_CONFIGS = [
+    # Japanese configurations
+    {'lang': 'jpn', 'config': '--oem 3 --psm 6', 'priority': 0},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 3', 'priority': 1},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 4', 'priority': 1},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 8', 'priority': 6},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 11', 'priority': 3},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 12', 'priority': 4},
+    {'lang': 'jpn', 'config': '--oem 3 --psm 13', 'priority': 6},
+    # Japanese vertical text
+    {'lang': 'jpn_vert', 'config': '--oem 3 --psm 6', 'priority': 5},
+    {'lang': 'jpn_vert', 'config': '--oem 3 --psm 5', 'priority': 5},
+    # Combined
+    {'lang': 'jpn+jpn_vert', 'config': '--oem 3 --psm 6', 'priority': 2},
+    # English as fallback
+    {'lang': 'eng', 'config': '--oem 3 --psm 6', 'priority': 7},
+]
+
+# Expected-yield rank of each preprocessing variant (lower is tried first)
+VARIANT_PRIORITY = {
+    'original': 0,
+    'threshold': 1,
+    'contrast': 2,
+    'adaptive': 3,
+    'denoised': 4,
+    'morphological': 5,
+}
+
+# OCR backend of each OCR worker process (see _init_ocr_process)
+_process_backend: Optional[OCRBackend] = None
+
+
+def _init_ocr_process(backend: OCRBackend):
+    global _process_backend
+    _process_backend = backend
+
+
+def _ocr_array(array, region, lang: str, config: str) -> str:
+    from PIL import Image
+    from text_regions import crop_region
+    img = Image.fromarray(array)
+    if region is not None:
+        img = crop_region(img, region)
+    return _process_backend.image_to_string(img, lang=lang, config=config)
+
+
+def _ocr_shared_image(handle, region, lang: str, config: str) -> str:
+    """OCR a variant from shared memory in a worker process, without copying its pixels over IPC"""
+    from shared_images import attached
+    with attached(handle) as array:
+        # The image views are dropped when _ocr_array returns, before the segment is unmapped
+        return _ocr_array(array, region, lang, config)
+
 
 class ImprovedPropertySQLGenerator:
-    def __init__(self):
+    def __init__(self, ocr_cache: Optional[OCRCache] = None, search_strategy: str = 'adaptive',
+                 min_score: Optional[int] = None, min_keyword_coverage: float = 0.8,
+                 ocr_workers: int = 1, ocr_concurrency: Optional[int] = None,
+                 detect_regions: bool = False, ocr_backend: Optional[OCRBackend] = None,
+                 tracer: Optional[Tracer] = None, quiet: bool = False,
+                 ranker: Optional[CandidateRanker] = None, ocr_processes: bool = False,
+                 text_height: Optional[int] = None):
         self.property_data = {}
+        self.ocr_cache = ocr_cache
+        # 'adaptive' stops once a result is good enough, 'exhaustive' tries the full grid
+        self.search_strategy = search_strategy
+        self.min_score = min_score
+        self.min_keyword_coverage = min_keyword_coverage
+        self.last_search_stats = {}
+        # Size of the shared Tesseract thread pool, and how many candidates of
+        # one image may be in flight at once (defaults to the pool size)
+        self.ocr_workers = max(1, ocr_workers)
+        self.ocr_concurrency = max(1, ocr_concurrency or self.ocr_workers)
+        self._ocr_executor = None
+        # Run the OCR calls in ocr_workers processes that read the variant
+        # images from shared memory, instead of in this process
+        self.ocr_processes = ocr_processes
+        self._ocr_process_pool = None
+        # OCR only the detected text blocks instead of the whole screenshot (opt-in)
+        self.detect_regions = detect_regions
+        # Glyph height (px) screenshots are rescaled to; None OCRs them as captured
+        self.text_height = text_height
+        self.last_text_scale = None
+        # In-process tesserocr engines when installed, else a subprocess per call
+        self.ocr_backend = ocr_backend or create_backend()
+        # Timing spans for each stage, and whether to print progress at all
+        self.tracer = tracer or NULL_TRACER
+        self.log = quiet_print if quiet else print
+        # Per-layout win statistics that reorder and prune the candidate grid
+        self.ranker = ranker
         # Ensure Japanese is available
         try:
-            available_langs = pytesseract.get_languages()
-            print(f"Available OCR languages: {available_langs}")
+            available_langs = self.ocr_backend.get_languages()
+            self.log(f"Available OCR languages: {available_langs}")
             if 'jpn' not in available_langs:
-                print("WARNING: Japanese language pack not installed!")
+                self.log("WARNING: Japanese language pack not installed!")
         except:
-            print("Could not check available languages")
+            self.log("Could not check available languages")
 
     def preprocess_image(self, image_path: str) -> list:
         """
         Preprocess image with multiple techniques and return list of processed images
         """
-        print("Preprocessing image for better OCR...")
-        
-        # Open image
-        original = Image.open(image_path)
-        
-        # Convert to numpy array
-        img_array = np.array(original)
+        from preprocessing import VARIANTS, PreprocessingGraph
+        self.log("Preprocessing image for better OCR...")
         
+        image, self.last_text_scale = self.load_image(image_path)
+        variants = PreprocessingGraph(image, tracer=self.tracer)
         processed_versions = []
-        
-        # Version 1: Original
-        processed_versions.append(("original", original))
-        
-        # Version 2: Convert to grayscale and enhance contrast
-        if len(img_array.shape) == 3:
-            gray = cv2.cvtColor(img_array, cv2.COLOR_RGB2GRAY)
-        else:
-            gray = img_array
-            
-        # Enhance contrast
-        contrast_enhanced = cv2.convertScaleAbs(gray, alpha=2.0, beta=0)
-        processed_versions.append(("contrast", Image.fromarray(contrast_enhanced)))
-        
-        # Version 3: Threshold
-        _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-        processed_versions.append(("threshold", Image.fromarray(thresh)))
-        
-        # Version 4: Denoise
-        try:
-            denoised = cv2.fastNlMeansDenoising(gray)
-            processed_versions.append(("denoised", Image.fromarray(denoised)))
-        except:
-            pass
-        
-        # Version 5: Adaptive threshold
-        adaptive_thresh = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2)
-        processed_versions.append(("adaptive", Image.fromarray(adaptive_thresh)))
-        
-        # Version 6: Morphological operations
-        kernel = np.ones((1,1), np.uint8)
-        morph = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel)
-        processed_versions.append(("morphological", Image.fromarray(morph)))
+        for name in VARIANTS:
+            try:
+                processed_versions.append((name, variants.get(name)))
+            except Exception:
+                pass
         
         return processed_versions
 
+    def load_image(self, image_path: str) -> Tuple['Image.Image', Optional[TextScale]]:
+        """
+        Decode a screenshot, rescaled so its text is about text_height pixels
+        tall (see text_scale). Returns the image and how it was rescaled (None
+        when normalization is off).
+        """
+        if self.text_height is not None:
+            from text_scale import open_normalized
+            return open_normalized(image_path, self.text_height)
+        from PIL import Image
+        image = Image.open(image_path)
+        # Decoded up front: OCR threads share it, and PIL's lazy load is not thread-safe
+        image.load()
+        return image, None
+
+    def ordered_candidates(self, variant_names: list) -> list:
+        """
+        Return (preprocessing name, OCR config) candidates in search order.
+
+        Exhaustive search keeps the original grid order. Adaptive search tries
+        the combinations that usually win first, so it can stop early.
+        """
+        candidates = []
+        for variant_index, img_name in enumerate(variant_names):
+            for config_index, config in enumerate(OCR_CONFIGS):
+                if self.search_strategy == 'adaptive':
+                    rank = (VARIANT_PRIORITY.get(img_name, len(VARIANT_PRIORITY)) + config['priority'],
+                            variant_index, config_index)
+                else:
+                    rank = (variant_index, config_index)
+                candidates.append((rank, img_name, config))
+        candidates.sort(key=lambda candidate: candidate[0])
+        return [(img_name, config) for _, img_name, config in candidates]
+
+    def is_good_enough(self, text: str, score: int) -> bool:
+        """Check whether an OCR result meets the early-termination thresholds"""
+        if self.min_score is not None and score >= self.min_score:
+            return True
+        return self.keyword_coverage(text) >= self.min_keyword_coverage
+
+    def keyword_coverage(self, text: str) -> float:
+        """Fraction of PROPERTY_KEYWORDS present in the text"""
+        from ocr_scoring import PROPERTY_KEYWORDS
+        found = sum(1 for keyword in PROPERTY_KEYWORDS if keyword in text)
+        return found / len(PROPERTY_KEYWORDS)
+
+    def run_ocr(self, image_hash: Optional[str], img_name: str, img, config: dict,
+                region=None) -> str:
+        """
+        Run one Tesseract invocation, going through the OCR cache when enabled.
+        With ocr_processes, `img` is the variant's shared-memory handle and the
+        worker process crops it.
+        """
+        variant = img_name
+        if region is not None:
+            from text_regions import crop_region, region_key
+            variant = region_key(img_name, region)
+            if not self.ocr_processes:
+                img = crop_region(img, region)
+        
+        def compute():
+            with self.tracer.span('ocr', 'ocr', variant=variant, lang=config['lang'], config=config['config']):
+                if self.ocr_processes:
+                    return self._get_ocr_process_pool().submit(
+                        _ocr_shared_image, img, region, config['lang'], config['config']
+                    ).result()
+                return self.ocr_backend.image_to_string(img, lang=config['lang'], config=config['config'])
+        
+        if self.ocr_cache:
+            return self.ocr_cache.get_or_compute(
+                image_hash, variant, config['lang'], config['config'], self.ocr_backend.name, compute
+            )
+        return compute()
+
+    def _get_ocr_executor(self) -> ThreadPoolExecutor:
+        if self._ocr_executor is None:
+            # Each call is its own tesseract process; keep them single-threaded
+            # so parallel calls don't oversubscribe the cores via OpenMP
+            os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+            self._ocr_executor = ThreadPoolExecutor(max_workers=self.ocr_workers,
+                                                    thread_name_prefix='ocr')
+        return self._ocr_executor
+
+    def _get_ocr_process_pool(self) -> ProcessPoolExecutor:
+        if self._ocr_process_pool is None:
+            from shared_images import share_resource_tracker
+            os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+            share_resource_tracker()
+            # The backend is sent once per worker; pickling drops warm tesserocr engines
+            self._ocr_process_pool = ProcessPoolExecutor(max_workers=self.ocr_workers,
+                                                         initializer=_init_ocr_process,
+                                                         initargs=(self.ocr_backend,))
+        return self._ocr_process_pool
+
+    def iter_ocr_results(self, candidates: list, image_hash: Optional[str],
+                         variants: 'PreprocessingGraph', regions: Optional[list] = None):
+        """
+        Yield (preprocessing name, config, text, error) for each candidate.
+
+        Results always come back in candidate order, so picking the best one
+        resolves ties exactly like the serial loop. With more than one worker,
+        up to ocr_concurrency Tesseract calls run ahead in the thread pool; any
+        still pending when the caller stops iterating are cancelled.
+
+        When text regions are given, each region is OCR'd as a separate call
+        (in parallel with a pool) and the texts are joined in reading order.
+
+        Variant images are computed when their first candidate is submitted
+        and released once no remaining candidate uses them. With
+        ocr_processes, candidates carry shared-memory handles instead, and the
+        variants stay in shared memory until the caller releases the graph
+        (a worker may not have mapped a handle yet when its last use is sent).
+        """
+        regions = regions or [None]
+        remaining_uses = Counter(img_name for img_name, _ in candidates)
+        
+        def load(img_name):
+            if self.ocr_processes:
+                return variants.handle(img_name)
+            remaining_uses[img_name] -= 1
+            try:
+                return variants.get(img_name)
+            finally:
+                if remaining_uses[img_name] == 0:
+                    variants.retain(name for name, count in remaining_uses.items() if count > 0)
+        
+        if self.ocr_workers <= 1:
+            for img_name, config in candidates:
+                text, error = None, None
+                try:
+                    img = load(img_name)
+                    text = '\n'.join(self.run_ocr(image_hash, img_name, img, config, region)
+                                     for region in regions)
+                except Exception as e:
+                    error = e
+                yield img_name, config, text, error
+            return
+        
+        executor = self._get_ocr_executor()
+        remaining = iter(candidates)
+        pending = deque()
+        in_flight = 0
+        try:
+            while True:
+                while in_flight < self.ocr_concurrency:
+                    candidate = next(remaining, None)
+                    if candidate is None:
+                        break
+                    img_name, config = candidate
+                    futures, error = [], None
+                    try:
+                        img = load(img_name)
+                        futures = [executor.submit(self.run_ocr, image_hash, img_name, img, config, region)
+                                   for region in regions]
+                    except Exception as e:
+                        error = e
+                    in_flight += len(futures)
+                    pending.append((img_name, config, futures, error))
+                if not pending:
+                    return
+                
+                img_name, config, futures, error = pending.popleft()
+                in_flight -= len(futures)
+                text = None
+                if error is None:
+                    try:
+                        text = '\n'.join(future.result() for future in futures)
+                    except Exception as e:
+                        error = e
+                yield img_name, config, text, error
+        finally:
+            for _, _, futures, _ in pending:
+                for future in futures:
+                    future.cancel()
+
+    def close(self):
+        """Shut down the OCR pools, release the OCR engines and close the ranking store"""
+        if self._ocr_executor is not None:
+            self._ocr_executor.shutdown(wait=True, cancel_futures=True)
+            self._ocr_executor = None
+        if self._ocr_process_pool is not None:
+            self._ocr_process_pool.shutdown(wait=True, cancel_futures=True)
+            self._ocr_process_pool = None
+        self.ocr_backend.close()
+        if self.ranker is not None:
+            self.ranker.close()
+
     def extract_text_from_image(self, image_path: str) -> str:
         """
         Extract text using multiple preprocessing methods and OCR configurations
         """
-        print(f"Processing image: {image_path}")
-        
-        # Get preprocessed versions
-        processed_images = self.preprocess_image(image_path)
-        
-        # OCR configurations to try
-        ocr_configs = [
-            # Japanese configurations
-            {'lang': 'jpn', 'config': '--oem 3 --psm 6'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 3'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 4'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 8'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 11'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 12'},
-            {'lang': 'jpn', 'config': '--oem 3 --psm 13'},
-            # Japanese vertical text
-            {'lang': 'jpn_vert', 'config': '--oem 3 --psm 6'},
-            {'lang': 'jpn_vert', 'config': '--oem 3 --psm 5'},
-            # Combined
-            {'lang': 'jpn+jpn_vert', 'config': '--oem 3 --psm 6'},
-            # English as fallback
-            {'lang': 'eng', 'config': '--oem 3 --psm 6'},
-        ]
+        from ocr_scoring import score_components
+        from preprocessing import VARIANTS, PreprocessingGraph
+        from text_regions import region_pixels, select_regions
+        self.log(f"Processing image: {image_path}")
+        
+        # Preprocessed versions are computed lazily as candidates need them,
+        # into shared memory when OCR worker processes read them
+        store = None
+        if self.ocr_processes:
+            from shared_images import SharedImageStore
+            store = SharedImageStore()
+        with self.tracer.span('load', path=image_path):
+            image, self.last_text_scale = self.load_image(image_path)
+            variants = PreprocessingGraph(image, tracer=self.tracer, store=store)
+            # The graph owns the decoded image from here on, so retain() can free it
+            del image
+            image_hash = scaled_image_hash(hash_file(image_path) if self.ocr_cache else None,
+                                           self.last_text_scale)
+        if self.last_text_scale is not None:
+            self.log(format_scale_report(self.last_text_scale))
+        candidates = self.ordered_candidates(VARIANTS)
+        candidates_total, pruned, fingerprint = len(candidates), 0, None
+        if self.ranker is not None:
+            fingerprint = layout_fingerprint(variants.get('original'))
+            candidates, pruned = self.ranker.order(fingerprint, candidates)
+        
+        # Crop OCR to the text blocks found on the grayscale image
+        full_pixels = variants.get('original').width * variants.get('original').height
+        regions, coverage, detect_ms = [], 1.0, 0.0
+        if self.detect_regions:
+            start = time.perf_counter()
+            try:
+                gray = variants.get('gray')
+                with self.tracer.span('detect_regions'):
+                    regions, coverage = select_regions(gray)
+            except Exception as e:
+                self.log(f"Text region detection failed, using the whole image: {e}")
+            detect_ms = (time.perf_counter() - start) * 1000
+        ocr_pixels = region_pixels(regions) if regions else full_pixels
         
         best_text = ""
         best_score = 0
-        results = []
-        
-        for img_name, img in processed_images:
-            print(f"\nTrying preprocessing: {img_name}")
-            
-            for config in ocr_configs:
-                try:
-                    text = pytesseract.image_to_string(
-                        img, 
-                        lang=config['lang'], 
-                        config=config['config']
-                    )
-                    
-                    # Score the result
-                    score = self.score_ocr_result(text)
-                    
-                    print(f"  {config['lang']} (PSM {config['config'].split('--psm ')[-1].split()[0]}): "
-                          f"Score {score}, Length {len(text.strip())}")
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_text = text
-                        print(f"    ★ New best result!")
-                    
-                    results.append({
-                        'preprocessing': img_name,
-                        'config': config,
-                        'text': text,
-                        'score': score
-                    })
-                    
-                except Exception as e:
-                    print(f"  {config['lang']}: Failed - {e}")
+        best_candidate = None
+        tried = []
+        stopped_early = False
+        
+        if regions:
+            self.log(f"Detected {len(regions)} text regions covering {coverage:.0%} of the image ({detect_ms:.1f} ms)")
+        self.log(f"\nSearching {len(candidates)} OCR candidates ({self.search_strategy})")
+        if fingerprint is not None:
+            self.log(f"Layout {fingerprint}: {pruned} candidates pruned by learned ranking")
+        
+        search_start = time.perf_counter()
+        results = self.iter_ocr_results(candidates, image_hash, variants, regions)
+        try:
+            for img_name, config, text, error in results:
+                tried.append((img_name, config))
+                if error is not None:
+                    self.log(f"  {img_name} / {config['lang']}: Failed - {error}")
                     continue
-        
-        print(f"\nBest OCR result (score: {best_score}):")
-        print("=" * 50)
-        print(repr(best_text))
-        print("=" * 50)
+                
+                # Score the result
+                with self.tracer.span('score', variant=img_name, lang=config['lang'], config=config['config']):
+                    components = score_components(text)
+                score = components['score']
+                
+                self.log(f"  {img_name} / {config['lang']} (PSM {config['config'].split('--psm ')[-1].split()[0]}): "
+                      f"Score {score}, Length {components['length']}, "
+                      f"Japanese {components['japanese_ratio']:.0%}, Garbage {components['garbage_ratio']:.0%}, "
+                      f"Keywords {components['keyword_hits']}")
+                
+                if score > best_score:
+                    best_score = score
+                    best_text = text
+                    best_candidate = (img_name, config)
+                    self.log(f"    ★ New best result!")
+                
+                if self.search_strategy == 'adaptive' and self.is_good_enough(text, score):
+                    stopped_early = True
+                    self.log(f"    Threshold reached, stopping search")
+                    break
+        finally:
+            results.close()
+            variants.release_all()
+            if store is not None:
+                store.close()
+        ocr_ms = (time.perf_counter() - search_start) * 1000
+        if self.ranker is not None:
+            self.ranker.record(fingerprint, tried, best_candidate)
+        tried = len(tried)
+        
+        self.last_search_stats = {
+            'strategy': self.search_strategy,
+            'ocr_workers': self.ocr_workers,
+            'ocr_processes': self.ocr_processes,
+            'candidates_tried': tried,
+            'candidates_total': candidates_total,
+            'candidates_pruned': pruned,
+            'layout': fingerprint,
+            'stopped_early': stopped_early,
+            'best_score': best_score,
+            'preprocessing': variants.report(),
+            'preprocessing_peak_kb': variants.peak_bytes / 1024,
+            'regions': len(regions),
+            'region_detect_ms': detect_ms,
+            'ocr_pixels': ocr_pixels * tried,
+            'full_image_pixels': full_pixels * tried,
+            'text_scale': self.last_text_scale,
+            'ocr_ms': ocr_ms,
+        }
+        self.log(f"Tried {tried} of {candidates_total} OCR candidates in {ocr_ms:.0f} ms")
+        self.log(f"OCR input: {ocr_pixels * tried:,} pixels vs {full_pixels * tried:,} for whole images "
+              f"({1 - ocr_pixels / full_pixels:.0%} saved)")
+        self.log("Preprocessing cost:")
+        for name, cost in variants.report().items():
+            self.log(f"  {name}: {cost['ms']:.1f} ms, {cost['kb']:.0f} KB")
+        self.log(f"  peak held: {variants.peak_bytes / 1024:.0f} KB")
+        
+        if self.ocr_cache:
+            stats = self.ocr_cache.stats()
+            self.log(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses")
+        
+        self.log(f"\nBest OCR result (score: {best_score}):")
+        self.log("=" * 50)
+        self.log(repr(best_text))
+        self.log("=" * 50)
         
         return best_text
 
@@ -151,40 +469,8 @@ class ImprovedPropertySQLGenerator:
         """
         Score OCR result quality
         """
-        if not text or not text.strip():
-            return 0
-        
-        score = 0
-        
-        # Basic length score
-        score += len(text.strip())
-        
-        # Japanese character bonus
-        japanese_chars = 0
-        for char in text:
-            if ('\u3040' <= char <= '\u309F' or  # Hiragana
-                '\u30A0' <= char <= '\u30FF' or  # Katakana
-                '\u4E00' <= char <= '\u9FAF'):   # Kanji
-                japanese_chars += 1
-        
-        score += japanese_chars * 3  # Bonus for Japanese characters
-        
-        # Penalty for too many garbage characters
-        garbage_chars = len([c for c in text if c in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ' and 
-                           not any('\u3040' <= neighbor <= '\u309F' or 
-                                 '\u30A0' <= neighbor <= '\u30FF' or 
-                                 '\u4E00' <= neighbor <= '\u9FAF' 
-                                 for neighbor in text[max(0, text.index(c)-2):text.index(c)+3])])
-        
-        score -= garbage_chars * 2
-        
-        # Bonus for property-related keywords
-        property_keywords = ['価格', '万円', '㎡', '階', '築', '駅', '分', '所在地', '間取り', 'LDK']
-        for keyword in property_keywords:
-            if keyword in text:
-                score += 10
-        
-        return max(0, score)
+        from ocr_scoring import score_components
+        return score_components(text)['score']
 
     def parse_ocr_text_to_dict(self, ocr_text: str) -> Dict[str, str]:
         """
@@ -193,62 +479,70 @@ class ImprovedPropertySQLGenerator:
         data = {}
         lines = [line.strip() for line in ocr_text.split('\n') if line.strip()]
         
-        print("\n=== Parsing OCR Text ===")
+        self.log("\n=== Parsing OCR Text ===")
         for i, line in enumerate(lines):
-            print(f"{i:2d}: {line}")
+            self.log(f"{i:2d}: {line}")
         
-        # Enhanced field patterns for Japanese property listings
+        # Enhanced field patterns for Japanese property listings. Each entry is
+        # (labels, pattern): labelled patterns are matched against the value
+        # sliced after the label by the single-pass scanner, unlabelled ones
+        # are searched in the full text. Entries are tried in order.
         field_patterns = {
             '価格': [
-                r'価格[：:\s]*([0-9,，]+)万円',
-                r'([0-9,，]+)万円',
-                r'価格[：:\s]*(.+?)(?=万円)',
+                (('価格',), r'([0-9,，]+)万円'),
+                (None, r'([0-9,，]+)万円'),
+                (('価格',), r'(.+?)(?=万円)'),
             ],
             '所在地': [
-                r'所在地[：:\s]*(.+?)(?=\n|$)',
-                r'住所[：:\s]*(.+?)(?=\n|$)',
-                r'(東京都|神奈川県|埼玉県|千葉県|大阪府|京都府|兵庫県|愛知県|福岡県|北海道).*?[市区町村].*?[0-9０-９]+.*?[0-9０-９]+.*?[0-9０-９]+',
+                (('所在地',), r'(.+)'),
+                (('住所',), r'(.+)'),
+                (None, r'(東京都|神奈川県|埼玉県|千葉県|大阪府|京都府|兵庫県|愛知県|福岡県|北海道).*?[市区町村].*?[0-9０-９]+.*?[0-9０-９]+.*?[0-9０-９]+'),
             ],
             '間取り': [
-                r'間取り[：:\s]*([0-9０-９]+[SLDK]+)',
-                r'([0-9０-９]+[SLDK]+)',
-                r'間取り[：:\s]*(.+?)(?=\n|専有)',
+                (('間取り',), r'([0-9０-９]+[SLDK]+)'),
+                (None, r'([0-9０-９]+[SLDK]+)'),
+                (('間取り',), r'(.+?)(?=専有|$)'),
             ],
             '専有面積': [
-                r'専有面積[：:\s]*([0-9０-９.,，]+)㎡',
-                r'([0-9０-９.,，]+)㎡',
-                r'面積[：:\s]*([0-9０-９.,，]+)',
+                (('専有面積',), r'([0-9０-９.,，]+)㎡'),
+                (None, r'([0-9０-９.,，]+)㎡'),
+                (('面積',), r'([0-9０-９.,，]+)'),
             ],
             '築年月': [
-                r'築年月[：:\s]*([0-9０-９]{4})年([0-9０-９]{1,2})月',
-                r'([0-9０-９]{4})年([0-9０-９]{1,2})月築',
-                r'築[：:\s]*([0-9０-９]{4})年',
+                (('築年月',), r'([0-9０-９]{4})年([0-9０-９]{1,2})月'),
+                (None, r'([0-9０-９]{4})年([0-9０-９]{1,2})月築'),
+                (None, r'築[：:\s]*([0-9０-９]{4})年'),
             ],
             '階数': [
-                r'([0-9０-９]+)階',
-                r'階数[：:\s]*([0-9０-９]+)',
+                (None, r'([0-9０-９]+)階'),
+                (('階数',), r'([0-9０-９]+)'),
             ],
             '交通': [
-                r'交通[：:\s]*(.+?)(?=\n|専有|間取り)',
-                r'(.*?駅.*?徒歩.*?分)',
-                r'最寄[りり]?駅[：:\s]*(.+?)(?=\n|$)',
+                (('交通',), r'(.+?)(?=専有|間取り|$)'),
+                (None, r'(.*?駅.*?徒歩.*?分)'),
+                (('最寄駅', '最寄り駅'), r'(.+)'),
             ],
             '管理費': [
-                r'管理費[：:\s]*([0-9,，]+)円',
-                r'([0-9,，]+)円/月',
+                (('管理費', '管理費等'), r'([0-9,，]+)円'),
+                (None, r'([0-9,，]+)円/月'),
             ],
             '修繕積立金': [
-                r'修繕積立金[：:\s]*([0-9,，]+)円',
-                r'修繕費[：:\s]*([0-9,，]+)',
+                (('修繕積立金',), r'([0-9,，]+)円'),
+                (('修繕費',), r'([0-9,，]+)'),
             ]
         }
         
         # Apply patterns
         full_text = ' '.join(lines)
+        scan = scan_labels(ocr_text)
         
         for field_name, patterns in field_patterns.items():
-            for pattern in patterns:
-                matches = re.finditer(pattern, full_text, re.IGNORECASE)
+            for labels, pattern in patterns:
+                if labels:
+                    values = [value for label in labels for value in scan.values(label)]
+                    matches = filter(None, (re.match(pattern, value, re.IGNORECASE) for value in values))
+                else:
+                    matches = re.finditer(pattern, full_text, re.IGNORECASE)
                 for match in matches:
                     if match.groups():
                         # Join all groups or take the first meaningful one
@@ -259,7 +553,7 @@ class ImprovedPropertySQLGenerator:
                         
                         if value and value.strip():
                             data[field_name] = value.strip()
-                            print(f"✓ Found {field_name}: {value.strip()}")
+                            self.log(f"✓ Found {field_name}: {value.strip()}")
                             break
                 if field_name in data:
                     break
@@ -291,11 +585,11 @@ class ImprovedPropertySQLGenerator:
                     mapped_key = key_mapping.get(key, key)
                     if value and mapped_key not in data:
                         data[mapped_key] = value
-                        print(f"✓ Line parsing found {mapped_key}: {value}")
+                        self.log(f"✓ Line parsing found {mapped_key}: {value}")
         
-        print(f"\nExtracted {len(data)} fields:")
+        self.log(f"\nExtracted {len(data)} fields:")
         for key, value in data.items():
-            print(f"  {key}: {value}")
+            self.log(f"  {key}: {value}")
         
         return data
 
@@ -393,27 +687,30 @@ VALUES (
 
     def process_screenshot(self, image_path: str, verbose: bool = False) -> str:
         """Main processing method"""
-        print(f"Processing screenshot: {image_path}")
+        self.log(f"Processing screenshot: {image_path}")
         
         # Extract text using improved OCR
         ocr_text = self.extract_text_from_image(image_path)
         
         if not ocr_text.strip():
-            print("ERROR: No text could be extracted from the image!")
+            self.log("ERROR: No text could be extracted from the image!")
             return "-- No text extracted from image"
         
         # Parse structured data
-        structured_data = self.parse_ocr_text_to_dict(ocr_text)
+        with self.tracer.span('field_parse'):
+            structured_data = self.parse_ocr_text_to_dict(ocr_text)
         
         if not structured_data:
-            print("WARNING: No structured data could be parsed!")
+            self.log("WARNING: No structured data could be parsed!")
             return "-- No structured data parsed"
         
         # Parse into final format
-        parsed_data = self.parse_property_data(structured_data)
+        with self.tracer.span('value_parse'):
+            parsed_data = self.parse_property_data(structured_data)
         
         # Generate SQL
-        sql_insert = self.generate_sql_insert(parsed_data)
+        with self.tracer.span('render'):
+            sql_insert = self.generate_sql_insert(parsed_data)
         
         return sql_insert
 
@@ -422,17 +719,63 @@ def main():
     parser.add_argument('screenshot', help='Path to screenshot image')
     parser.add_argument('-v', '--verbose', action='store_true', help='Verbose output')
     parser.add_argument('-o', '--output', help='Output file')
+    parser.add_argument('--search', choices=['adaptive', 'exhaustive'], default='adaptive',
+                        help='OCR candidate search strategy (default: adaptive)')
+    parser.add_argument('--min-score', type=int,
+                        help='Stop the adaptive search once a result reaches this score')
+    parser.add_argument('--min-coverage', type=float, default=0.8,
+                        help='Stop the adaptive search once this fraction of property keywords is found (default: 0.8)')
+    parser.add_argument('--ocr-workers', type=int, default=os.cpu_count() or 1,
+                        help='Tesseract processes to run in parallel (default: CPU count)')
+    parser.add_argument('--ocr-concurrency', type=int,
+                        help='Maximum Tesseract calls of one image in flight at once (default: --ocr-workers)')
+    parser.add_argument('--ocr-processes', action='store_true',
+                        help='Run the OCR calls in --ocr-workers processes that read the preprocessed images '
+                             'from shared memory')
+    parser.add_argument('--regions', action='store_true',
+                        help='OCR only the detected text regions instead of the whole screenshot')
+    add_cache_arguments(parser)
+    add_backend_arguments(parser)
+    add_trace_arguments(parser)
+    add_ranking_arguments(parser)
+    add_normalize_arguments(parser)
     
     args = parser.parse_args()
+    tracer = tracer_from_args(args)
     
     try:
-        generator = ImprovedPropertySQLGenerator()
-        sql_result = generator.process_screenshot(args.screenshot, args.verbose)
+        generator = ImprovedPropertySQLGenerator(
+            ocr_cache=cache_from_args(args),
+            search_strategy=args.search,
+            min_score=args.min_score,
+            min_keyword_coverage=args.min_coverage,
+            ocr_workers=args.ocr_workers,
+            ocr_concurrency=args.ocr_concurrency,
+            detect_regions=args.regions,
+            ocr_backend=backend_from_args(args),
+            tracer=tracer,
+            quiet=args.quiet,
+            ranker=ranker_from_args(args),
+            ocr_processes=args.ocr_processes,
+            text_height=text_height_from_args(args)
+        )
+        if args.profile:
+            sql_result = run_profiled(generator.process_screenshot, args.profile, args.screenshot, args.verbose)
+        else:
+            sql_result = generator.process_screenshot(args.screenshot, args.verbose)
+        generator.close()
+        if generator.ranker is not None:
+            generator.log(format_ranking_report(generator.ranker))
+        
+        if args.trace:
+            tracer.write(args.trace, args.trace_format)
         
         if args.output:
             with open(args.output, 'w', encoding='utf-8') as f:
                 f.write(sql_result)
-            print(f"SQL written to: {args.output}")
+            generator.log(f"SQL written to: {args.output}")
+        elif args.quiet:
+            print(sql_result)
         else:
             print("\nGenerated SQL:")
             print("=" * 50)
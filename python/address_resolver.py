@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""
+Indexed Japanese address resolver
+
+Splits a listing address into region, prefecture, municipality, ward/town
+and postal code. Names from the bundled area dataset (japan_areas.py) are
+stored in character tries, one per level, and matched longest-prefix first
+while walking the address once, so a lookup is O(len(address)) however
+large the dataset grows. Municipalities and wards missing from the dataset
+fall back to their 市/区/町/村/郡 suffix. Results are memoised, since batch
+runs see the same building addresses over and over.
+"""
+
+import re
+from functools import lru_cache
+from collections import namedtuple
+from typing import Any, Dict, Optional, Tuple
+
+from japan_areas import REGION_PREFECTURES, PREFECTURE_MUNICIPALITIES, CITY_WARDS, POSTAL_CODE_RANGES
+
+# Field names match the area columns of the properties table
+ResolvedAddress = namedtuple(
+    'ResolvedAddress', ['zipcode', 'area_level_1', 'area_level_2', 'area_level_3', 'area_level_4']
+)
+EMPTY_ADDRESS = ResolvedAddress(None, None, None, None, None)
+# An address cut at each level; `rest` is what follows the municipality/ward
+AddressParts = namedtuple('AddressParts', ['zipcode', 'prefecture', 'municipality', 'ward', 'rest'])
+
+RESOLVE_CACHE_SIZE = 65536
+
+# Marks a complete name inside a trie node (no real character is empty)
+_END = ''
+
+# 〒123-4567 / 123-4567 / 1234567, not part of a longer number
+POSTAL_CODE_PATTERN = re.compile(r'〒?\s*(?<!\d)(\d{3})[-－ー‐]?(\d{4})(?!\d)')
+# Fallbacks for names the dataset does not know. Towns and villages outside a
+# 郡 are rare, so a 市 (then 区) suffix is preferred over an earlier 町/村,
+# which would cut cities such as 武蔵村山市 or 十日町市 short
+MUNICIPALITY_PATTERN = re.compile(r'[^\d\s]+?郡[^\d\s]+?[町村]|[^\d\s]+?市|[^\d\s]+?区|[^\d\s]+?[町村]')
+WARD_PATTERN = re.compile(r'[^\d\s区]{1,4}区')
+DISTRICT_TOWN_PATTERN = re.compile(r'[^\d\s]+?[町村]')
+# Town name: everything up to the block number (丁目, 番地 or the first digit)
+TOWN_PATTERN = re.compile(r'[^\d\s]+?(?=[一二三四五六七八九十]+丁目|\d|$)')
+
+_FULLWIDTH = str.maketrans('０１２３４５６７８９　', '0123456789 ')
+_FULLWIDTH_CHARS = re.compile('[０-９　]')
+
+
+class AreaTrie:
+    """Character trie of area names supporting longest-prefix lookups"""
+
+    def __init__(self):
+        self.root: Dict[str, Any] = {}
+        self.size = 0
+
+    def insert(self, name: str, value: Any):
+        node = self.root
+        for char in name:
+            node = node.setdefault(char, {})
+        if _END not in node:
+            self.size += 1
+        node[_END] = value
+
+    def longest_prefix(self, text: str, start: int = 0) -> Tuple[Any, int]:
+        """(value, end) of the longest name starting at text[start], or (None, start)"""
+        node = self.root
+        value, end = None, start
+        for position in range(start, len(text)):
+            node = node.get(text[position])
+            if node is None:
+                break
+            if _END in node:
+                value, end = node[_END], position + 1
+        return value, end
+
+
+def _build_index():
+    prefecture_region = {}
+    # Address start: prefectures, plus municipalities unique to one prefecture
+    # so addresses that omit the prefecture still resolve
+    root = AreaTrie()
+    municipalities = {}
+    subdivisions = {}
+    owners = {}
+    for region, prefectures in REGION_PREFECTURES.items():
+        for prefecture in prefectures:
+            prefecture_region[prefecture] = region
+            root.insert(prefecture, (prefecture, None))
+            municipalities[prefecture] = AreaTrie()
+    for prefecture, groups in PREFECTURE_MUNICIPALITIES.items():
+        for subdivision, names in groups.items():
+            for name in names:
+                municipalities[prefecture].insert(name, name)
+                subdivisions[(prefecture, name)] = subdivision
+                owners.setdefault(name, set()).add(prefecture)
+    for name, prefectures in owners.items():
+        if len(prefectures) == 1:
+            root.insert(name, (next(iter(prefectures)), name))
+
+    wards = {}
+    for city, names in CITY_WARDS.items():
+        wards[city] = AreaTrie()
+        for name in names:
+            wards[city].insert(name, name)
+    return prefecture_region, root, municipalities, subdivisions, wards
+
+
+PREFECTURE_REGION, _ROOT, _MUNICIPALITIES, _SUBDIVISIONS, _WARDS = _build_index()
+
+
+def normalize_address(address: str) -> str:
+    """Full-width digits to ASCII and no whitespace, as OCR output mixes both"""
+    # str.translate is slow on non-ASCII text, so only pay for it when needed
+    if _FULLWIDTH_CHARS.search(address):
+        address = address.translate(_FULLWIDTH)
+    return ''.join(address.split())
+
+
+def prefecture_for_postal_code(zipcode: str) -> Optional[str]:
+    """Prefecture whose postal code range contains `zipcode` (the narrowest on overlap)"""
+    prefix = int(zipcode[:3])
+    matches = [(high - low, prefecture) for prefecture, (low, high) in POSTAL_CODE_RANGES.items()
+               if low <= prefix <= high]
+    return min(matches)[1] if matches else None
+
+
+def _match_municipality(text: str, position: int, prefecture: Optional[str]) -> Tuple[Optional[str], int]:
+    if prefecture in _MUNICIPALITIES:
+        name, end = _MUNICIPALITIES[prefecture].longest_prefix(text, position)
+        if name:
+            return name, end
+    match = MUNICIPALITY_PATTERN.match(text, position)
+    if match:
+        return match.group(0), match.end()
+    return None, position
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def split_address(address: str) -> AddressParts:
+    """
+    Split an address into zipcode, prefecture, municipality and ward, plus
+    the normalised rest (town, block numbers, building)
+    """
+    if not address:
+        return AddressParts(None, None, None, None, '')
+    text = normalize_address(address)
+
+    zipcode = None
+    match = POSTAL_CODE_PATTERN.match(text)
+    if match:
+        zipcode = f"{match.group(1)}-{match.group(2)}"
+        text = text[match.end():]
+
+    value, position = _ROOT.longest_prefix(text)
+    prefecture, municipality = value or (None, None)
+    if prefecture is None and zipcode:
+        prefecture = prefecture_for_postal_code(zipcode)
+    if municipality is None:
+        municipality, position = _match_municipality(text, position, prefecture)
+    if municipality and municipality.endswith('郡'):
+        # A district (郡) is not a municipality on its own: include its town or village
+        match = DISTRICT_TOWN_PATTERN.match(text, position)
+        if match:
+            municipality, position = municipality + match.group(0), match.end()
+
+    ward = None
+    if municipality in _WARDS:
+        ward, position = _WARDS[municipality].longest_prefix(text, position)
+    elif municipality and municipality.endswith('市') and (prefecture, municipality) not in _SUBDIVISIONS:
+        match = WARD_PATTERN.match(text, position)
+        if match:
+            ward, position = match.group(0), match.end()
+    return AddressParts(zipcode, prefecture, municipality, ward, text[position:])
+
+
+@lru_cache(maxsize=RESOLVE_CACHE_SIZE)
+def resolve_address(address: str) -> ResolvedAddress:
+    """
+    Resolve an address into (zipcode, region, prefecture, municipality, ward/town).
+
+    Tokyo follows the client's hierarchy: area_level_3 is the subdivision
+    (23区 / 市部 / 郡部) and area_level_4 the ward or municipality. Elsewhere
+    area_level_3 is the municipality and area_level_4 its ward, or the town
+    for cities without wards.
+    """
+    if not address:
+        return EMPTY_ADDRESS
+    zipcode, prefecture, municipality, ward, rest = split_address.__wrapped__(address)
+    region = PREFECTURE_REGION.get(prefecture)
+
+    if prefecture == '東京都' and municipality:
+        subdivision = _SUBDIVISIONS.get((prefecture, municipality))
+        if subdivision is None:
+            subdivision = {'区': '23区', '市': '市部'}.get(municipality[-1], '郡部')
+        return ResolvedAddress(zipcode, region, prefecture, subdivision, municipality)
+
+    if ward is None and municipality:
+        match = TOWN_PATTERN.match(rest)
+        ward = match.group(0) if match else None
+    return ResolvedAddress(zipcode, region, prefecture, municipality, ward)
+
+
+def address_hierarchy(address: str) -> Dict[str, Optional[str]]:
+    """resolve_address as the dict of area columns used by build_row"""
+    return resolve_address(address)._asdict()
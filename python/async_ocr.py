@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+Asyncio Tesseract runner
+
+Runs `tesseract` as asyncio subprocesses for the async generator API
+(PropertySQLGenerator.extract_text_from_image_async / aiter_screenshots),
+so a long-running ingestion worker's event loop is never blocked on OCR.
+Images are piped to tesseract's stdin and the text read from its stdout,
+with no temp files. A semaphore caps the processes running at once. A call
+that times out or is cancelled kills its process before the error
+propagates.
+"""
+
+import io
+import os
+import shlex
+import asyncio
+from typing import Optional
+
+DEFAULT_MAX_PROCESSES = os.cpu_count() or 1
+
+
+class TesseractError(RuntimeError):
+    """tesseract exited with an error"""
+
+
+def encode_image(image) -> bytes:
+    """PIL image as PNG bytes for tesseract's stdin (fast, lightly compressed)"""
+    buffer = io.BytesIO()
+    image.save(buffer, format='PNG', compress_level=1)
+    return buffer.getvalue()
+
+
+class AsyncTesseract:
+    """
+    Concurrent tesseract subprocesses, at most `max_processes` at a time.
+
+    `timeout` (seconds) bounds each tesseract run; None waits indefinitely.
+    The semaphore is created on first use, so one instance can be built
+    outside the event loop that runs it.
+    """
+
+    # Name in OCR cache keys: it runs the same tesseract CLI as the pytesseract backend
+    name = 'pytesseract'
+
+    def __init__(self, max_processes: int = DEFAULT_MAX_PROCESSES, timeout: Optional[float] = None,
+                 tesseract_cmd: str = 'tesseract'):
+        self.max_processes = max(1, max_processes)
+        self.timeout = timeout
+        self.tesseract_cmd = tesseract_cmd
+        self._semaphore = None
+        self.processes_started = 0
+
+    @property
+    def semaphore(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_processes)
+        return self._semaphore
+
+    async def run(self, image_bytes: bytes, lang: str, config: str = '') -> str:
+        """OCR an encoded image (PNG, JPEG, ...) and return its text"""
+        async with self.semaphore:
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    self.tesseract_cmd, 'stdin', 'stdout', '-l', lang, *shlex.split(config),
+                    stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+            except FileNotFoundError:
+                raise TesseractError(f"{self.tesseract_cmd} is not installed or not on PATH")
+            self.processes_started += 1
+            try:
+                stdout, stderr = await asyncio.wait_for(process.communicate(image_bytes), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise asyncio.TimeoutError(f"tesseract took longer than {self.timeout}s")
+            except BaseException:
+                # Timed out or cancelled: don't leave tesseract running
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+        if process.returncode != 0:
+            message = stderr.decode('utf-8', 'replace').strip()
+            raise TesseractError(f"tesseract exited with status {process.returncode}: {message}")
+        return stdout.decode('utf-8')
+
+    async def image_to_string(self, image, lang: str, config: str = '') -> str:
+        """OCR a PIL image; encoding runs in a worker thread"""
+        image_bytes = await asyncio.to_thread(encode_image, image)
+        return await self.run(image_bytes, lang, config)
+
+
+async def gather_all(*coroutines) -> list:
+    """
+    asyncio.gather that, once one awaitable fails, cancels the others and
+    waits for them (and their tesseract processes) before re-raising
+    """
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
@@ -0,0 +1,241 @@
+#!/usr/bin/env python3
+
+"""
+Processed-image manifest for incremental, resumable batch runs
+
+A small SQLite journal records, for every image a batch run completed, its
+content hash, the OCR and parser versions that produced the result, the
+output target, the OCR text and the rendered record (or, for database
+loads, the id of the loaded row). Each entry is committed as soon as its
+record is written, or for database loads once the row's batch is committed,
+so a crashed run resumes where it stopped. On a re-run, unchanged images are replayed from the manifest,
+images whose parser version changed are re-parsed from the stored OCR text,
+and only new, modified or OCR-affected images are OCR'd again.
+"""
+
+import os
+import time
+import sqlite3
+import functools
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+from ocr_cache import hash_file
+
+# Plan actions for one image
+SKIP, REPARSE, PROCESS = 'skip', 'reparse', 'process'
+
+# Stored OCR texts re-parsed together by a batch reparse
+REPARSE_CHUNK_SIZE = 1000
+
+
+class BatchManifest:
+    """
+    Journal of completed images keyed by (image path, output target).
+
+    The target distinguishes output formats and databases, so e.g. loading
+    the same folder into a second database is not mistaken for a re-run.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS processed_images (
+                path TEXT NOT NULL,
+                target TEXT NOT NULL,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                ocr_version TEXT NOT NULL,
+                parser_version TEXT NOT NULL,
+                output_location TEXT,
+                ocr_text TEXT,
+                record TEXT,
+                row_id INTEGER,
+                processed_at REAL NOT NULL,
+                PRIMARY KEY (path, target)
+            )""")
+        columns = [row[1] for row in self.conn.execute('PRAGMA table_info(processed_images)')]
+        if 'row_id' not in columns:
+            self.conn.execute('ALTER TABLE processed_images ADD COLUMN row_id INTEGER')
+        self.conn.commit()
+        self.counts = {SKIP: 0, REPARSE: 0, PROCESS: 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def lookup(self, image_path: str, target: str) -> Optional[Dict[str, Any]]:
+        cursor = self.conn.execute(
+            'SELECT * FROM processed_images WHERE path = ? AND target = ?',
+            (os.path.abspath(image_path), target)
+        )
+        row = cursor.fetchone()
+        if row is None:
+            return None
+        return dict(zip([column[0] for column in cursor.description], row))
+
+    def content_hash(self, image_path: str, entry: Optional[Dict[str, Any]]) -> Tuple[str, int, int]:
+        """(hash, size, mtime_ns); the stored hash is reused while size and mtime are unchanged"""
+        st = os.stat(image_path)
+        if entry and entry['size'] == st.st_size and entry['mtime_ns'] == st.st_mtime_ns:
+            return entry['content_hash'], st.st_size, st.st_mtime_ns
+        return hash_file(image_path), st.st_size, st.st_mtime_ns
+
+    def plan(self, image_path: str, target: str, ocr_version: str,
+             parser_version: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        Decide what an image needs: SKIP (replay the stored record), REPARSE
+        (parse the stored OCR text again) or PROCESS (full OCR pipeline).
+        """
+        entry = self.lookup(image_path, target)
+        if entry is None:
+            return PROCESS, None
+        try:
+            content_hash = self.content_hash(image_path, entry)[0]
+        except OSError:
+            return PROCESS, None
+        if content_hash != entry['content_hash'] or ocr_version != entry['ocr_version']:
+            return PROCESS, entry
+        if parser_version != entry['parser_version'] or entry['ocr_text'] is None:
+            return REPARSE, entry
+        return SKIP, entry
+
+    def record(self, image_path: str, target: str, ocr_version: str, parser_version: str,
+               ocr_text: Optional[str], record: Optional[str], output_location: Optional[str],
+               row_id: Optional[int] = None):
+        """Journal one completed image; committed immediately so a crash keeps it"""
+        previous = self.lookup(image_path, target)
+        content_hash, size, mtime_ns = self.content_hash(image_path, previous)
+        self.conn.execute(
+            'INSERT OR REPLACE INTO processed_images '
+            '(path, target, content_hash, size, mtime_ns, ocr_version, parser_version, '
+            'output_location, ocr_text, record, row_id, processed_at) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)',
+            (os.path.abspath(image_path), target, content_hash, size, mtime_ns, ocr_version,
+             parser_version, output_location, ocr_text, record, row_id, time.time())
+        )
+        self.conn.commit()
+
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+
+def iter_incremental(image_paths: List[str], manifest: BatchManifest, target: str,
+                     ocr_version: str, parser_version: str,
+                     process: Callable[[List[str]], Iterator[Dict[str, Any]]],
+                     reparse: Callable[[str], Any],
+                     output_location: Optional[str] = None,
+                     replay: bool = True, force: bool = False,
+                     reparse_batch: Optional[Callable[[List[str]], List[Any]]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield batch results in input order, consulting the manifest first.
+
+    `process` runs the full pipeline over the paths that need it (e.g.
+    batch_processor.iter_batch); `reparse` turns stored OCR text into a
+    record, and `reparse_batch`, if given, a list of them at once (e.g.
+    PropertySQLGenerator.process_ocr_texts). Skipped images yield their stored record when `replay` is set
+    (file outputs), and every successful result is journalled before it is
+    yielded. Without `replay` (database loads) skipped images yield no
+    record, as their row is already in place, and results are journalled
+    by whoever loads them: each carries a 'journal' callback taking the new
+    row id, and 'replaces', the id of the image's previous row (or None).
+    """
+    plans = []
+    for path in image_paths:
+        if force:
+            # The entry is kept so a reloaded image still replaces its previous row
+            action, entry = PROCESS, manifest.lookup(path, target)
+        else:
+            action, entry = manifest.plan(path, target, ocr_version, parser_version)
+        manifest.counts[action] += 1
+        plans.append((path, action, entry))
+
+    processed = process([path for path, action, _ in plans if action == PROCESS])
+    reparsed = _iter_reparsed([(path, entry['ocr_text']) for path, action, entry in plans if action == REPARSE],
+                              reparse, reparse_batch)
+    for path, action, entry in plans:
+        if action == PROCESS:
+            result = next(processed)
+        elif action == REPARSE:
+            result = next(reparsed)
+        else:
+            result = {'path': path, 'sql': entry['record'] if replay else None, 'error': None,
+                      'skipped': True, 'elapsed': 0.0}
+
+        if action != SKIP and not result['error']:
+            record = result['sql'] if isinstance(result['sql'], str) else None
+            journal = functools.partial(manifest.record, path, target, ocr_version, parser_version,
+                                        result.get('ocr_text'), record, output_location)
+            if replay:
+                journal()
+            else:
+                result['journal'] = journal
+                result['replaces'] = entry['row_id'] if entry else None
+        result.pop('ocr_text', None)
+        yield result
+
+
+def _iter_reparsed(texts: List[Tuple[str, str]], reparse: Callable[[str], Any],
+                   reparse_batch: Optional[Callable[[List[str]], List[Any]]]) -> Iterator[Dict[str, Any]]:
+    """
+    Results for (path, OCR text) pairs in order. Chunks go through
+    `reparse_batch` as they are needed; a chunk it fails on is re-parsed one
+    text at a time, so only the bad texts fail.
+    """
+    for offset in range(0, len(texts), REPARSE_CHUNK_SIZE):
+        chunk = texts[offset:offset + REPARSE_CHUNK_SIZE]
+        records = None
+        if reparse_batch is not None:
+            start = time.perf_counter()
+            try:
+                records = reparse_batch([ocr_text for _, ocr_text in chunk])
+            except Exception:
+                # Re-parsed one at a time below, to tell which texts fail
+                records = None
+            elapsed = (time.perf_counter() - start) / len(chunk)
+        for index, (path, ocr_text) in enumerate(chunk):
+            result = {'path': path, 'sql': None, 'error': None, 'ocr_text': ocr_text, 'elapsed': 0.0}
+            if records is not None:
+                result['sql'], result['elapsed'] = records[index], elapsed
+                yield result
+                continue
+            start = time.perf_counter()
+            try:
+                result['sql'] = reparse(ocr_text)
+            except Exception as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['elapsed'] = time.perf_counter() - start
+            yield result
+
+
+def format_manifest_report(manifest: BatchManifest) -> str:
+    counts = manifest.counts
+    return (f"Manifest: {counts[PROCESS]} processed, {counts[REPARSE]} re-parsed, "
+            f"{counts[SKIP]} unchanged and skipped")
+
+
+def add_manifest_arguments(parser):
+    """Register the shared incremental-run options on an argparse parser"""
+    parser.add_argument(
+        '--manifest',
+        metavar='PATH',
+        help='SQLite manifest of processed images; re-runs skip unchanged images and resume after a crash'
+    )
+    parser.add_argument(
+        '--reprocess',
+        action='store_true',
+        help='Process every image again even if the manifest has it (the manifest is still updated)'
+    )
+
+
+def manifest_from_args(args) -> Optional[BatchManifest]:
+    """Open the manifest named by --manifest, or None for a plain run"""
+    return BatchManifest(args.manifest) if args.manifest else None
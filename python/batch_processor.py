@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+Batch processing for property listing screenshots
+
+Expands directories, glob patterns and file lists into an ordered list of
+images and fans them out across a process pool. Each image is processed
+independently so a single unreadable screenshot is reported instead of
+aborting the whole run. Results can be streamed to the output as each image
+finishes, so memory stays flat and partial output survives an interruption.
+"""
+
+import os
+import glob
+import time
+from collections import deque
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO
+
+from sql_output import output_preamble, output_epilogue
+from tracing import NULL_TRACER
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff', '.webp')
+
+# Generator instance owned by each worker process (see _init_worker)
+_worker_generator = None
+
+
+def is_image_file(path: str) -> bool:
+    """Check whether a path looks like a supported screenshot image"""
+    return os.path.splitext(path)[1].lower() in IMAGE_EXTENSIONS
+
+
+def read_file_list(list_path: str) -> List[str]:
+    """Read image paths from a text file, one per line (# starts a comment)"""
+    paths = []
+    with open(list_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith('#'):
+                paths.append(line)
+    return paths
+
+
+def collect_image_paths(inputs: Iterable[str], recursive: bool = False) -> List[str]:
+    """
+    Expand files, directories and glob patterns into a list of image paths.
+
+    Directory contents and glob matches are sorted so the output order is
+    stable between runs. Duplicates are dropped, keeping the first occurrence.
+    """
+    collected = []
+    seen = set()
+
+    def add(path):
+        key = os.path.normpath(path)
+        if key not in seen:
+            seen.add(key)
+            collected.append(path)
+
+    for item in inputs:
+        if os.path.isdir(item):
+            pattern = os.path.join(item, '**', '*') if recursive else os.path.join(item, '*')
+            for path in sorted(glob.glob(pattern, recursive=recursive)):
+                if os.path.isfile(path) and is_image_file(path):
+                    add(path)
+        elif glob.has_magic(item):
+            for path in sorted(glob.glob(item, recursive=True)):
+                if os.path.isfile(path) and is_image_file(path):
+                    add(path)
+        else:
+            # Plain paths are kept even if missing so they show up in the error report
+            add(item)
+
+    return collected
+
+
+def _init_worker(generator_cls, generator_kwargs=None):
+    """Create one generator per worker process so setup cost is paid once"""
+    global _worker_generator
+    _worker_generator = generator_cls(**(generator_kwargs or {}))
+
+
+def _init_pool_worker(generator_cls, generator_kwargs=None):
+    _init_worker(generator_cls, generator_kwargs)
+    # Pool workers end with os._exit, which skips atexit; multiprocessing
+    # finalizers still run, so the generator's OCR engines are released
+    from multiprocessing.util import Finalize
+    Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker():
+    """Close the worker's generator, releasing its OCR engines"""
+    global _worker_generator
+    if _worker_generator is not None and hasattr(_worker_generator, 'close'):
+        _worker_generator.close()
+    _worker_generator = None
+
+
+def _process_image(image_path: str, verbose: bool = False) -> Dict[str, Any]:
+    """Process a single image in a worker, capturing failures instead of raising"""
+    start = time.perf_counter()
+    cache = getattr(_worker_generator, 'ocr_cache', None)
+    before = cache.stats() if cache else None
+    tracer = getattr(_worker_generator, 'tracer', NULL_TRACER)
+    result = {'path': image_path, 'sql': None, 'error': None}
+    try:
+        with tracer.span('image', path=image_path):
+            result['sql'] = _worker_generator.process_screenshot(image_path, verbose)
+    except Exception as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    result['elapsed'] = time.perf_counter() - start
+    if cache:
+        after = cache.stats()
+        result['cache_hits'] = after['hits'] - before['hits']
+        result['cache_misses'] = after['misses'] - before['misses']
+    ocr_text = getattr(_worker_generator, 'last_ocr_text', None)
+    if ocr_text is not None and not result['error']:
+        # Recorded by the batch manifest so a parser change can skip OCR
+        result['ocr_text'] = ocr_text
+    pixels = getattr(_worker_generator, 'last_ocr_pixels', None)
+    if pixels and not result['error']:
+        result['ocr_pixels'], result['full_image_pixels'] = pixels
+    scaled = getattr(_worker_generator, 'last_text_scale', None)
+    if scaled and not result['error']:
+        result['pixels_before'], result['pixels_after'] = scaled.pixels_before, scaled.pixels_after
+        result['ocr_seconds'] = getattr(_worker_generator, 'last_ocr_seconds', None) or 0.0
+    if tracer.enabled:
+        result['spans'] = tracer.drain()
+    return result
+
+
+def start_worker_pool(generator_cls, jobs: int,
+                      generator_kwargs: Optional[Dict[str, Any]] = None):
+    """Process pool of `jobs` workers, each owning one generator; feed it with submit_image()"""
+    # Imported here: it pulls in multiprocessing, which single-image runs never need
+    from concurrent.futures import ProcessPoolExecutor
+    return ProcessPoolExecutor(max_workers=jobs, initializer=_init_pool_worker,
+                               initargs=(generator_cls, generator_kwargs))
+
+
+def submit_image(executor, image_path: str, verbose: bool = False):
+    """Queue one image on a start_worker_pool() pool; the future resolves to its result dict"""
+    return executor.submit(_process_image, image_path, verbose)
+
+
+def summarize_result(result: Dict[str, Any]) -> Dict[str, Any]:
+    """Per-image summary kept for reporting: the result without its record or OCR text"""
+    return {key: value for key, value in result.items() if key not in ('sql', 'ocr_text')}
+
+
+def iter_batch(image_paths: Iterable[str], generator_cls, jobs: int = 1,
+               verbose: bool = False,
+               generator_kwargs: Optional[Dict[str, Any]] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Lazily process images with up to `jobs` worker processes.
+
+    Results are yielded in input order as soon as each one (and everything
+    before it) is ready. At most 2 * jobs images are in flight, so memory
+    stays flat however many paths the iterable produces. Images still
+    pending when the consumer stops are cancelled.
+    """
+    if jobs <= 1:
+        _init_worker(generator_cls, generator_kwargs)
+        try:
+            for path in image_paths:
+                yield _process_image(path, verbose)
+        finally:
+            _close_worker()
+        return
+
+    with start_worker_pool(generator_cls, jobs, generator_kwargs) as executor:
+        remaining = iter(image_paths)
+        pending = deque()
+        try:
+            while True:
+                while len(pending) < 2 * jobs:
+                    path = next(remaining, None)
+                    if path is None:
+                        break
+                    pending.append(submit_image(executor, path, verbose))
+                if not pending:
+                    return
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def format_result(result: Dict[str, Any], output_format: str = 'sql') -> str:
+    """
+    Text written for one image result.
+
+    SQL output notes skipped images inline; COPY/CSV data cannot carry
+    comments, so failures there only appear in the error report.
+    """
+    if output_format != 'sql':
+        return '' if result['error'] else result['sql']
+    if result['error']:
+        return f"-- Skipped {result['path']}: {result['error']}\n\n"
+    return f"-- Source: {result['path']}{result['sql']}\n\n"
+
+
+class ResultWriter:
+    """
+    Streams image results to a text stream as they arrive.
+
+    Each record is written and flushed in one piece, so output from an
+    interrupted run is complete up to the last finished image. Only a small
+    summary (no SQL text) is kept per image for the final report.
+    """
+
+    def __init__(self, stream: TextIO, output_format: str = 'sql'):
+        self.stream = stream
+        self.output_format = output_format
+        self.summaries = []
+        # UTF-8 bytes written so far, so callers can locate each record
+        self.bytes_written = 0
+        self._closed = False
+        self._write(output_preamble(output_format))
+
+    def _write(self, text: str):
+        self.stream.write(text)
+        self.stream.flush()
+        self.bytes_written += len(text.encode('utf-8'))
+
+    def write(self, result: Dict[str, Any]) -> str:
+        """Write one image's record and return the text written"""
+        text = format_result(result, self.output_format)
+        self._write(text)
+        self.summaries.append(summarize_result(result))
+        return text
+
+    def write_all(self, results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for result in results:
+            self.write(result)
+        return self.summaries
+
+    def close(self):
+        """Terminate the document (e.g. the COPY end marker)"""
+        if not self._closed:
+            self._closed = True
+            self._write(output_epilogue(self.output_format))
+
+
+def format_error_report(results: List[Dict[str, Any]]) -> Optional[str]:
+    """Summarise failed images, or return None when every image succeeded"""
+    failed = [r for r in results if r['error']]
+    if not failed:
+        return None
+    lines = [f"{len(failed)} of {len(results)} images failed:"]
+    for result in failed:
+        lines.append(f"  {result['path']}: {result['error']}")
+    return '\n'.join(lines)
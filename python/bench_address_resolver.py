@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: indexed address resolver vs. the previous regex split
+
+Generates addresses from the bundled area dataset (with and without the
+prefecture, with 〒 postal codes and full-width block numbers), then times
+address_resolver.resolve_address with a cold and a warm memo cache against
+the previous implementation (greedy 県/市/区 regexes) and reports how often
+each gets prefecture, municipality and ward right.
+"""
+
+import re
+import time
+import random
+import argparse
+from typing import Dict, List, Optional, Tuple
+
+from japan_areas import PREFECTURE_MUNICIPALITIES, CITY_WARDS, POSTAL_CODE_RANGES
+from address_resolver import resolve_address
+
+TOWNS = ['本町', '栄町', '中町', '緑が丘', '桜木町', '旭町', '東町', '西町', '宮前', '新町', '幸町', '大手町']
+FULLWIDTH = str.maketrans('0123456789', '０１２３４５６７８９')
+
+
+# Previous implementation, kept here as the baseline
+def legacy_parse(address: str) -> Dict[str, Optional[str]]:
+    parts = {'zipcode': None, 'area_level_1': '関東地方', 'area_level_2': None,
+             'area_level_3': None, 'area_level_4': None}
+    if '県' in address:
+        match = re.search(r'([^県]+県)', address)
+        if match:
+            parts['area_level_2'] = match.group(1)
+    if '市' in address:
+        match = re.search(r'([^市]+市)', address)
+        if match:
+            parts['area_level_3'] = match.group(1)
+    if '区' in address:
+        match = re.search(r'([^区]+区)', address)
+        if match:
+            parts['area_level_4'] = match.group(1)
+    return parts
+
+
+def random_address(rng: random.Random) -> Tuple[str, Tuple[str, str, str]]:
+    """(address, (prefecture, level 3, level 4)) for one synthetic listing"""
+    prefecture = rng.choice(sorted(PREFECTURE_MUNICIPALITIES))
+    subdivision, names = rng.choice(sorted(PREFECTURE_MUNICIPALITIES[prefecture].items()))
+    municipality = rng.choice(names)
+    town = rng.choice(TOWNS)
+    block = f"{rng.randint(1, 9)}丁目{rng.randint(1, 30)}-{rng.randint(1, 20)}"
+    if rng.random() < 0.3:
+        block = block.translate(FULLWIDTH)
+
+    if municipality.endswith('郡'):
+        # A district is always followed by its town or village
+        municipality, town = municipality + rng.choice([t for t in TOWNS if t.endswith('町')]), ''
+    if prefecture == '東京都':
+        truth = (prefecture, subdivision, municipality)
+        rest = municipality
+    elif municipality in CITY_WARDS:
+        ward = rng.choice(CITY_WARDS[municipality])
+        truth = (prefecture, municipality, ward)
+        rest = municipality + ward
+    else:
+        truth = (prefecture, municipality, town or None)
+        rest = municipality
+    # Listings often leave out the prefecture
+    address = f"{prefecture if rng.random() < 0.85 else ''}{rest}{town}{block}"
+    if rng.random() < 0.2:
+        low, high = POSTAL_CODE_RANGES[prefecture]
+        address = f"〒{rng.randint(low, high):03d}-{rng.randint(0, 9999):04d} {address}"
+    return address, truth
+
+
+def make_addresses(count: int, unique: int, seed: int) -> List[Tuple[str, Tuple[str, str, str]]]:
+    """`count` addresses drawn from `unique` distinct ones, as buildings repeat across listings"""
+    rng = random.Random(seed)
+    pool = [random_address(rng) for _ in range(unique)]
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def accuracy(parse, addresses) -> float:
+    correct = 0
+    for address, truth in addresses:
+        parts = parse(address)
+        correct += (parts['area_level_2'], parts['area_level_3'], parts['area_level_4']) == truth
+    return correct / len(addresses)
+
+
+def time_run(parse, addresses) -> float:
+    start = time.perf_counter()
+    for address, _ in addresses:
+        parse(address)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark address resolution')
+    parser.add_argument('-n', '--count', type=int, default=100000, help='Addresses to resolve (default: %(default)s)')
+    parser.add_argument('--unique', type=int, default=20000,
+                        help='Distinct addresses among them (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    addresses = make_addresses(args.count, args.unique, args.seed)
+    distinct = list(dict.fromkeys(addresses))
+
+    def resolved(address):
+        return resolve_address(address)._asdict()
+
+    def uncached(address):
+        return resolve_address.__wrapped__(address)._asdict()
+
+    runs = [
+        ('legacy regex', legacy_parse, addresses),
+        ('trie, no memo', uncached, addresses),
+        ('trie, memoised', resolved, addresses),
+    ]
+    print(f"{len(addresses)} addresses, {len(distinct)} distinct")
+    print(f"{'method':<16} {'seconds':>9} {'addr/sec':>12} {'accuracy':>9}")
+    for name, parse, data in runs:
+        resolve_address.cache_clear()
+        elapsed = time_run(parse, data)
+        info = resolve_address.cache_info()
+        print(f"{name:<16} {elapsed:>9.3f} {len(data) / elapsed:>12,.0f} {accuracy(parse, distinct):>9.1%}")
+    print(f"memo cache: {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
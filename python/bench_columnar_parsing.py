@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: columnar vs. per-record parsing of numeric and date fields
+
+Generates raw field strings in the shapes OCR produces (万円 prices with
+commas, full-width digits, ㎡ and m² areas, '-' and empty cells), then times
+PropertySQLGenerator's scalar parsers record by record against
+columnar_parsing over whole columns, and checks both give the same values.
+"""
+
+import time
+import random
+import argparse
+from typing import Dict, List
+
+from columnar_parsing import parse_columns, column_values
+from property_sql_generator import PropertySQLGenerator, NUMERIC_FIELDS
+
+FULLWIDTH = str.maketrans('0123456789', '０１２３４５６７８９')
+
+
+def random_fields(rng: random.Random) -> Dict[str, str]:
+    """Raw values for the NUMERIC_FIELDS labels of one listing"""
+    price = rng.randint(800, 25000)
+    area = f"{rng.randint(15, 150)}.{rng.randint(0, 99):02d}"
+    fields = {
+        '価格': rng.choice([f"{price:,}万円", f"{price}万円", f"{price * 10000:,}円"]),
+        '専有面積': rng.choice([f"{area}㎡", f"{area}m²（壁芯）"]),
+        '築年月': f"{rng.randint(1970, 2025)}年{rng.randint(1, 12)}月築",
+        'バルコニー': f"{rng.randint(2, 30)}.{rng.randint(0, 9)}㎡",
+        '総戸数': f"{rng.randint(10, 900)}戸",
+        '更新日': f"2025年{rng.randint(1, 12):02d}月{rng.randint(1, 28):02d}日",
+        '次回更新予定': f"2025年{rng.randint(1, 12)}月{rng.randint(1, 28)}日",
+        '修繕積立金': f"{rng.randint(5000, 40000):,}円／月",
+    }
+    for label in fields:
+        roll = rng.random()
+        if roll < 0.05:
+            fields[label] = '-'
+        elif roll < 0.08:
+            fields[label] = ''
+        elif roll < 0.2:
+            fields[label] = fields[label].translate(FULLWIDTH)
+    return fields
+
+
+def make_records(count: int, seed: int) -> List[Dict[str, str]]:
+    rng = random.Random(seed)
+    return [random_fields(rng) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark columnar parsing of numeric fields')
+    parser.add_argument('-n', '--count', type=int, default=100000, help='Records to parse (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    generator = PropertySQLGenerator()
+    records = make_records(args.count, args.seed)
+
+    start = time.perf_counter()
+    scalar = {key: [getattr(generator, method)(record.get(label, '')) for record in records]
+              for label, key, method in NUMERIC_FIELDS}
+    scalar_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    columns = parse_columns(records, NUMERIC_FIELDS)
+    columnar_elapsed = time.perf_counter() - start
+    columnar = {key: column_values(column) for key, column in columns.items()}
+
+    print(f"{len(records)} records, {len(NUMERIC_FIELDS)} fields each")
+    print(f"scalar    {scalar_elapsed:>8.3f} s {len(records) / scalar_elapsed:>12,.0f} records/sec")
+    print(f"columnar  {columnar_elapsed:>8.3f} s {len(records) / columnar_elapsed:>12,.0f} records/sec "
+          f"({scalar_elapsed / columnar_elapsed:.1f}x)")
+    print('nulls: ' + ', '.join(f"{key} {int(column.mask.sum())}" for key, column in columns.items()))
+    for key in scalar:
+        mismatches = sum(a != b for a, b in zip(scalar[key], columnar[key]))
+        assert mismatches == 0, f"{key}: {mismatches} values differ from the scalar parser"
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: single-pass label scanner vs. per-field regex search
+
+Builds long synthetic OCR outputs by repeating a listing table between
+noise lines and times PropertySQLGenerator.parse_ocr_text_to_dict against
+the previous implementation (one lazy regex per field over the joined text).
+"""
+
+import re
+import time
+import argparse
+import random
+
+from property_sql_generator import PropertySQLGenerator
+
+SAMPLE_TABLE = """物件情報
+所在地 神奈川県横浜市金沢区東朝比奈 3丁目 価格 2,380万円
+交通 京急逗子線 六浦駅 徒歩19分 管理費等 14,120円
+修繕積立金 27,300円 その他費用 -
+間取り 3LDK 専有面積 78.44㎡(約23.72坪)
+築年月 1994年04月築 階数 / 階建 4階 / 地上5階建
+向き 南 バルコニー 9.47㎡
+現況 空家 駐車場 -
+建物構造 鉄筋コンクリート造 総戸数 123戸
+管理会社 (株)東急コミュニティー 管理形態 管理会社に全部委託
+取引態様 仲介 土地権利 所有権
+更新日 2025年07月21日 次回更新予定 2025年08月04日
+物件番号 FSQAGAAE"""
+
+NOISE_CHARS = 'あいうえおかきくけこ物件情報地図を見るお問い合わせ0123456789ABCxyz '
+
+# Previous implementation, kept here as the baseline
+LEGACY_PATTERNS = {
+    '所在地': r'所在地[：:\s]*(.+?)(?=\n|$)',
+    '価格': r'価格[：:\s]*(.+?)(?=\n|万円)',
+    '交通': r'交通[：:\s]*(.+?)(?=\n|駅)',
+    '修繕積立金': r'修繕積立金[：:\s]*(.+?)(?=\n|円)',
+    'その他費用': r'その他費用[：:\s]*(.+?)(?=\n|$)',
+    '間取り': r'間取り[：:\s]*(.+?)(?=\n|$)',
+    '専有面積': r'専有面積[：:\s]*(.+?)(?=\n|㎡|m)',
+    '築年月': r'築年月[：:\s]*(.+?)(?=\n|築)',
+    '階数': r'階数[／/]?構造[：:\s]*(.+?)(?=\n|階)',
+    '向き': r'向き[：:\s]*(.+?)(?=\n|$)',
+    'バルコニー': r'バルコニー[：:\s]*(.+?)(?=\n|㎡|m)',
+    '現況': r'現況[：:\s]*(.+?)(?=\n|$)',
+    '駐車場': r'駐車場[：:\s]*(.+?)(?=\n|$)',
+    '建物構造': r'建物構造[：:\s]*(.+?)(?=\n|造)',
+    '総戸数': r'総戸数[：:\s]*(.+?)(?=\n|戸)',
+    '管理会社': r'管理会社[：:\s]*(.+?)(?=\n|$)',
+    '管理形態': r'管理形態[：:\s]*(.+?)(?=\n|$)',
+    '土地権利': r'土地権利[：:\s]*(.+?)(?=\n|$)',
+    '取引態様': r'取引態様[：:\s]*(.+?)(?=\n|$)',
+    '更新日': r'更新日[：:\s]*(.+?)(?=\n|日)',
+    '次回更新予定': r'次回更新予定[：:\s]*(.+?)(?=\n|日)',
+    '物件番号': r'物件番号[：:\s]*(.+?)(?=\n|$)'
+}
+
+
+def legacy_parse(ocr_text: str) -> dict:
+    data = {}
+    full_text = ' '.join(ocr_text.strip().split('\n'))
+    for field_name, pattern in LEGACY_PATTERNS.items():
+        match = re.search(pattern, full_text, re.IGNORECASE | re.MULTILINE)
+        if match:
+            data[field_name] = match.group(1).strip()
+    return data
+
+
+def make_ocr_text(target_chars: int, seed: int = 0) -> str:
+    """Noise lines around a listing table, repeated up to ~target_chars"""
+    rng = random.Random(seed)
+    parts = []
+    size = 0
+    while size < target_chars:
+        for _ in range(rng.randint(5, 20)):
+            line = ''.join(rng.choice(NOISE_CHARS) for _ in range(rng.randint(10, 60)))
+            parts.append(line)
+            size += len(line) + 1
+        parts.append(SAMPLE_TABLE)
+        size += len(SAMPLE_TABLE) + 1
+    return '\n'.join(parts)
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR field extraction on long texts')
+    parser.add_argument('--sizes', default='1000,10000,100000,1000000',
+                        help='Comma-separated OCR text sizes in characters')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    generator = PropertySQLGenerator()
+    print(f"{'chars':>10} {'legacy ms':>12} {'scanner ms':>12} {'speedup':>8}")
+    for size in (int(s) for s in args.sizes.split(',')):
+        text = make_ocr_text(size)
+        legacy = time_call(legacy_parse, text, args.repeat)
+        scanner = time_call(generator.parse_ocr_text_to_dict, text, args.repeat)
+        print(f"{len(text):>10} {legacy * 1000:>12.3f} {scanner * 1000:>12.3f} {legacy / scanner:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
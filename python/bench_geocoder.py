@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: offline geocoding throughput
+
+Builds addresses from the gazetteer's own towns (with block numbers in the
+styles listings use: 4丁目15番3号, 4-15-3, full-width digits) plus a share of
+towns it does not know, then times per-address Gazetteer.geocode with a cold
+cache and Gazetteer.geocode_batch over the whole list, and reports the
+precision (chome / town / municipality) the matches reached.
+"""
+
+import re
+import time
+import random
+import argparse
+from collections import Counter
+
+from address_resolver import split_address
+from geocoder import Gazetteer, PRECISIONS
+
+FULLWIDTH = str.maketrans('0123456789', '０１２３４５６７８９')
+CHOME_NUMBER_PATTERN = re.compile(r'^(.+?)(\d+)丁目$')
+
+
+def make_addresses(gazetteer: Gazetteer, count: int, unique: int, miss_rate: float, seed: int):
+    rng = random.Random(seed)
+    chome = [name for name, precision in zip(gazetteer.names, gazetteer.precision) if precision == 'chome']
+    pool = []
+    for _ in range(unique):
+        prefecture, municipality, town = rng.choice(chome)
+        name, number = CHOME_NUMBER_PATTERN.match(town).groups()
+        if rng.random() < miss_rate:
+            name = rng.choice(['架空', '未登録', '新開地']) + name
+        style = rng.random()
+        if style < 0.4:
+            rest = f"{name}{number}丁目{rng.randint(1, 30)}番{rng.randint(1, 20)}号"
+        elif style < 0.8:
+            rest = f"{name}{number}-{rng.randint(1, 30)}-{rng.randint(1, 20)}"
+        else:
+            rest = f"{name}{number}丁目".translate(FULLWIDTH)
+        pool.append(f"{prefecture}{municipality}{rest}")
+    return [rng.choice(pool) for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark offline geocoding')
+    parser.add_argument('-n', '--count', type=int, default=100000, help='Addresses to geocode (default: %(default)s)')
+    parser.add_argument('--unique', type=int, default=20000,
+                        help='Distinct addresses among them (default: %(default)s)')
+    parser.add_argument('--miss-rate', type=float, default=0.1,
+                        help='Share of addresses naming towns the gazetteer lacks (default: %(default)s)')
+    parser.add_argument('--gazetteer', action='append', help='Gazetteer CSV (default: the bundled one)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    gazetteer = Gazetteer(args.gazetteer)
+    print(f"Gazetteer: {len(gazetteer)} entries loaded in {(time.perf_counter() - start) * 1000:.1f} ms")
+    addresses = make_addresses(gazetteer, args.count, args.unique, args.miss_rate, args.seed)
+
+    gazetteer.locate.cache_clear()
+    split_address.cache_clear()
+    start = time.perf_counter()
+    points = [gazetteer.geocode(address) for address in addresses]
+    elapsed = time.perf_counter() - start
+    print(f"geocode        {len(addresses) / elapsed:>12,.0f} addresses/sec")
+
+    gazetteer.locate.cache_clear()
+    split_address.cache_clear()
+    start = time.perf_counter()
+    lng, lat = gazetteer.geocode_batch(addresses)
+    elapsed = time.perf_counter() - start
+    print(f"geocode_batch  {len(addresses) / elapsed:>12,.0f} addresses/sec")
+
+    precision = Counter(gazetteer.precision[gazetteer.locate(address)] if gazetteer.locate(address) >= 0
+                        else 'none' for address in addresses)
+    print('precision: ' + ', '.join(f"{level} {precision[level] / len(addresses):.1%}"
+                                   for level in PRECISIONS + ('none',)))
+    assert sum(point is not None for point in points) == int((lng == lng).sum())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: OCR calls/sec for each OCR backend
+
+Runs the same image through pytesseract (a tesseract subprocess per call)
+and tesserocr (warm in-process engines) and reports first-call latency,
+which includes loading the traineddata, and steady-state calls per second.
+Backends that are not installed are skipped.
+"""
+
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from PIL import Image
+
+from ocr_backends import create_backend
+
+
+def run_calls(backend, image, lang: str, config: str, calls: int, threads: int) -> float:
+    """Seconds taken for `calls` OCR calls spread over `threads` threads"""
+    start = time.perf_counter()
+    if threads <= 1:
+        for _ in range(calls):
+            backend.image_to_string(image, lang=lang, config=config)
+    else:
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            list(executor.map(lambda _: backend.image_to_string(image, lang=lang, config=config),
+                              range(calls)))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR backends')
+    parser.add_argument('--image', default='image001.png', help='Image to OCR (default: %(default)s)')
+    parser.add_argument('--lang', default='jpn', help='Tesseract language (default: %(default)s)')
+    parser.add_argument('--config', default='--oem 3 --psm 6', help='Tesseract config (default: %(default)s)')
+    parser.add_argument('--calls', type=int, default=20, help='Timed calls per backend (default: %(default)s)')
+    parser.add_argument('--threads', default='1,4', help='Comma-separated thread counts (default: %(default)s)')
+    parser.add_argument('--backends', default='pytesseract,tesserocr', help='Comma-separated backends')
+    args = parser.parse_args()
+
+    image = Image.open(args.image)
+    image.load()
+    thread_counts = [int(t) for t in args.threads.split(',')]
+
+    print(f"{'backend':<12} {'threads':>7} {'first ms':>9} {'calls/sec':>10} {'ms/call':>8}")
+    baseline = {}
+    for name in args.backends.split(','):
+        try:
+            backend = create_backend(name, pool_size=max(thread_counts))
+        except RuntimeError as e:
+            print(f"{name:<12} skipped: {e}")
+            continue
+        try:
+            first = run_calls(backend, image, args.lang, args.config, 1, 1)
+            for threads in thread_counts:
+                # Warm one engine per thread before timing
+                run_calls(backend, image, args.lang, args.config, threads, threads)
+                elapsed = run_calls(backend, image, args.lang, args.config, args.calls, threads)
+                rate = args.calls / elapsed
+                speedup = ''
+                if threads in baseline:
+                    speedup = f"  {rate / baseline[threads]:.1f}x vs {args.backends.split(',')[0]}"
+                else:
+                    baseline[threads] = rate
+                print(f"{name:<12} {threads:>7} {first * 1000:>9.1f} {rate:>10.2f} "
+                      f"{elapsed / args.calls * 1000:>8.1f}{speedup}")
+        except Exception as e:
+            print(f"{name:<12} failed: {e}")
+        finally:
+            backend.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: vectorised OCR scorer vs. the previous per-character scorer
+
+Times ocr_scoring.score_components on synthetic OCR outputs of 10-100 KB
+and compares it with the previous implementation, whose garbage penalty
+called text.index() for every Latin letter.
+"""
+
+import time
+import random
+import argparse
+
+from ocr_scoring import PROPERTY_KEYWORDS, score_components
+
+MIXED_CHARS = ('所在地価格間取り専有面積築年月交通駅徒歩分万円㎡階'
+               'あいうえおかきくけこアイウエオカキクケコ'
+               'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 ,.-/\n')
+
+
+def legacy_score(text: str) -> int:
+    """Previous ImprovedPropertySQLGenerator.score_ocr_result, kept as the baseline"""
+    if not text or not text.strip():
+        return 0
+    score = len(text.strip())
+    japanese_chars = 0
+    for char in text:
+        if ('\u3040' <= char <= '\u309F' or
+                '\u30A0' <= char <= '\u30FF' or
+                '\u4E00' <= char <= '\u9FAF'):
+            japanese_chars += 1
+    score += japanese_chars * 3
+    garbage_chars = len([c for c in text if c in 'abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ' and
+                         not any('\u3040' <= neighbor <= '\u309F' or
+                                 '\u30A0' <= neighbor <= '\u30FF' or
+                                 '\u4E00' <= neighbor <= '\u9FAF'
+                                 for neighbor in text[max(0, text.index(c)-2):text.index(c)+3])])
+    score -= garbage_chars * 2
+    for keyword in PROPERTY_KEYWORDS:
+        if keyword in text:
+            score += 10
+    return max(0, score)
+
+
+def make_text(size_bytes: int, seed: int = 0) -> str:
+    """Random mixed Japanese/Latin text of roughly `size_bytes` UTF-8 bytes"""
+    rng = random.Random(seed)
+    chars = []
+    total = 0
+    while total < size_bytes:
+        c = rng.choice(MIXED_CHARS)
+        chars.append(c)
+        total += len(c.encode('utf-8'))
+    return ''.join(chars)
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark OCR result scoring')
+    parser.add_argument('--sizes', default='10,25,50,100', help='Comma-separated sizes in KB')
+    parser.add_argument('--repeat', type=int, default=5, help='Timing repetitions (best is reported)')
+    args = parser.parse_args()
+
+    print(f"{'KB':>5} {'legacy ms':>12} {'vectorised ms':>14} {'speedup':>8}  components")
+    for kb in (int(s) for s in args.sizes.split(',')):
+        text = make_text(kb * 1024)
+        legacy = time_call(legacy_score, text, args.repeat)
+        vectorised = time_call(score_components, text, args.repeat)
+        components = score_components(text)
+        print(f"{kb:>5} {legacy * 1000:>12.2f} {vectorised * 1000:>14.2f} {legacy / vectorised:>7.1f}x  "
+              f"jp={components['japanese_ratio']:.2f} garbage={components['garbage_ratio']:.2f} "
+              f"kw={components['keyword_hits']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: end-to-end throughput and field accuracy on a synthetic corpus
+
+Runs PropertySQLGenerator and ImprovedPropertySQLGenerator over a corpus
+from synthetic_listings.py and reports images/sec, per-stage latency
+percentiles (OCR, field parse, value parse, SQL render) and per-field
+accuracy against the ground truth. With --normalize, the pixel counts
+before and after text-height rescaling are reported too. --parse-only feeds the exact table text
+instead of running OCR, to time the parsing stages (and see their accuracy
+ceiling) without Tesseract.
+"""
+
+import io
+import sys
+import time
+import argparse
+import tempfile
+import contextlib
+from collections import defaultdict
+from typing import Any, Dict, List
+
+from ocr_backends import OCR_BACKENDS, create_backend
+from candidate_ranking import add_ranking_arguments, ranker_from_args, format_ranking_report
+from text_scale import add_normalize_arguments, text_height_from_args
+from synthetic_listings import generate_corpus, load_manifest
+
+# Generator method timed for each pipeline stage
+STAGES = [
+    ('ocr', 'extract_text_from_image'),
+    ('field_parse', 'parse_ocr_text_to_dict'),
+    ('value_parse', 'parse_property_data'),
+    ('render', 'generate_sql_insert'),
+]
+GENERATORS = ('base', 'improved')
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def values_match(expected: Any, actual: Any) -> bool:
+    if isinstance(expected, float):
+        return isinstance(actual, (int, float)) and abs(expected - actual) < 0.005
+    if isinstance(actual, str):
+        actual = actual.strip()
+    return expected == actual
+
+
+def make_generator(name: str, args):
+    backend = create_backend(args.ocr_backend)
+    if name == 'base':
+        from property_sql_generator import PropertySQLGenerator
+        return PropertySQLGenerator(ocr_backend=backend, detect_regions=args.regions,
+                                    text_height=text_height_from_args(args))
+    from ImprovedPropertySQLGenerator import ImprovedPropertySQLGenerator
+    with contextlib.redirect_stdout(io.StringIO()):
+        return ImprovedPropertySQLGenerator(ocr_backend=backend, ocr_workers=args.ocr_workers,
+                                            search_strategy=args.search, ranker=ranker_from_args(args),
+                                            detect_regions=args.regions,
+                                            text_height=text_height_from_args(args))
+
+
+def instrument(generator, timings: Dict[str, List[float]], captured: Dict[str, Any]):
+    """Wrap the stage methods of one generator instance to record their latency"""
+    for stage, method_name in STAGES:
+        method = getattr(generator, method_name)
+
+        def timed(*args, _stage=stage, _method=method, **kwargs):
+            start = time.perf_counter()
+            result = _method(*args, **kwargs)
+            timings[_stage].append(time.perf_counter() - start)
+            if _stage == 'value_parse':
+                captured['parsed'] = result
+            return result
+
+        setattr(generator, method_name, timed)
+
+
+def run_generator(name: str, entries: List[Dict[str, Any]], args) -> Dict[str, Any]:
+    generator = make_generator(name, args)
+    if args.parse_only:
+        texts = {entry['path']: entry['text'] for entry in entries}
+        generator.extract_text_from_image = lambda path: texts[path]
+
+    timings = defaultdict(list)
+    captured = {}
+    instrument(generator, timings, captured)
+    correct, attempted = defaultdict(int), defaultdict(int)
+    failures = 0
+    candidates_tried = 0
+    pixels_before = pixels_after = 0
+
+    start = time.perf_counter()
+    for entry in entries:
+        captured.clear()
+        image_start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(io.StringIO()):
+                generator.process_screenshot(entry['path'])
+        except Exception:
+            failures += 1
+        timings['total'].append(time.perf_counter() - image_start)
+        candidates_tried += getattr(generator, 'last_search_stats', {}).get('candidates_tried', 0)
+        scaled = getattr(generator, 'last_text_scale', None)
+        if scaled is not None:
+            pixels_before += scaled.pixels_before
+            pixels_after += scaled.pixels_after
+
+        parsed = captured.get('parsed')
+        for field, expected in entry['truth'].items():
+            # Only score fields this generator extracts at all
+            if parsed is None or field not in parsed:
+                continue
+            attempted[field] += 1
+            correct[field] += values_match(expected, parsed[field])
+    elapsed = time.perf_counter() - start
+
+    ranking = None
+    if getattr(generator, 'ranker', None) is not None:
+        ranking = format_ranking_report(generator.ranker)
+    if hasattr(generator, 'close'):
+        generator.close()
+    return {
+        'images': len(entries),
+        'failures': failures,
+        'images_per_sec': len(entries) / elapsed if elapsed > 0 else 0.0,
+        'timings': timings,
+        'accuracy': {field: correct[field] / attempted[field] for field in attempted},
+        'candidates_tried': candidates_tried,
+        'ranking': ranking,
+        'pixels': (pixels_before, pixels_after),
+    }
+
+
+def print_report(name: str, report: Dict[str, Any]):
+    print(f"\n== {name}: {report['images']} images, {report['images_per_sec']:.2f} images/sec, "
+          f"{report['failures']} failures")
+    if report['candidates_tried']:
+        print(f"OCR candidates run: {report['candidates_tried']} "
+              f"({report['candidates_tried'] / report['images']:.1f} per image)")
+    if report['ranking']:
+        print(report['ranking'])
+    pixels_before, pixels_after = report['pixels']
+    if pixels_before:
+        print(f"Text height normalization: {pixels_before / report['images']:,.0f} -> "
+              f"{pixels_after / report['images']:,.0f} pixels per image")
+    print(f"{'stage':<12} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for stage in [stage for stage, _ in STAGES] + ['total']:
+        values = report['timings'].get(stage)
+        if not values:
+            continue
+        print(f"{stage:<12} " + ' '.join(f"{percentile(values, pct) * 1000:>9.2f}" for pct in (50, 90, 99, 100)))
+
+    accuracy = report['accuracy']
+    if accuracy:
+        print(f"{'field':<28} {'accuracy':>8}")
+        for field, value in sorted(accuracy.items()):
+            print(f"{field:<28} {value:>8.0%}")
+        print(f"{'overall (mean of fields)':<28} {sum(accuracy.values()) / len(accuracy):>8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark both generators on a synthetic corpus')
+    parser.add_argument('--corpus', help='Corpus directory or manifest.jsonl (default: generate one)')
+    parser.add_argument('-n', '--count', type=int, default=20,
+                        help='Images to generate when no --corpus is given (default: %(default)s)')
+    parser.add_argument('--font', action='append', dest='fonts', help='Japanese font for a generated corpus')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for a generated corpus')
+    parser.add_argument('--limit', type=int, help='Only use the first N corpus images')
+    parser.add_argument('--generators', default=','.join(GENERATORS),
+                        help='Comma-separated generators to run (default: %(default)s)')
+    parser.add_argument('--parse-only', action='store_true',
+                        help='Skip OCR and feed the ground-truth table text to the parsers')
+    parser.add_argument('--ocr-backend', choices=OCR_BACKENDS, default='auto', help='OCR backend')
+    parser.add_argument('--ocr-workers', type=int, default=1, help='OCR threads for the improved generator')
+    parser.add_argument('--search', choices=['adaptive', 'exhaustive'], default='adaptive',
+                        help='Improved generator search strategy')
+    parser.add_argument('--regions', action='store_true',
+                        help='OCR only the detected text regions (compare OCR time with and without)')
+    add_ranking_arguments(parser)
+    add_normalize_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='listing-corpus-') as tmp:
+        corpus = args.corpus
+        if corpus is None:
+            try:
+                corpus = generate_corpus(tmp, args.count, seed=args.seed, fonts=args.fonts)
+            except RuntimeError as e:
+                print(f"Error: {e}", file=sys.stderr)
+                sys.exit(1)
+        entries = load_manifest(corpus)[:args.limit]
+
+        for name in args.generators.split(','):
+            print_report(name, run_generator(name, entries, args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: memory held by a batch of rows, PropertyRecord vs. row dicts
+
+Parses synthetic listings once, then builds the same rows as PropertyRecord
+tuples (what build_row returns) and as the per-row dicts it used to return,
+and reports the memory each batch holds (tracemalloc) and build time.
+"""
+
+import gc
+import time
+import random
+import argparse
+import tracemalloc
+
+import synthetic_listings
+from property_sql_generator import PropertySQLGenerator
+from sql_output import ROW_KEYS
+
+UNIQUE_LISTINGS = 1000
+
+
+def measure(build, parsed, count: int):
+    """(bytes held, seconds) for `count` rows built from the parsed listings"""
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    rows = [build(parsed[index % len(parsed)]) for index in range(count)]
+    elapsed = time.perf_counter() - start
+    held, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del rows
+    return held, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory per batch of property rows')
+    parser.add_argument('-n', '--count', type=int, default=100000, help='Rows to hold (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    generator = PropertySQLGenerator()
+    parsed = []
+    for index in range(UNIQUE_LISTINGS):
+        rows, _ = synthetic_listings.random_listing(rng)
+        text = synthetic_listings.listing_text(rows, 1 + index % 2)
+        parsed.append(generator.parse_property_data(generator.parse_ocr_text_to_dict(text)))
+
+    def as_dict(property_data):
+        return dict(zip(ROW_KEYS, generator.build_row(property_data)))
+
+    print(f"{args.count} rows of {len(ROW_KEYS)} columns")
+    print(f"{'representation':<16} {'MiB':>8} {'bytes/row':>10} {'seconds':>8}")
+    for name, build in [('row dict', as_dict), ('PropertyRecord', generator.build_row)]:
+        held, elapsed = measure(build, parsed, args.count)
+        print(f"{name:<16} {held / 2 ** 20:>8.1f} {held / args.count:>10.0f} {elapsed:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
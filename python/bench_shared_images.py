@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: handing preprocessing variants to OCR processes, pickled vs. shared memory
+
+Builds the preprocessing variants of large synthetic screenshots and hands
+each one to a worker process, either as a pickled PIL image (what a process
+pool does with an image argument) or as a shared-memory handle from a
+SharedImageStore (what --ocr-processes does). The worker runs a stand-in for
+Tesseract that reads every pixel. Reports the IPC time per image (round
+trips minus the worker's own compute time) and the peak RSS of the parent
+and of the workers; each mode runs in a fresh interpreter so the peaks are
+its own.
+"""
+
+import sys
+import json
+import time
+import argparse
+import resource
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+import ImprovedPropertySQLGenerator as improved
+from ocr_backends import OCRBackend
+from preprocessing import VARIANTS, PreprocessingGraph
+from shared_images import SharedImageStore, share_resource_tracker
+
+MODES = ('pickle', 'shared')
+# Variants handed to the workers (denoised dominates preprocessing time without changing the handoff)
+HANDED_VARIANTS = [name for name in VARIANTS if name != 'denoised']
+
+
+class PixelStatsBackend(OCRBackend):
+    """Stand-in for Tesseract: reads every pixel in C and times itself"""
+
+    name = 'pixel-stats'
+    last_seconds = 0.0
+
+    def image_to_string(self, image, lang: str, config: str = '') -> str:
+        start = time.perf_counter()
+        histogram = image.histogram()
+        self.last_seconds = time.perf_counter() - start
+        return str(sum(histogram))
+
+    def get_languages(self):
+        return ['jpn']
+
+
+def _pickled_task(image) -> float:
+    improved._process_backend.image_to_string(image, lang='jpn')
+    return improved._process_backend.last_seconds
+
+
+def _shared_task(handle) -> float:
+    improved._ocr_shared_image(handle, None, 'jpn', '')
+    return improved._process_backend.last_seconds
+
+
+def synthetic_screenshot(width: int, height: int, seed: int) -> Image.Image:
+    """Light page with dark text-like strokes, the size of a full-page capture"""
+    rng = np.random.default_rng(seed)
+    page = np.full((height, width, 3), 245, dtype=np.uint8)
+    for y in range(40, height - 40, 36):
+        for x in rng.integers(20, width - 220, size=6):
+            page[y:y + 14, x:x + rng.integers(40, 200)] = rng.integers(0, 80, size=3, dtype=np.uint8)
+    noise = rng.integers(0, 12, size=page.shape, dtype=np.uint8)
+    return Image.fromarray(page - noise)
+
+
+def run_mode(mode: str, args) -> dict:
+    """Hand every variant of `images` screenshots to the pool; IPC seconds and peak RSS"""
+    share_resource_tracker()
+    pool = ProcessPoolExecutor(max_workers=args.workers, initializer=improved._init_ocr_process,
+                               initargs=(PixelStatsBackend(),))
+    # Start the workers before timing
+    list(pool.map(abs, range(args.workers)))
+    ipc = 0.0
+    for index in range(args.images):
+        image = synthetic_screenshot(args.width, args.height, args.seed + index)
+        store = SharedImageStore() if mode == 'shared' else None
+        variants = PreprocessingGraph(image, store=store)
+        for name in HANDED_VARIANTS:
+            variants.get(name)
+            start = time.perf_counter()
+            if mode == 'shared':
+                compute = pool.submit(_shared_task, variants.handle(name)).result()
+            else:
+                compute = pool.submit(_pickled_task, variants.get(name)).result()
+            ipc += time.perf_counter() - start - compute
+        variants.release_all()
+        if store is not None:
+            store.close()
+    pool.shutdown()
+    to_mib = 1024 if sys.platform != 'darwin' else 1024 * 1024
+    return {
+        'ipc_ms': ipc * 1000 / args.images,
+        'parent_mib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / to_mib,
+        'worker_mib': resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / to_mib,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark shared-memory handoff of variant images')
+    parser.add_argument('-n', '--images', type=int, default=10, help='Screenshots to process (default: %(default)s)')
+    parser.add_argument('--width', type=int, default=1440)
+    parser.add_argument('--height', type=int, default=4000)
+    parser.add_argument('--workers', type=int, default=2, help='Worker processes (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--mode', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args)))
+        return
+
+    print(f"{args.images} screenshots of {args.width}x{args.height}, "
+          f"{len(HANDED_VARIANTS)} variants each, {args.workers} workers")
+    print(f"{'handoff':<8} {'IPC ms/image':>13} {'parent MiB':>11} {'worker MiB':>11}")
+    for mode in MODES:
+        command = [sys.executable, __file__, '--mode', mode, '-n', str(args.images), '--width', str(args.width),
+                   '--height', str(args.height), '--workers', str(args.workers), '--seed', str(args.seed)]
+        result = json.loads(subprocess.run(command, capture_output=True, text=True, check=True).stdout)
+        print(f"{mode:<8} {result['ipc_ms']:>13.2f} {result['parent_mib']:>11.1f} {result['worker_mib']:>11.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark: CLI cold-start latency
+
+Times fresh interpreter runs of the common entry points (module import,
+--help, generator construction with a cold and a warm Tesseract probe
+cache) and lists any heavy modules (numpy, OpenCV, PIL, pytesseract) each
+one loads. With --max-ms or --strict the script exits non-zero so a
+start-up regression can fail a CI job.
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+import statistics
+
+HEAVY_MODULES = ('numpy', 'cv2', 'PIL.Image', 'pytesseract', 'tesserocr')
+
+# (name, python code, may load heavy modules)
+SCENARIOS = [
+    ('python (interpreter only)', 'pass', False),
+    ('import property_sql_generator', 'import property_sql_generator', False),
+    ('import ImprovedPropertySQLGenerator', 'import ImprovedPropertySQLGenerator', False),
+    ('property_sql_generator --help',
+     "import sys, property_sql_generator as m; sys.argv = ['x', '--help']\n"
+     "try:\n    m.main()\nexcept SystemExit:\n    pass", False),
+    ('ImprovedPropertySQLGenerator --help',
+     "import sys, ImprovedPropertySQLGenerator as m; sys.argv = ['x', '--help']\n"
+     "try:\n    m.main()\nexcept SystemExit:\n    pass", False),
+    ('PropertySQLGenerator() + parse',
+     "import property_sql_generator as m\n"
+     "g = m.PropertySQLGenerator()\n"
+     "g.parse_property_data(g.parse_ocr_text_to_dict('価格 5000万円'))", False),
+    ('ImprovedPropertySQLGenerator()',
+     'import ImprovedPropertySQLGenerator as m; m.ImprovedPropertySQLGenerator()', True),
+]
+
+REPORT = "\nimport sys, json; print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+
+
+def run_scenario(code: str, env: dict) -> tuple:
+    """Wall time (s) of one fresh interpreter running `code`, and the heavy modules it loaded"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', code + REPORT.format(heavy=HEAVY_MODULES)],
+                            capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    elapsed = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr else 'failed')
+    heavy = json.loads(result.stdout.strip().splitlines()[-1])
+    return elapsed, heavy
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CLI start-up time')
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario (default: %(default)s)')
+    parser.add_argument('--max-ms', type=float,
+                        help='Fail when any median exceeds this many milliseconds')
+    parser.add_argument('--strict', action='store_true',
+                        help='Fail when an import/--help/parse path loads a heavy module')
+    args = parser.parse_args()
+
+    cache_dir = tempfile.mkdtemp(prefix='startup-bench-')
+    failures = []
+    try:
+        env = dict(os.environ, PROPERTY_OCR_CACHE_DIR=cache_dir)
+        scenarios = list(SCENARIOS)
+        scenarios.append(('ImprovedPropertySQLGenerator() (probe cached)', scenarios[-1][1], True))
+
+        print(f"{'scenario':<48} {'min ms':>8} {'median ms':>10}  heavy modules")
+        for index, (name, code, heavy_ok) in enumerate(scenarios):
+            times = []
+            heavy = []
+            for _ in range(args.repeat):
+                if index == len(SCENARIOS) - 1:
+                    # Cold probe: drop the cached Tesseract capabilities each run
+                    shutil.rmtree(cache_dir, ignore_errors=True)
+                elapsed, heavy = run_scenario(code, env)
+                times.append(elapsed)
+            median = statistics.median(times)
+            print(f"{name:<48} {min(times) * 1000:>8.1f} {median * 1000:>10.1f}  {', '.join(heavy) or '-'}")
+            if args.max_ms is not None and median * 1000 > args.max_ms:
+                failures.append(f"{name}: median {median * 1000:.1f} ms > {args.max_ms} ms")
+            if args.strict and heavy and not heavy_ok:
+                failures.append(f"{name}: loads {', '.join(heavy)}")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    for failure in failures:
+        print(f"FAIL {failure}", file=sys.stderr)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+Build the bundled gazetteer from the curated listing SQL
+
+Extracts (address, location) pairs from the hand-written INSERT files in
+src/server/public/sql, cleans them up and writes one centroid per town/chome
+to gazetteer.csv in the MLIT 位置参照情報 column layout read by geocoder.py.
+Points outside Japan with swapped coordinates are repaired. Points pasted
+into several different towns, and towns whose points disagree by more than
+MAX_SPREAD_DEGREES, are dropped as copy-paste mistakes.
+"""
+
+import os
+import re
+import csv
+import glob
+import argparse
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from address_resolver import split_address
+from geocoder import GAZETTEER_FILE, GAZETTEER_COLUMNS, normalize_town
+
+DEFAULT_SQL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'server', 'public', 'sql')
+
+# Japan's bounding box, used to spot swapped lng/lat
+LNG_RANGE = (122.0, 154.0)
+LAT_RANGE = (20.0, 46.0)
+# ~2km: more than this between points of one chome means a bad point
+MAX_SPREAD_DEGREES = 0.02
+
+POINT_PATTERN = re.compile(r"ST_MakePoint\(\s*([\d.]+)\s*,\s*([\d.]+)\s*\)")
+ADDRESS_PATTERN = re.compile(r"'((?:東京都|北海道|京都府|大阪府|[^'\s]{2,3}県)[^']+)'")
+TOWN_PATTERN = re.compile(r'^\D+?(?:\d+丁目)?(?=\d|$)')
+KANJI_NUMERALS = '〇一二三四五六七八九'
+
+
+def to_kanji(number: int) -> str:
+    """Kanji numeral as used in MLIT town names (4 -> 四, 12 -> 十二)"""
+    tens, units = divmod(number, 10)
+    text = ('' if tens <= 1 else KANJI_NUMERALS[tens]) + ('十' if tens else '')
+    return text + (KANJI_NUMERALS[units] if units else '')
+
+
+def extract_points(sql_dir: str) -> List[Tuple[str, float, float]]:
+    """(address, lng, lat) for every INSERT ... VALUES block with both"""
+    points = []
+    for path in sorted(glob.glob(os.path.join(sql_dir, '*.sql'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            text = f.read()
+        for block in text.split('VALUES')[1:]:
+            point = POINT_PATTERN.search(block)
+            address = ADDRESS_PATTERN.search(block)
+            if not point or not address:
+                continue
+            lng, lat = float(point.group(1)), float(point.group(2))
+            if not LNG_RANGE[0] <= lng <= LNG_RANGE[1]:
+                lng, lat = lat, lng
+            if LNG_RANGE[0] <= lng <= LNG_RANGE[1] and LAT_RANGE[0] <= lat <= LAT_RANGE[1]:
+                points.append((address.group(1), lng, lat))
+    return points
+
+
+def town_key(address: str):
+    """(prefecture, municipality as MLIT writes it, town with chome) or None"""
+    _, prefecture, municipality, ward, rest = split_address(address)
+    match = TOWN_PATTERN.match(normalize_town(rest))
+    if not prefecture or not municipality or not match:
+        return None
+    town = re.sub(r'(\d+)丁目', lambda m: f"{to_kanji(int(m.group(1)))}丁目", match.group(0))
+    return prefecture, municipality + (ward or ''), town
+
+
+def build_centroids(points: List[Tuple[str, float, float]]) -> Dict[Tuple[str, str, str], Tuple[float, float]]:
+    by_town = defaultdict(set)
+    by_point = defaultdict(set)
+    for address, lng, lat in points:
+        key = town_key(address)
+        if key:
+            by_town[key].add((lng, lat))
+            by_point[(lng, lat)].add(key)
+
+    centroids = {}
+    for key, coords in by_town.items():
+        coords = [point for point in coords if len(by_point[point]) == 1]
+        if not coords:
+            continue
+        lngs, lats = [lng for lng, _ in coords], [lat for _, lat in coords]
+        if max(lngs) - min(lngs) > MAX_SPREAD_DEGREES or max(lats) - min(lats) > MAX_SPREAD_DEGREES:
+            continue
+        centroids[key] = (sum(lngs) / len(lngs), sum(lats) / len(lats))
+    return centroids
+
+
+def write_gazetteer(centroids, path: str):
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(GAZETTEER_COLUMNS)
+        for (prefecture, municipality, town), (lng, lat) in sorted(centroids.items()):
+            writer.writerow([prefecture, municipality, town, f"{lat:.6f}", f"{lng:.6f}"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build gazetteer.csv from the curated listing SQL')
+    parser.add_argument('--sql-dir', default=DEFAULT_SQL_DIR, help='Directory of listing INSERT files')
+    parser.add_argument('-o', '--output', default=GAZETTEER_FILE, help='Gazetteer CSV to write')
+    args = parser.parse_args()
+
+    points = extract_points(args.sql_dir)
+    centroids = build_centroids(points)
+    write_gazetteer(centroids, args.output)
+    print(f"{len(centroids)} town/chome centroids from {len(points)} listing points written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
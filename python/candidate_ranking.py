@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+
+"""
+Learned per-layout ranking of OCR candidates
+
+Screenshots from one listing site share a layout, and the same few
+(preprocessing variant, OCR config) pairs win on almost all of them. A
+small SQLite store keeps, per layout fingerprint (page width, orientation
+and dominant colours), how often each candidate was tried and how often its
+text was the one picked. Once a layout has enough history, candidates are
+tried in order of their win rate, and ones that keep losing are pruned.
+A small exploration rate still runs the full grid now and then, so the
+statistics follow changes to a site.
+"""
+
+import os
+import random
+import sqlite3
+from typing import Dict, List, Optional, Tuple
+
+from ocr_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_STATS_PATH = os.path.join(DEFAULT_CACHE_DIR, 'candidate_stats.sqlite')
+DEFAULT_EXPLORATION = 0.1
+# Images of a layout seen before its learned order is used
+MIN_IMAGES = 5
+# A candidate tried this often that wins less than PRUNE_BELOW of the time is skipped
+MIN_TRIES = 10
+PRUNE_BELOW = 0.02
+# Width buckets (pixels) and colour levels per channel for fingerprints
+WIDTH_BUCKET = 200
+COLOR_LEVELS = 4
+
+
+def layout_fingerprint(image) -> str:
+    """
+    Fingerprint of a screenshot's layout: its width rounded to WIDTH_BUCKET,
+    its orientation and its two dominant colours on a coarse palette
+    (e.g. '1400/portrait:63-21'). The height is left out, as full-page
+    captures of one site grow with the length of each listing.
+    """
+    import numpy as np
+    from PIL import Image
+    width, height = image.size
+    thumbnail = np.asarray(image.convert('RGB').resize((32, 32), Image.BILINEAR), dtype=np.int32)
+    levels = thumbnail * COLOR_LEVELS // 256
+    codes = (levels[..., 0] * COLOR_LEVELS + levels[..., 1]) * COLOR_LEVELS + levels[..., 2]
+    counts = np.bincount(codes.ravel(), minlength=COLOR_LEVELS ** 3)
+    dominant = np.argsort(-counts, kind='stable')[:2]
+    shape = f"{round(width / WIDTH_BUCKET) * WIDTH_BUCKET}/{'portrait' if height >= width else 'landscape'}"
+    return shape + ':' + '-'.join(str(code) for code in dominant.tolist() if counts[code])
+
+
+def candidate_key(img_name: str, config: dict) -> Tuple[str, str, str]:
+    return img_name, config['lang'], config['config']
+
+
+class CandidateRanker:
+    """
+    Win statistics per (layout fingerprint, candidate), kept in SQLite.
+
+    order() ranks and prunes a candidate list for a fingerprint, record()
+    stores which candidates one image tried and which of them won. `counts`
+    accumulates over a run for the savings report.
+    """
+
+    def __init__(self, path: str = DEFAULT_STATS_PATH, exploration: float = DEFAULT_EXPLORATION,
+                 seed: Optional[int] = None):
+        self.path = path
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS candidate_stats (
+                fingerprint TEXT NOT NULL,
+                variant TEXT NOT NULL,
+                lang TEXT NOT NULL,
+                config TEXT NOT NULL,
+                tries INTEGER NOT NULL DEFAULT 0,
+                wins INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (fingerprint, variant, lang, config)
+            )""")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS layouts (
+                fingerprint TEXT PRIMARY KEY,
+                images INTEGER NOT NULL DEFAULT 0
+            )""")
+        self.conn.commit()
+        self.counts = {'images': 0, 'learned': 0, 'explored': 0, 'candidates': 0, 'pruned': 0, 'tried': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def stats(self, fingerprint: str) -> Tuple[int, Dict[Tuple[str, str, str], Tuple[int, int]]]:
+        """(images seen, {candidate key: (tries, wins)}) for a fingerprint"""
+        row = self.conn.execute('SELECT images FROM layouts WHERE fingerprint = ?', (fingerprint,)).fetchone()
+        rows = self.conn.execute(
+            'SELECT variant, lang, config, tries, wins FROM candidate_stats WHERE fingerprint = ?',
+            (fingerprint,)
+        )
+        return (row[0] if row else 0), {(variant, lang, config): (tries, wins)
+                                        for variant, lang, config, tries, wins in rows}
+
+    def order(self, fingerprint: str, candidates: List[Tuple[str, dict]]) -> Tuple[List[Tuple[str, dict]], int]:
+        """
+        (candidates in learned order, number pruned). Layouts with little
+        history keep the given order; exploration images keep every candidate.
+        """
+        self.counts['images'] += 1
+        self.counts['candidates'] += len(candidates)
+        images, stats = self.stats(fingerprint)
+        if images < MIN_IMAGES:
+            return candidates, 0
+        self.counts['learned'] += 1
+
+        def win_rate(candidate):
+            tries, wins = stats.get(candidate_key(*candidate), (0, 0))
+            return wins / (tries + 1)
+
+        # Stable sort: candidates that never won keep their static order
+        ranked = sorted(candidates, key=lambda candidate: -win_rate(candidate))
+        if self.rng.random() < self.exploration:
+            self.counts['explored'] += 1
+            return ranked, 0
+        kept = []
+        for candidate in ranked:
+            tries, wins = stats.get(candidate_key(*candidate), (0, 0))
+            if tries < MIN_TRIES or wins / tries >= PRUNE_BELOW:
+                kept.append(candidate)
+        # Never prune everything; the best-ranked candidate always runs
+        kept = kept or ranked[:1]
+        self.counts['pruned'] += len(ranked) - len(kept)
+        return kept, len(ranked) - len(kept)
+
+    def record(self, fingerprint: str, tried: List[Tuple[str, dict]], winner: Optional[Tuple[str, dict]]):
+        """Store one image's outcome: the candidates it ran and the one whose text was used"""
+        self.counts['tried'] += len(tried)
+        winner_key = candidate_key(*winner) if winner else None
+        self.conn.executemany(
+            'INSERT INTO candidate_stats (fingerprint, variant, lang, config, tries, wins) '
+            'VALUES (?, ?, ?, ?, 1, ?) ON CONFLICT (fingerprint, variant, lang, config) '
+            'DO UPDATE SET tries = tries + 1, wins = wins + excluded.wins',
+            [(fingerprint, *key, int(key == winner_key))
+             for key in dict.fromkeys(candidate_key(*candidate) for candidate in tried)]
+        )
+        self.conn.execute(
+            'INSERT INTO layouts (fingerprint, images) VALUES (?, 1) '
+            'ON CONFLICT (fingerprint) DO UPDATE SET images = images + 1',
+            (fingerprint,)
+        )
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
+
+
+def format_ranking_report(ranker: CandidateRanker) -> str:
+    counts = ranker.counts
+    return (f"Learned ranking: {counts['tried']} of {counts['candidates']} OCR candidates run over "
+            f"{counts['images']} images, {counts['pruned']} pruned; learned order used for "
+            f"{counts['learned']} images, {counts['explored']} of them exploring the full grid")
+
+
+def add_ranking_arguments(parser):
+    """Register the learned candidate ranking options on an argparse parser"""
+    parser.add_argument(
+        '--candidate-stats',
+        nargs='?',
+        const=DEFAULT_STATS_PATH,
+        metavar='PATH',
+        help='Learn which preprocessing/OCR candidates win per screenshot layout, and try '
+             f'those first and prune the rest (default store: {DEFAULT_STATS_PATH})'
+    )
+    parser.add_argument(
+        '--exploration',
+        type=float,
+        default=DEFAULT_EXPLORATION,
+        help='Share of images that still search the full candidate grid (default: %(default)s)'
+    )
+
+
+def ranker_from_args(args) -> Optional[CandidateRanker]:
+    """Open the store named by --candidate-stats, or None to keep the static order"""
+    if args.candidate_stats is None:
+        return None
+    return CandidateRanker(args.candidate_stats, exploration=args.exploration)
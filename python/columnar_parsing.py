@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+
+"""
+Columnar parsing of numeric and date fields
+
+Batch counterparts of PropertySQLGenerator.parse_price, parse_area,
+parse_balcony_area, parse_year, parse_units and parse_date. A whole column
+of raw strings is joined into one buffer, one line per row, and a single
+findall with the field's pattern anchored at each line start pulls out the
+first match of every row (or '' where there is none), the same match
+re.search finds on the row alone, without a match object per row. Every
+function returns a typed array plus a null mask and
+gives the same values as the scalar parser it mirrors.
+"""
+
+import re
+import operator
+from collections import namedtuple
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# `mask` is True where the scalar parser returns None
+ParsedColumn = namedtuple('ParsedColumn', ['values', 'mask'])
+
+
+def _first_match_pattern(pattern: str):
+    # One match per line: the lazy prefix stops at the leftmost place the
+    # field pattern matches, or the optional group is skipped and all
+    # groups come back empty
+    return re.compile(rf'^(?:[^\n]*?{pattern})?', re.MULTILINE)
+
+
+PRICE_PATTERN = _first_match_pattern(r'(\d+(?:\.\d+)?)')
+MAN_YEN_PATTERN = _first_match_pattern('(万円)')
+AREA_PATTERN = _first_match_pattern(r'(\d+(?:\.\d+)?)(?:m|㎡)')
+YEAR_MONTH_PATTERN = _first_match_pattern(r'(\d{4})年(\d{1,2})月')
+UNITS_PATTERN = _first_match_pattern(r'(\d+)')
+DATE_PATTERN = _first_match_pattern(r'(\d{4})年(\d{1,2})月(\d{1,2})日')
+
+
+def _join(values: Sequence[Optional[str]], delete: str = '') -> str:
+    """One buffer for a column, a line per row"""
+    joined = '\n'.join(value or '' for value in values)
+    if joined.count('\n') != len(values) - 1:
+        # None of the field patterns span whitespace, so a line break inside
+        # a value can become a space without changing any match
+        joined = '\n'.join((value or '').replace('\n', ' ') for value in values)
+    for char in delete:
+        joined = joined.replace(char, '')
+    return joined
+
+
+def _numbers(matches: List[str], convert, dtype):
+    """Matched number strings as a `dtype` array plus the mask of rows without one"""
+    # float()/int() read full-width digits, so the strings convert as matched
+    mask = np.fromiter(map(operator.not_, matches), dtype=bool, count=len(matches))
+    values = np.fromiter((convert(match) if match else 0 for match in matches), dtype=dtype, count=len(matches))
+    return values, mask
+
+
+def parse_price_column(values: Sequence[Optional[str]]) -> ParsedColumn:
+    """parse_price for a column: yen as int64 (万円 amounts multiplied out)"""
+    if not values:
+        return _empty(np.int64)
+    joined = _join(values, delete=',，')
+    prices, mask = _numbers(PRICE_PATTERN.findall(joined), float, np.float64)
+    # Checked after the commas are gone, as parse_price does
+    man_yen = np.fromiter(map(bool, MAN_YEN_PATTERN.findall(joined)), dtype=bool, count=len(values))
+    prices = np.trunc(np.where(man_yen, prices * 10000, prices)).astype(np.int64)
+    return ParsedColumn(prices, mask)
+
+
+def parse_area_column(values: Sequence[Optional[str]]) -> ParsedColumn:
+    """parse_area / parse_balcony_area for a column: square metres as float64"""
+    if not values:
+        return _empty(np.float64)
+    return ParsedColumn(*_numbers(AREA_PATTERN.findall(_join(values)), float, np.float64))
+
+
+parse_balcony_area_column = parse_area_column
+
+
+def parse_units_column(values: Sequence[Optional[str]]) -> ParsedColumn:
+    """parse_units for a column: the first number as int64"""
+    if not values:
+        return _empty(np.int64)
+    return ParsedColumn(*_numbers(UNITS_PATTERN.findall(_join(values)), int, np.int64))
+
+
+def parse_year_column(values: Sequence[Optional[str]]) -> ParsedColumn:
+    """parse_year for a column: 'YYYY-MM-01' strings"""
+    dates = [f"{year}-{month.zfill(2)}-01" if year else ''
+             for year, month in YEAR_MONTH_PATTERN.findall(_join(values))] if values else []
+    return _dates(dates)
+
+
+def parse_date_column(values: Sequence[Optional[str]]) -> ParsedColumn:
+    """parse_date for a column: 'YYYY-MM-DD' strings"""
+    dates = [f"{year}-{month.zfill(2)}-{day.zfill(2)}" if year else ''
+             for year, month, day in DATE_PATTERN.findall(_join(values))] if values else []
+    return _dates(dates)
+
+
+def _dates(dates: List[str]) -> ParsedColumn:
+    column = np.array(dates, dtype='<U10')
+    return ParsedColumn(column, column == '')
+
+
+def _empty(dtype) -> ParsedColumn:
+    return ParsedColumn(np.zeros(0, dtype=dtype), np.zeros(0, dtype=bool))
+
+
+# Scalar PropertySQLGenerator parser -> its column counterpart
+COLUMN_PARSERS = {
+    'parse_price': parse_price_column,
+    'parse_area': parse_area_column,
+    'parse_balcony_area': parse_balcony_area_column,
+    'parse_year': parse_year_column,
+    'parse_units': parse_units_column,
+    'parse_date': parse_date_column,
+}
+
+
+def parse_columns(records: Sequence[Dict[str, str]], fields) -> Dict[str, ParsedColumn]:
+    """
+    Parse fields of many structured records at once; `fields` holds
+    (raw label, parsed key, scalar parser name) like NUMERIC_FIELDS
+    """
+    return {key: COLUMN_PARSERS[parser]([record.get(label, '') for record in records])
+            for label, key, parser in fields}
+
+
+def column_values(column: ParsedColumn) -> List[Any]:
+    """Python values with None for nulls, as the scalar parsers return them"""
+    return [None if missing else value for value, missing in zip(column.values.tolist(), column.mask.tolist())]
@@ -0,0 +1,326 @@
+#!/usr/bin/env python3
+
+"""
+Direct database loading for parsed property rows
+
+Inserts PropertyRecord rows built by PropertySQLGenerator.build_row into
+the properties table in batches, using server-side parameter binding (execute_values) or
+COPY over a small connection pool, and commits once per batch. Each row's
+id is reported back once committed, and a row can replace an earlier one
+(deleted in the same transaction), so reprocessing an image never leaves
+two rows for it. A SQLite database can stand in for PostgreSQL (dsn
+`sqlite:///path.db`) to test the loading path without a database server.
+"""
+
+import io
+import os
+import re
+import time
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from batch_processor import summarize_result
+from sql_output import (
+    COLUMN_NAMES, GeoPoint, PropertyRecord, as_record, copy_text_line,
+    format_geometry, to_text
+)
+
+LOAD_METHODS = ('values', 'copy')
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_POOL_SIZE = 2
+
+
+def default_dsn() -> str:
+    """Connection string from the same DB_* variables the Node server uses"""
+    parts = {
+        'host': os.environ.get('DB_HOST', 'localhost'),
+        'port': os.environ.get('DB_PORT', '5432'),
+        'dbname': os.environ.get('DB_DATABASE', 'postgres'),
+        'user': os.environ.get('DB_USER', 'postgres'),
+        'password': os.environ.get('DB_PASSWORD'),
+    }
+    return ' '.join(f"{key}={value}" for key, value in parts.items() if value)
+
+
+def redact_dsn(dsn: str) -> str:
+    """A connection string without its credentials: URL userinfo and password parameters are dropped"""
+    dsn = re.sub(r'^([a-z][a-z0-9+.-]*://)[^/@]*@', r'\1', dsn, flags=re.IGNORECASE)
+    dsn = re.sub(r'([?&])password=[^&]*&?', r'\1', dsn, flags=re.IGNORECASE).rstrip('?&')
+    return re.sub(r"\s*\bpassword\s*=\s*('(?:[^'\\]|\\.)*'|\S*)", '', dsn, flags=re.IGNORECASE).strip()
+
+
+def create_sqlite_schema(conn: sqlite3.Connection, table: str = 'properties'):
+    """Create an untyped stand-in for the properties table"""
+    columns = ', '.join(COLUMN_NAMES)
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY AUTOINCREMENT, {columns})")
+    conn.commit()
+
+
+class _PostgresBackend:
+    """psycopg2 connection pool; rows are bound server-side, never string-formatted"""
+
+    def __init__(self, dsn: str, pool_size: int):
+        try:
+            import psycopg2.pool
+            import psycopg2.extras
+        except ImportError:
+            raise RuntimeError("Loading into PostgreSQL requires psycopg2 (pip install psycopg2-binary)")
+        self._extras = psycopg2.extras
+        self.pool = psycopg2.pool.ThreadedConnectionPool(1, pool_size, dsn)
+        self.insert_sql = f"INSERT INTO properties ({', '.join(COLUMN_NAMES)}) VALUES %s RETURNING id"
+        self.copy_sql = f"COPY properties (id, {', '.join(COLUMN_NAMES)}) FROM STDIN"
+        self.template = '(' + ', '.join(
+            'ST_GeomFromEWKT(%s)' if column == 'location' else '%s' for column in COLUMN_NAMES
+        ) + ')'
+
+    @staticmethod
+    def params(row: PropertyRecord) -> tuple:
+        # psycopg2 adapts lists to ARRAY; geometry goes through ST_GeomFromEWKT
+        if row.location is None:
+            return row
+        return row._replace(location=format_geometry(row.location))
+
+    def insert(self, rows: List[PropertyRecord], method: str, replaces: List[int]) -> List[int]:
+        """Delete the `replaces` rows and insert `rows` in one transaction; returns the new ids"""
+        conn = self.pool.getconn()
+        try:
+            with conn.cursor() as cur:
+                if replaces:
+                    cur.execute('DELETE FROM properties WHERE id = ANY(%s)', (replaces,))
+                if method == 'copy':
+                    # COPY cannot return ids, so they are drawn from the sequence first
+                    cur.execute("SELECT nextval(pg_get_serial_sequence('properties', 'id')) "
+                                "FROM generate_series(1, %s)", (len(rows),))
+                    ids = [row_id for row_id, in cur.fetchall()]
+                    data = ''.join(f"{row_id}\t{copy_text_line(row)}" for row_id, row in zip(ids, rows))
+                    cur.copy_expert(self.copy_sql, io.StringIO(data))
+                else:
+                    # One page, so RETURNING gives the ids in VALUES order
+                    returned = self._extras.execute_values(cur, self.insert_sql, [self.params(row) for row in rows],
+                                                           template=self.template, page_size=len(rows), fetch=True)
+                    ids = [row_id for row_id, in returned]
+            conn.commit()
+            return ids
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.pool.putconn(conn)
+
+    def close(self):
+        self.pool.closeall()
+
+
+class _SQLiteBackend:
+    """
+    Single SQLite connection standing in for PostgreSQL. Both methods insert
+    one execute per row, as SQLite reports the new id of a single insert
+    (lastrowid) but not of an executemany.
+    """
+
+    def __init__(self, path: str):
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        create_sqlite_schema(self.conn)
+        self.insert_sql = (f"INSERT INTO properties ({', '.join(COLUMN_NAMES)}) "
+                           f"VALUES ({', '.join('?' for _ in COLUMN_NAMES)})")
+
+    @staticmethod
+    def params(row: PropertyRecord) -> tuple:
+        return tuple(to_text(value) if isinstance(value, (GeoPoint, list, tuple)) else value
+                     for value in row)
+
+    def insert(self, rows: List[PropertyRecord], method: str, replaces: List[int]) -> List[int]:
+        try:
+            self.conn.executemany('DELETE FROM properties WHERE id = ?', [(row_id,) for row_id in replaces])
+            ids = [self.conn.execute(self.insert_sql, self.params(row)).lastrowid for row in rows]
+            self.conn.commit()
+            return ids
+        except Exception:
+            self.conn.rollback()
+            raise
+
+    def close(self):
+        self.conn.close()
+
+
+class PropertyLoader:
+    """
+    Buffers rows and inserts them in batches, committing once per batch.
+
+    With a PostgreSQL pool larger than one connection, full batches are
+    flushed on background threads so parsing continues while the database
+    works. A batch that fails is retried row by row so one bad record only
+    loses itself.
+
+    Rows added with a `source` (any tag, e.g. an image path) report
+    their outcome once their batch is done: take_outcomes() returns
+    (source, row id, None) for committed rows and (source, None, error) for
+    rejected ones. A row added with `replaces` deletes that earlier row id in
+    the transaction that inserts it.
+    """
+
+    def __init__(self, dsn: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE,
+                 pool_size: int = DEFAULT_POOL_SIZE, method: str = 'values'):
+        dsn = dsn or default_dsn()
+        if dsn.startswith('sqlite:///'):
+            self.backend = _SQLiteBackend(dsn[len('sqlite:///'):])
+            pool_size = 1
+        else:
+            self.backend = _PostgresBackend(dsn, pool_size)
+        self.batch_size = max(1, batch_size)
+        self.pool_size = pool_size
+        self.method = method
+        self.rows_loaded = 0
+        self.rows_failed = 0
+        self.batches = 0
+        self.errors = []
+        # (row, source, replaced row id) waiting for the next batch
+        self._buffer = []
+        self._outcomes = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=pool_size) if pool_size > 1 else None
+        self._futures = []
+        self._closed = False
+        self._start = time.perf_counter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def add(self, row: PropertyRecord, source: Any = None, replaces: Optional[int] = None):
+        """Queue a row (a PropertyRecord or row dict), flushing once a full batch is buffered"""
+        self._buffer.append((as_record(row), source, replaces))
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def add_all(self, rows: Iterable[PropertyRecord]):
+        for row in rows:
+            self.add(row)
+
+    def flush(self):
+        """Send the buffered rows as one batch"""
+        if not self._buffer:
+            return
+        entries, self._buffer = self._buffer, []
+        if self._executor:
+            # Bound queued batches so a slow database applies backpressure
+            self._futures = [f for f in self._futures if not f.done()]
+            while len(self._futures) >= 2 * self.pool_size:
+                self._futures.pop(0).result()
+            self._futures.append(self._executor.submit(self._insert_batch, entries))
+        else:
+            self._insert_batch(entries)
+
+    def _insert_batch(self, entries: List[Tuple[PropertyRecord, Any, Optional[int]]]):
+        outcomes = []
+        try:
+            ids = self.backend.insert([row for row, _, _ in entries], self.method,
+                                      [replaces for _, _, replaces in entries if replaces is not None])
+            outcomes = [(source, row_id, None) for (_, source, _), row_id in zip(entries, ids)]
+            loaded, failed = len(entries), 0
+        except Exception:
+            loaded, failed = 0, 0
+            for row, source, replaces in entries:
+                try:
+                    [row_id] = self.backend.insert([row], self.method, [] if replaces is None else [replaces])
+                    outcomes.append((source, row_id, None))
+                    loaded += 1
+                except Exception as e:
+                    outcomes.append((source, None, str(e)))
+                    failed += 1
+                    with self._lock:
+                        self.errors.append(f"{row.address or row.property_number}: {e}")
+        with self._lock:
+            self.rows_loaded += loaded
+            self.rows_failed += failed
+            self.batches += 1
+            self._outcomes.extend(outcome for outcome in outcomes if outcome[0] is not None)
+
+    def take_outcomes(self) -> List[Tuple[Any, Optional[int], Optional[str]]]:
+        """(source, row id, error) of every sourced row whose batch finished since the last call"""
+        with self._lock:
+            outcomes, self._outcomes = self._outcomes, []
+        return outcomes
+
+    def close(self) -> Dict[str, Any]:
+        """Flush remaining rows, wait for background batches and close the pool"""
+        if self._closed:
+            return self.stats()
+        self._closed = True
+        self.flush()
+        if self._executor:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+            for future in self._futures:
+                future.result()
+            self._futures = []
+        self.backend.close()
+        return self.stats()
+
+    def stats(self) -> Dict[str, Any]:
+        elapsed = time.perf_counter() - self._start
+        return {
+            'rows_loaded': self.rows_loaded,
+            'rows_failed': self.rows_failed,
+            'batches': self.batches,
+            'elapsed': elapsed,
+            'rows_per_sec': self.rows_loaded / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+class LoadWriter:
+    """
+    Batch-pipeline sink that loads rows into the database.
+
+    Mirrors batch_processor.ResultWriter: it consumes image results whose
+    record is a PropertyRecord (output format 'row') and keeps a per-image summary.
+    A result's 'replaces' row id is deleted when its row is inserted, and its
+    'journal' callback is called with the new row id once the row is
+    committed (batch_manifest.iter_incremental sets both under --load).
+    """
+
+    def __init__(self, loader: PropertyLoader):
+        self.loader = loader
+        self.summaries = []
+
+    def write(self, result: Dict[str, Any]):
+        journal, replaces = result.pop('journal', None), result.pop('replaces', None)
+        # Images the batch manifest skipped are already in the database
+        if not result['error'] and not result.get('skipped'):
+            self.loader.add(result['sql'], source=journal, replaces=replaces)
+        self.summaries.append(summarize_result(result))
+        self._journal()
+
+    def _journal(self):
+        for journal, row_id, error in self.loader.take_outcomes():
+            if error is None:
+                journal(row_id)
+
+    def write_all(self, results: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        for result in results:
+            self.write(result)
+        return self.summaries
+
+    def close(self) -> Dict[str, Any]:
+        stats = self.loader.close()
+        self._journal()
+        return stats
+
+
+def format_load_report(stats: Dict[str, Any]) -> str:
+    report = (f"Loaded {stats['rows_loaded']} rows in {stats['batches']} batches "
+              f"({stats['rows_per_sec']:.1f} rows/sec)")
+    if stats['rows_failed']:
+        report += f", {stats['rows_failed']} rows failed"
+    return report
+
+
+def format_load_errors(loader: PropertyLoader) -> Optional[str]:
+    """Rows rejected by the database, or None when every row loaded"""
+    if not loader.errors:
+        return None
+    return '\n'.join(['Rejected rows:'] + [f"  {error}" for error in loader.errors])
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""
+Offline geocoder for the properties `location` column
+
+Looks addresses up in a gazetteer of town/chome (町丁目) centroids read from
+CSV files in the layout of MLIT's 位置参照情報 (大字・町丁目レベル) downloads:
+都道府県名, 市区町村名, 大字町丁目名, 緯度, 経度. A small gazetteer built from
+the curated listings in src/server/public/sql ships as gazetteer.csv (see
+build_gazetteer.py); point --gazetteer at the MLIT files for national
+coverage. Addresses are split with address_resolver, and the town part is
+matched longest-prefix against a per-municipality trie, falling back from
+chome to town to municipality centroid. No network access is needed.
+"""
+
+import os
+import re
+import csv
+from array import array
+from functools import lru_cache
+from typing import Iterable, List, Optional, Tuple
+
+from address_resolver import AreaTrie, split_address
+from sql_output import GeoPoint
+
+GAZETTEER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+GAZETTEER_COLUMNS = ['都道府県名', '市区町村名', '大字町丁目名', '緯度', '経度']
+GEOCODE_CACHE_SIZE = 65536
+
+# Precision of a match, best first
+PRECISIONS = ('chome', 'town', 'municipality')
+
+_KANJI_DIGITS = {char: value for value, char in enumerate('〇一二三四五六七八九')}
+KANJI_CHOME_PATTERN = re.compile(r'([一二三四五六七八九十]+)丁目')
+# 西新宿4-15-3: the first number after the town name is the chome
+DASHED_CHOME_PATTERN = re.compile(r'^(\D+?)(\d+)(?=[-－ー‐番])')
+CHOME_PATTERN = re.compile(r'^(.+?)\d+丁目$')
+
+
+def kanji_number(text: str) -> int:
+    """Value of a kanji numeral up to 99 (三, 十二, 二十四)"""
+    if '十' not in text:
+        return int(''.join(str(_KANJI_DIGITS[char]) for char in text))
+    tens, _, units = text.partition('十')
+    return (_KANJI_DIGITS[tens] if tens else 1) * 10 + (_KANJI_DIGITS[units] if units else 0)
+
+
+def normalize_town(text: str) -> str:
+    """Town part with its chome as ASCII digits (西新宿四丁目 / 西新宿4-15 -> 西新宿4丁目)"""
+    text = KANJI_CHOME_PATTERN.sub(lambda m: f"{kanji_number(m.group(1))}丁目", text)
+    if '丁目' not in text:
+        text = DASHED_CHOME_PATTERN.sub(r'\g<1>\g<2>丁目', text, count=1)
+    return text
+
+
+def read_gazetteer(path: str) -> Iterable[Tuple[str, str, str, float, float]]:
+    """(prefecture, municipality, town, lat, lng) rows; UTF-8 or the Shift_JIS MLIT ships"""
+    for encoding in ('utf-8-sig', 'cp932'):
+        try:
+            with open(path, 'r', encoding=encoding, newline='') as f:
+                reader = csv.DictReader(f)
+                missing = [column for column in GAZETTEER_COLUMNS if column not in (reader.fieldnames or [])]
+                if missing:
+                    raise ValueError(f"{path}: missing gazetteer columns {', '.join(missing)}")
+                rows = [(row['都道府県名'], row['市区町村名'], row['大字町丁目名'],
+                         float(row['緯度']), float(row['経度'])) for row in reader]
+            return rows
+        except UnicodeDecodeError:
+            continue
+    raise ValueError(f"{path}: not UTF-8 or Shift_JIS")
+
+
+class Gazetteer:
+    """
+    In-memory town/chome centroid index.
+
+    Coordinates live in flat arrays indexed by entry number; locate() maps
+    an address to an entry (memoised), geocode_batch() resolves many at once
+    and gathers their coordinates with numpy.
+    """
+
+    def __init__(self, paths: Optional[List[str]] = None):
+        self.paths = list(paths or [GAZETTEER_FILE])
+        self.names: List[Tuple[str, str, str]] = []
+        self.precision: List[str] = []
+        self.lng = array('d')
+        self.lat = array('d')
+        # (prefecture, municipality) -> trie of normalised town names -> entry
+        self._towns = {}
+        self._municipalities = {}
+        self.locate = lru_cache(maxsize=GEOCODE_CACHE_SIZE)(self._locate)
+        self._build([row for path in self.paths for row in read_gazetteer(path)])
+
+    def __getstate__(self):
+        # Worker processes reload the files instead of unpickling the index
+        return {'paths': self.paths}
+
+    def __setstate__(self, state):
+        self.__init__(state['paths'])
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def version(self) -> str:
+        """Changes whenever a gazetteer file does, so manifest runs geocode again"""
+        signatures = []
+        for path in self.paths:
+            st = os.stat(path)
+            signatures.append(f"{os.path.basename(path)}:{st.st_size}:{st.st_mtime_ns}")
+        return ','.join(signatures)
+
+    def _add(self, prefecture: str, municipality: str, town: str, lat: float, lng: float,
+             precision: str) -> int:
+        self.names.append((prefecture, municipality, town))
+        self.precision.append(precision)
+        self.lat.append(lat)
+        self.lng.append(lng)
+        return len(self.names) - 1
+
+    def _build(self, rows):
+        towns, municipalities = {}, {}
+        for prefecture, municipality, town, lat, lng in rows:
+            key = (prefecture, municipality)
+            trie = self._towns.setdefault(key, AreaTrie())
+            name = normalize_town(''.join(town.split()))
+            match = CHOME_PATTERN.match(name)
+            trie.insert(name, self._add(prefecture, municipality, name, lat, lng,
+                                        'chome' if match else 'town'))
+            if match:
+                towns.setdefault((key, match.group(1)), []).append((lat, lng))
+            municipalities.setdefault(key, []).append((lat, lng))
+
+        # Towns only listed by chome get the mean of their chome centroids
+        for (key, town), points in towns.items():
+            trie = self._towns[key]
+            if trie.longest_prefix(town)[1] != len(town):
+                trie.insert(town, self._add(*key, town, *_mean(points), 'town'))
+        for key, points in municipalities.items():
+            self._municipalities[key] = self._add(*key, '', *_mean(points), 'municipality')
+
+    def _locate(self, address: str) -> int:
+        _, prefecture, municipality, ward, rest = split_address(address)
+        if not prefecture or not municipality:
+            return -1
+        key = (prefecture, municipality + (ward or ''))
+        trie = self._towns.get(key)
+        if trie is None:
+            return -1
+        entry, _ = trie.longest_prefix(normalize_town(rest))
+        return self._municipalities[key] if entry is None else entry
+
+    def geocode(self, address: Optional[str]) -> Optional[GeoPoint]:
+        """Centroid of the most specific area found for an address, or None"""
+        if not address:
+            return None
+        entry = self.locate(address)
+        if entry < 0:
+            return None
+        return GeoPoint(self.lng[entry], self.lat[entry])
+
+    def geocode_batch(self, addresses: List[Optional[str]]):
+        """
+        (lng, lat) float arrays for many addresses, NaN where nothing matched.
+
+        Each distinct address is located once; coordinates are gathered for
+        the whole batch in one vectorised step.
+        """
+        import numpy as np
+        distinct = {}
+        indices = np.fromiter((distinct.setdefault(address, len(distinct)) for address in addresses),
+                              dtype=np.intp, count=len(addresses))
+        entries = np.fromiter((self.locate(address) if address else -1 for address in distinct),
+                              dtype=np.intp, count=len(distinct))[indices]
+        lng = np.frombuffer(self.lng, dtype=np.float64)
+        lat = np.frombuffer(self.lat, dtype=np.float64)
+        found = entries >= 0
+        return (np.where(found, lng[entries], np.nan),
+                np.where(found, lat[entries], np.nan))
+
+
+def _mean(points: List[Tuple[float, float]]) -> Tuple[float, float]:
+    # Rounded to ~0.1m so averaged centroids print cleanly in SQL
+    return (round(sum(lat for lat, _ in points) / len(points), 6),
+            round(sum(lng for _, lng in points) / len(points), 6))
+
+
+def add_geocoder_arguments(parser):
+    """Register the shared geocoding options on an argparse parser"""
+    parser.add_argument(
+        '--gazetteer',
+        action='append',
+        metavar='PATH',
+        help='Town/chome centroid CSV in the MLIT 位置参照情報 layout (repeatable; '
+             'default: the bundled gazetteer.csv)'
+    )
+    parser.add_argument(
+        '--no-geocode',
+        action='store_true',
+        help='Leave the location column NULL instead of geocoding addresses'
+    )
+
+
+def gazetteer_from_args(args) -> Optional[Gazetteer]:
+    """Build a Gazetteer from parsed command line options, or None if disabled"""
+    if args.no_geocode:
+        return None
+    return Gazetteer(args.gazetteer)
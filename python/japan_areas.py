@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+
+"""
+Japanese administrative area dataset
+
+Regions, prefectures, municipalities and postal code ranges, mirrored from
+the client's client/src/utils/japanAreas.js and japanPostalCodes.js so the
+parser and the UI agree on names. Wards of the designated cities (政令指定都市)
+the client lists are added, since listings address those cities by ward, as
+are the rest of Tokyo's municipalities and the municipalities whose names
+contain 市, 町 or 村 before their suffix, which a suffix match cuts short.
+"""
+
+# Region -> prefectures (JapanRegion / JapanAreaHelper.getPrefecturesByRegion)
+REGION_PREFECTURES = {
+    '北海道地方': ['北海道'],
+    '東北地方': ['青森県', '岩手県', '宮城県', '秋田県', '山形県', '福島県'],
+    '関東地方': ['東京都', '神奈川県', '埼玉県', '千葉県', '茨城県', '栃木県', '群馬県'],
+    '中部地方': ['新潟県', '富山県', '石川県', '福井県', '山梨県', '長野県', '岐阜県', '静岡県', '愛知県'],
+    '関西地方': ['大阪府', '京都府', '兵庫県', '奈良県', '和歌山県', '滋賀県', '三重県'],
+    '中国地方': ['広島県', '岡山県', '山口県', '鳥取県', '島根県'],
+    '四国地方': ['徳島県', '香川県', '愛媛県', '高知県'],
+    '九州地方': ['福岡県', '佐賀県', '長崎県', '熊本県', '大分県', '宮崎県', '鹿児島県', '沖縄県'],
+}
+
+# Tokyo Special Wards (TokyoWard)
+TOKYO_WARDS = [
+    '千代田区', '中央区', '港区', '新宿区', '文京区', '台東区', '墨田区', '江東区',
+    '品川区', '目黒区', '大田区', '世田谷区', '渋谷区', '中野区', '杉並区', '豊島区',
+    '北区', '荒川区', '板橋区', '練馬区', '足立区', '葛飾区', '江戸川区',
+]
+
+# Prefecture -> subdivision -> municipalities (JapanAreaHierarchy, plus the
+# major cities of MajorCityPostalCodes under their prefectures)
+PREFECTURE_MUNICIPALITIES = {
+    '東京都': {
+        '23区': TOKYO_WARDS,
+        '市部': ['八王子市', '立川市', '武蔵野市', '三鷹市', '青梅市', '府中市', '昭島市', '調布市', '町田市', '小金井市',
+               '小平市', '日野市', '東村山市', '国分寺市', '国立市', '福生市', '狛江市', '東大和市', '清瀬市',
+               '東久留米市', '武蔵村山市', '多摩市', '稲城市', '羽村市', 'あきる野市', '西東京市'],
+        '郡部': ['西多摩郡', '大島町', '利島村', '新島村', '神津島村', '三宅村', '御蔵島村', '八丈町', '青ヶ島村',
+               '小笠原村'],
+    },
+    '神奈川県': {
+        '市': ['横浜市', '川崎市', '相模原市', '横須賀市', '平塚市', '鎌倉市', '藤沢市', '小田原市', '茅ヶ崎市', '逗子市'],
+        '郡': ['三浦郡', '高座郡', '中郡', '足柄上郡', '足柄下郡', '愛甲郡'],
+    },
+    '埼玉県': {
+        '市': ['さいたま市', '川越市', '熊谷市', '川口市', '行田市', '秩父市', '所沢市', '飯能市', '加須市', '本庄市'],
+        '郡': ['北足立郡', '入間郡', '比企郡', '秩父郡', '児玉郡', '大里郡', '南埼玉郡', '北葛飾郡'],
+    },
+    '千葉県': {
+        '市': ['千葉市', '銚子市', '市川市', '船橋市', '館山市', '木更津市', '松戸市', '野田市', '茂原市', '成田市',
+              '市原市'],
+        '郡': ['印旛郡', '香取郡', '山武郡', '長生郡', '夷隅郡', '安房郡'],
+    },
+    '大阪府': {
+        '市': ['大阪市', '堺市', '東大阪市', '枚方市', '豊中市', '吹田市', '高槻市', '茨木市', '八尾市', '寝屋川市'],
+        '郡': ['三島郡', '豊能郡', '泉北郡', '泉南郡', '南河内郡'],
+    },
+    '京都府': {
+        '市': ['京都市', '福知山市', '舞鶴市', '綾部市', '宇治市', '宮津市', '亀岡市', '城陽市', '向日市', '長岡京市'],
+        '郡': ['乙訓郡', '久世郡', '綴喜郡', '相楽郡', '船井郡', '与謝郡'],
+    },
+    '北海道': {'市': ['札幌市']},
+    '宮城県': {'市': ['仙台市']},
+    '山形県': {'市': ['村山市'], '郡': ['東村山郡', '北村山郡']},
+    '福島県': {'市': ['郡山市', '田村市'], '郡': ['田村郡']},
+    '新潟県': {'市': ['十日町市', '村上市']},
+    '石川県': {'市': ['野々市市']},
+    '長野県': {'市': ['大町市']},
+    '愛知県': {'市': ['名古屋市']},
+    '三重県': {'市': ['四日市市']},
+    '兵庫県': {'市': ['神戸市']},
+    '奈良県': {'市': ['大和郡山市']},
+    '広島県': {'市': ['広島市', '廿日市市']},
+    '福岡県': {'市': ['福岡市', '北九州市']},
+}
+
+# Wards of the designated cities above
+CITY_WARDS = {
+    '札幌市': ['中央区', '北区', '東区', '白石区', '豊平区', '南区', '西区', '厚別区', '手稲区', '清田区'],
+    '仙台市': ['青葉区', '宮城野区', '若林区', '太白区', '泉区'],
+    'さいたま市': ['西区', '北区', '大宮区', '見沼区', '中央区', '桜区', '浦和区', '南区', '緑区', '岩槻区'],
+    '千葉市': ['中央区', '花見川区', '稲毛区', '若葉区', '緑区', '美浜区'],
+    '横浜市': ['鶴見区', '神奈川区', '西区', '中区', '南区', '保土ケ谷区', '磯子区', '金沢区', '港北区',
+            '戸塚区', '港南区', '旭区', '緑区', '瀬谷区', '栄区', '泉区', '青葉区', '都筑区'],
+    '川崎市': ['川崎区', '幸区', '中原区', '高津区', '多摩区', '宮前区', '麻生区'],
+    '相模原市': ['緑区', '中央区', '南区'],
+    '名古屋市': ['千種区', '東区', '北区', '西区', '中村区', '中区', '昭和区', '瑞穂区', '熱田区',
+              '中川区', '港区', '南区', '守山区', '緑区', '名東区', '天白区'],
+    '京都市': ['北区', '上京区', '左京区', '中京区', '東山区', '下京区', '南区', '右京区', '伏見区',
+            '山科区', '西京区'],
+    '大阪市': ['都島区', '福島区', '此花区', '西区', '港区', '大正区', '天王寺区', '浪速区', '西淀川区',
+            '東淀川区', '東成区', '生野区', '旭区', '城東区', '阿倍野区', '住吉区', '東住吉区', '西成区',
+            '淀川区', '鶴見区', '住之江区', '平野区', '北区', '中央区'],
+    '堺市': ['堺区', '中区', '東区', '西区', '南区', '北区', '美原区'],
+    '神戸市': ['東灘区', '灘区', '兵庫区', '長田区', '須磨区', '垂水区', '北区', '中央区', '西区'],
+    '広島市': ['中区', '東区', '南区', '西区', '安佐南区', '安佐北区', '安芸区', '佐伯区'],
+    '北九州市': ['門司区', '若松区', '戸畑区', '小倉北区', '小倉南区', '八幡東区', '八幡西区'],
+    '福岡市': ['東区', '博多区', '中央区', '南区', '西区', '城南区', '早良区'],
+}
+
+# Prefecture -> first three postal code digits, inclusive (PostalCodeRanges)
+POSTAL_CODE_RANGES = {
+    '北海道': (10, 99), '青森県': (30, 39), '岩手県': (20, 29), '宮城県': (980, 989),
+    '秋田県': (10, 19), '山形県': (990, 999), '福島県': (960, 979),
+    '茨城県': (300, 319), '栃木県': (320, 329), '群馬県': (370, 379), '埼玉県': (330, 369),
+    '千葉県': (260, 299), '東京都': (100, 199), '神奈川県': (210, 259),
+    '新潟県': (940, 959), '富山県': (930, 939), '石川県': (920, 929), '福井県': (910, 919),
+    '山梨県': (400, 409), '長野県': (380, 399), '岐阜県': (500, 509), '静岡県': (410, 439),
+    '愛知県': (440, 499),
+    '三重県': (510, 519), '滋賀県': (520, 529), '京都府': (600, 629), '大阪府': (530, 599),
+    '兵庫県': (650, 679), '奈良県': (630, 639), '和歌山県': (640, 649),
+    '鳥取県': (680, 689), '島根県': (690, 699), '岡山県': (700, 719), '広島県': (720, 739),
+    '山口県': (740, 759),
+    '徳島県': (770, 779), '香川県': (760, 769), '愛媛県': (790, 799), '高知県': (780, 789),
+    '福岡県': (800, 839), '佐賀県': (840, 849), '長崎県': (850, 859), '熊本県': (860, 869),
+    '大分県': (870, 879), '宮崎県': (880, 889), '鹿児島県': (890, 899), '沖縄県': (900, 909),
+}
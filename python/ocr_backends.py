@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+
+"""
+Pluggable OCR backends
+
+Both generators call Tesseract through an OCRBackend. The pytesseract
+backend spawns a `tesseract` process per call, which reloads the language
+traineddata every time. The tesserocr backend drives the Tesseract C API
+in-process and keeps a pool of warm engines per (language, OEM, PSM), so
+repeated calls skip model loading entirely.
+"""
+
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections import defaultdict
+from typing import Dict, List, Optional, Tuple
+
+from ocr_cache import DEFAULT_CACHE_DIR, tesseract_languages
+
+OCR_BACKENDS = ('auto', 'pytesseract', 'tesserocr')
+DEFAULT_POOL_SIZE = os.cpu_count() or 1
+
+
+def parse_tesseract_config(config: str) -> Tuple[Optional[int], Optional[int], Dict[str, str]]:
+    """Split a tesseract command line config into (oem, psm, -c variables)"""
+    oem, psm, variables = None, None, {}
+    tokens = config.split()
+    i = 0
+    while i < len(tokens):
+        token = tokens[i]
+        value = tokens[i + 1] if i + 1 < len(tokens) else None
+        if token == '--oem' and value is not None:
+            oem, i = int(value), i + 2
+        elif token == '--psm' and value is not None:
+            psm, i = int(value), i + 2
+        elif token == '-c' and value is not None and '=' in value:
+            key, val = value.split('=', 1)
+            variables[key] = val
+            i += 2
+        else:
+            i += 1
+    return oem, psm, variables
+
+
+class OCRBackend(ABC):
+    """Interface shared by the OCR backends"""
+
+    # Recorded in OCR cache keys, so backends never serve each other's text
+    name = 'base'
+
+    @abstractmethod
+    def image_to_string(self, image, lang: str, config: str = '') -> str:
+        """OCR a PIL image"""
+
+    @abstractmethod
+    def get_languages(self) -> List[str]:
+        """Installed Tesseract languages"""
+
+    def close(self):
+        """Release any engines held by the backend"""
+
+
+class PytesseractBackend(OCRBackend):
+    """One tesseract subprocess per call (the original behaviour)"""
+
+    name = 'pytesseract'
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        # Where the tesseract capability probe is cached
+        self.cache_dir = cache_dir
+
+    def image_to_string(self, image, lang: str, config: str = '') -> str:
+        # Imported on first use; pytesseract pulls in PIL at import time
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=lang, config=config)
+
+    def get_languages(self) -> List[str]:
+        # Cached on disk; avoids a tesseract subprocess per generator
+        return tesseract_languages(self.cache_dir)
+
+
+class TesserocrBackend(OCRBackend):
+    """
+    In-process Tesseract through tesserocr, with warm engines reused per
+    (language, OEM, PSM).
+
+    Up to `pool_size` engines are created for each key; callers beyond
+    that wait for one to be returned. tesserocr releases the GIL while
+    recognising, so engines in a thread pool run in parallel. Engines are
+    created lazily, and pickling (into batch worker processes) drops them.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, pool_size: int = DEFAULT_POOL_SIZE):
+        try:
+            import tesserocr
+        except ImportError:
+            raise RuntimeError("The tesserocr backend requires tesserocr (pip install tesserocr)")
+        self._tesserocr = tesserocr
+        self.pool_size = max(1, pool_size)
+        self._idle = defaultdict(list)
+        self._created = defaultdict(int)
+        self._available = threading.Condition()
+        self.engines_created = 0
+
+    def __getstate__(self):
+        return {'pool_size': self.pool_size}
+
+    def __setstate__(self, state):
+        self.__init__(state['pool_size'])
+
+    def _new_engine(self, lang: str, oem: Optional[int], psm: Optional[int]):
+        kwargs = {'lang': lang, 'init': True}
+        if oem is not None:
+            kwargs['oem'] = self._tesserocr.OEM(oem)
+        if psm is not None:
+            kwargs['psm'] = self._tesserocr.PSM(psm)
+        self.engines_created += 1
+        return self._tesserocr.PyTessBaseAPI(**kwargs)
+
+    def _acquire(self, key: tuple):
+        with self._available:
+            while not self._idle[key] and self._created[key] >= self.pool_size:
+                self._available.wait()
+            if self._idle[key]:
+                return self._idle[key].pop()
+            self._created[key] += 1
+        try:
+            return self._new_engine(*key)
+        except Exception:
+            with self._available:
+                self._created[key] -= 1
+                self._available.notify()
+            raise
+
+    def _release(self, key: tuple, engine):
+        with self._available:
+            self._idle[key].append(engine)
+            self._available.notify()
+
+    def image_to_string(self, image, lang: str, config: str = '') -> str:
+        oem, psm, variables = parse_tesseract_config(config)
+        key = (lang, oem, psm)
+        engine = self._acquire(key)
+        try:
+            for name, value in variables.items():
+                engine.SetVariable(name, value)
+            engine.SetImage(image)
+            return engine.GetUTF8Text()
+        finally:
+            engine.Clear()
+            self._release(key, engine)
+
+    def get_languages(self) -> List[str]:
+        return list(self._tesserocr.get_languages()[1])
+
+    def close(self):
+        with self._available:
+            for engines in self._idle.values():
+                for engine in engines:
+                    engine.End()
+            self._idle.clear()
+            self._created.clear()
+
+
+def create_backend(name: str = 'auto', pool_size: int = DEFAULT_POOL_SIZE,
+                   cache_dir: str = DEFAULT_CACHE_DIR) -> OCRBackend:
+    """
+    Build an OCR backend by name. 'auto' uses tesserocr when it is
+    installed and falls back to pytesseract otherwise. `cache_dir` is where
+    the pytesseract backend finds the cached tesseract probe.
+    """
+    if name == 'pytesseract':
+        return PytesseractBackend(cache_dir)
+    if name == 'tesserocr':
+        return TesserocrBackend(pool_size)
+    if name == 'auto':
+        try:
+            return TesserocrBackend(pool_size)
+        except RuntimeError:
+            return PytesseractBackend(cache_dir)
+    raise ValueError(f"Unknown OCR backend: {name}")
+
+
+def add_backend_arguments(parser):
+    """Register the shared OCR backend options on an argparse parser"""
+    parser.add_argument(
+        '--ocr-backend',
+        choices=OCR_BACKENDS,
+        default='auto',
+        help='Tesseract binding: in-process tesserocr or a pytesseract subprocess per call '
+             '(default: auto, tesserocr when installed)'
+    )
+    parser.add_argument(
+        '--engine-pool-size',
+        type=int,
+        default=DEFAULT_POOL_SIZE,
+        help='Warm tesserocr engines kept per language and page mode (default: %(default)s)'
+    )
+
+
+def backend_from_args(args) -> OCRBackend:
+    """Build the OCR backend selected on the command line"""
+    return create_backend(args.ocr_backend, pool_size=args.engine_pool_size, cache_dir=args.cache_dir)
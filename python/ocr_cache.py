@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+
+"""
+Persistent OCR result cache
+
+Stores Tesseract output in a small SQLite database keyed by the image
+content hash, preprocessing variant, language, Tesseract config and
+Tesseract version. Re-running the pipeline after a parser change then
+reuses earlier OCR results instead of invoking Tesseract again.
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+import subprocess
+from functools import lru_cache
+from typing import Any, Callable, Dict, List, Optional
+
+DEFAULT_CACHE_DIR = os.environ.get(
+    'PROPERTY_OCR_CACHE_DIR',
+    os.path.join(os.path.expanduser('~'), '.cache', 'property_sql_generator')
+)
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+PROBE_FILE = 'tesseract_probe.json'
+
+
+def hash_file(path: str) -> str:
+    """Return the SHA-256 hex digest of a file's contents"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _tesseract_binary() -> Optional[str]:
+    """Resolved path of the tesseract executable pytesseract would run"""
+    cmd = 'tesseract'
+    if 'pytesseract' in sys.modules:
+        cmd = sys.modules['pytesseract'].pytesseract.tesseract_cmd
+    path = shutil.which(cmd)
+    return os.path.realpath(path) if path else None
+
+
+def _file_signature(path: Optional[str]) -> Optional[list]:
+    try:
+        st = os.stat(path)
+    except (OSError, TypeError):
+        return None
+    return [st.st_mtime_ns, st.st_size]
+
+
+def _run_tesseract(binary: str, *args: str) -> str:
+    result = subprocess.run([binary, *args], capture_output=True, text=True, timeout=30)
+    # Older releases print --version to stderr
+    return result.stdout or result.stderr
+
+
+def _probe_tesseract(binary: str) -> Dict[str, Any]:
+    version_output = _run_tesseract(binary, '--version')
+    version = version_output.split()[1] if len(version_output.split()) > 1 else 'unknown'
+    langs_output = _run_tesseract(binary, '--list-langs').splitlines()
+    # First line: List of available languages in "/usr/share/tessdata/" (3):
+    match = re.search(r'"(.+?)"', langs_output[0]) if langs_output else None
+    return {
+        'version': version,
+        'languages': [line.strip() for line in langs_output[1:] if line.strip()],
+        'tessdata': match.group(1) if match else None,
+    }
+
+
+@lru_cache(maxsize=None)
+def tesseract_capabilities(cache_dir: str = DEFAULT_CACHE_DIR) -> Dict[str, Any]:
+    """
+    Tesseract version and installed languages.
+
+    Probing spawns two tesseract processes, so the result is stored in
+    `cache_dir` and reused until the tesseract binary or its tessdata
+    directory changes (mtime or size). Returns version 'unknown' and no
+    languages when tesseract is not installed; that result is not cached.
+    """
+    binary = _tesseract_binary()
+    if binary is None:
+        return {'version': 'unknown', 'languages': None, 'tessdata': None}
+
+    probe_path = os.path.join(cache_dir, PROBE_FILE)
+    try:
+        with open(probe_path, encoding='utf-8') as f:
+            cached = json.load(f)
+        if (cached['binary'] == binary and cached['signature'] == _file_signature(binary)
+                and cached['tessdata_signature'] == _file_signature(cached['tessdata'])):
+            return cached
+    except (OSError, ValueError, KeyError):
+        pass
+
+    try:
+        probe = _probe_tesseract(binary)
+    except (OSError, subprocess.SubprocessError):
+        return {'version': 'unknown', 'languages': None, 'tessdata': None}
+    probe.update(binary=binary, signature=_file_signature(binary),
+                 tessdata_signature=_file_signature(probe['tessdata']))
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        tmp_path = f"{probe_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(probe, f)
+        os.replace(tmp_path, probe_path)
+    except OSError:
+        pass
+    return probe
+
+
+def tesseract_version(cache_dir: str = DEFAULT_CACHE_DIR) -> str:
+    """Installed Tesseract version (from the probe cached in `cache_dir`)"""
+    return tesseract_capabilities(cache_dir)['version']
+
+
+def tesseract_languages(cache_dir: str = DEFAULT_CACHE_DIR) -> List[str]:
+    """Installed Tesseract languages (from the probe cached in `cache_dir`)"""
+    languages = tesseract_capabilities(cache_dir)['languages']
+    if languages is None:
+        raise RuntimeError("tesseract is not installed or not on PATH")
+    return languages
+
+
+class OCRCache:
+    """
+    Size-bounded, least-recently-used OCR text cache backed by SQLite.
+
+    The database is opened lazily so instances can be pickled into worker
+    processes; each process then keeps its own connection and counters.
+    Threads of one process share both, so every lookup and its hit/miss
+    count happen under one lock.
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES,
+                 refresh: bool = False):
+        self.cache_dir = cache_dir
+        self.db_path = os.path.join(cache_dir, 'ocr_cache.sqlite3')
+        self.max_bytes = max_bytes
+        self.refresh = refresh
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS ocr_results (
+                    key TEXT PRIMARY KEY,
+                    text TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_access REAL NOT NULL
+                )""")
+            self._conn.execute(
+                'CREATE INDEX IF NOT EXISTS idx_ocr_results_access ON ocr_results (last_access)'
+            )
+            self._conn.commit()
+        return self._conn
+
+    def make_key(self, image_hash: str, variant: str, lang: str, config: str, backend: str) -> str:
+        """Build the cache key for one OCR invocation through the named OCR backend"""
+        parts = (image_hash, variant, lang or '', config or '', backend, tesseract_version(self.cache_dir))
+        return hashlib.sha256('\x1f'.join(parts).encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up cached text, counting the hit or miss and refreshing its LRU timestamp on a hit"""
+        with self._lock:
+            if self.refresh:
+                self.misses += 1
+                return None
+            conn = self._connect()
+            row = conn.execute('SELECT text FROM ocr_results WHERE key = ?', (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            conn.execute('UPDATE ocr_results SET last_access = ? WHERE key = ?', (time.time(), key))
+            conn.commit()
+            self.hits += 1
+            return row[0]
+
+    def put(self, key: str, text: str):
+        """Store OCR text and evict least recently used entries over the size cap"""
+        size = len(text.encode('utf-8'))
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                'INSERT OR REPLACE INTO ocr_results (key, text, size, last_access) VALUES (?, ?, ?, ?)',
+                (key, text, size, time.time())
+            )
+            self._evict(conn)
+            conn.commit()
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr_results').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes
+        freed = 0
+        stale = []
+        for key, size in conn.execute('SELECT key, size FROM ocr_results ORDER BY last_access'):
+            stale.append((key,))
+            freed += size
+            if freed >= excess:
+                break
+        conn.executemany('DELETE FROM ocr_results WHERE key = ?', stale)
+
+    def get_or_compute(self, image_hash: str, variant: str, lang: str, config: str, backend: str,
+                       compute: Callable[[], str]) -> str:
+        """Return cached OCR text, running `compute` and storing its result on a miss"""
+        key = self.make_key(image_hash, variant, lang, config, backend)
+        text = self.get(key)
+        if text is not None:
+            return text
+        text = compute()
+        self.put(key, text)
+        return text
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters for this process"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses}
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+def add_cache_arguments(parser):
+    """Register the shared OCR cache options on an argparse parser"""
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Disable the on-disk OCR result cache'
+    )
+    parser.add_argument(
+        '--refresh-cache',
+        action='store_true',
+        help='Ignore cached OCR results and overwrite them with fresh ones'
+    )
+    parser.add_argument(
+        '--cache-dir',
+        default=DEFAULT_CACHE_DIR,
+        help=f'OCR cache directory (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--cache-size',
+        type=int,
+        default=DEFAULT_MAX_BYTES // (1024 * 1024),
+        help='Maximum OCR cache size in MB (default: %(default)s)'
+    )
+
+
+def cache_from_args(args) -> Optional[OCRCache]:
+    """Build an OCRCache from parsed command line options, or None if disabled"""
+    if args.no_cache:
+        return None
+    return OCRCache(args.cache_dir, max_bytes=args.cache_size * 1024 * 1024,
+                    refresh=args.refresh_cache)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+OCR result scoring
+
+Classifies every code point of an OCR result in one vectorised pass over
+its UTF-32 encoding and combines the counts into the quality score used to
+rank preprocessing/OCR-config candidates. The individual components are
+returned as well so a ranking can be explained.
+"""
+
+from typing import Dict, Any
+
+import numpy as np
+
+# Keywords that indicate a property listing was recognised
+PROPERTY_KEYWORDS = ['価格', '万円', '㎡', '階', '築', '駅', '分', '所在地', '間取り', 'LDK']
+
+# Inclusive code point ranges counted as Japanese
+JAPANESE_RANGES = [
+    (0x3040, 0x309F),  # Hiragana
+    (0x30A0, 0x30FF),  # Katakana
+    (0x4E00, 0x9FAF),  # Kanji
+]
+
+# Latin letters further than this from any Japanese character count as garbage
+GARBAGE_WINDOW = 2
+
+JAPANESE_WEIGHT = 3
+GARBAGE_WEIGHT = 2
+KEYWORD_WEIGHT = 10
+
+
+def code_points(text: str) -> np.ndarray:
+    """View a string as an array of Unicode code points"""
+    return np.frombuffer(text.encode('utf-32-le'), dtype='<u4')
+
+
+def score_components(text: str) -> Dict[str, Any]:
+    """
+    Score an OCR result and return the score with its components.
+
+    score = stripped length + 3 * Japanese chars - 2 * garbage chars
+            + 10 * property keyword hits, floored at 0
+    """
+    stripped_length = len(text.strip()) if text else 0
+    if not stripped_length:
+        return {
+            'score': 0, 'length': 0, 'japanese_chars': 0, 'japanese_ratio': 0.0,
+            'garbage_chars': 0, 'garbage_ratio': 0.0, 'keyword_hits': 0,
+        }
+
+    cps = code_points(text)
+
+    japanese = np.zeros(len(cps), dtype=bool)
+    for low, high in JAPANESE_RANGES:
+        japanese |= (cps >= low) & (cps <= high)
+
+    # ASCII letters without a Japanese character within +/- GARBAGE_WINDOW
+    letters = ((cps >= 0x41) & (cps <= 0x5A)) | ((cps >= 0x61) & (cps <= 0x7A))
+    window = np.ones(2 * GARBAGE_WINDOW + 1, dtype=np.int32)
+    # 'full' then trimmed, since 'same' returns the window length for texts shorter than it
+    near_japanese = np.convolve(japanese.astype(np.int32), window)[GARBAGE_WINDOW:GARBAGE_WINDOW + len(cps)] > 0
+    garbage = letters & ~near_japanese
+
+    japanese_chars = int(np.count_nonzero(japanese))
+    garbage_chars = int(np.count_nonzero(garbage))
+    keyword_hits = sum(1 for keyword in PROPERTY_KEYWORDS if keyword in text)
+
+    score = (stripped_length
+             + japanese_chars * JAPANESE_WEIGHT
+             - garbage_chars * GARBAGE_WEIGHT
+             + keyword_hits * KEYWORD_WEIGHT)
+
+    return {
+        'score': max(0, score),
+        'length': stripped_length,
+        'japanese_chars': japanese_chars,
+        'japanese_ratio': japanese_chars / len(cps),
+        'garbage_chars': garbage_chars,
+        'garbage_ratio': garbage_chars / len(cps),
+        'keyword_hits': keyword_hits,
+    }
+
+
+def score_text(text: str) -> int:
+    """Score an OCR result (see score_components)"""
+    return score_components(text)['score']
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+
+"""
+Lazy preprocessing graph for OCR variants
+
+Each preprocessing variant (contrast, Otsu threshold, denoise, ...) is a
+node that depends on shared intermediate nodes such as the grayscale
+array. Nodes are computed on first request, memoised, and released as soon
+as no variant that is still needed depends on them. Per-node compute time
+and held/peak memory are recorded so the cost of each variant is visible.
+
+With a SharedImageStore, the image is decoded once into a shared-memory
+array and the variant arrays are written straight into shared buffers
+(OpenCV's dst=), so worker processes can read any of them through
+handle() without a copy.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from shared_images import SharedImageHandle, SharedImageStore
+from tracing import NULL_TRACER, Tracer
+
+# Variant names in their original (exhaustive search) order
+VARIANTS = ['original', 'contrast', 'threshold', 'denoised', 'adaptive', 'morphological']
+
+
+def _array_mode(original: Image.Image) -> str:
+    return original.mode if original.mode in ('L', 'RGB', 'RGBA') else 'RGB'
+
+
+def _array_shape(original: Image.Image) -> Tuple[int, ...]:
+    bands = len(_array_mode(original))
+    return (original.height, original.width) if bands == 1 else (original.height, original.width, bands)
+
+
+def _array(original: Image.Image, out: Optional[np.ndarray] = None) -> np.ndarray:
+    if original.mode != _array_mode(original):
+        original = original.convert('RGB')
+    if out is None:
+        return np.array(original)
+    out[...] = np.asarray(original)
+    return out
+
+
+def _gray(array: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    if array.ndim == 2:
+        return array
+    if array.shape[2] == 4:
+        return cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY, dst=out)
+    return cv2.cvtColor(array, cv2.COLOR_RGB2GRAY, dst=out)
+
+
+def _otsu(gray: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=out)
+    return thresh
+
+
+def _morphological(thresh: np.ndarray, out: Optional[np.ndarray] = None) -> Image.Image:
+    kernel = np.ones((1, 1), np.uint8)
+    return Image.fromarray(cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, kernel, dst=out))
+
+
+# node name -> (dependencies, function of the dependency values). Functions
+# take an optional `out` array to write into; grayscale PIL images made with
+# Image.fromarray share that array's memory.
+NODES: Dict[str, Tuple[Tuple[str, ...], Callable[..., Any]]] = {
+    'array': (('original',), _array),
+    'gray': (('array',), _gray),
+    'otsu': (('gray',), _otsu),
+    'contrast': (('gray',), lambda gray, out=None: Image.fromarray(
+        cv2.convertScaleAbs(gray, alpha=2.0, beta=0, dst=out))),
+    'threshold': (('otsu',), lambda otsu, out=None: Image.fromarray(otsu)),
+    'denoised': (('gray',), lambda gray, out=None: Image.fromarray(cv2.fastNlMeansDenoising(gray, dst=out))),
+    'adaptive': (('gray',), lambda gray, out=None: Image.fromarray(cv2.adaptiveThreshold(
+        gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2, dst=out))),
+    'morphological': (('otsu',), _morphological),
+}
+
+# Nodes whose pixels live in another node's array ('original' is decoded
+# into 'array'; 'threshold' wraps the Otsu array)
+ARRAY_SOURCES = {'original': 'array', 'threshold': 'otsu'}
+
+
+def value_nbytes(value: Any) -> int:
+    """Approximate pixel memory held by an array or PIL image"""
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    return 0
+
+
+class PreprocessingGraph:
+    """
+    Memoised, on-demand preprocessing variants for one image.
+
+    `get(name)` computes a variant and any missing dependencies; `retain()`
+    drops every cached node that the remaining variants no longer need.
+    With a `store`, node arrays are allocated in shared memory and released
+    back to it along with their nodes.
+    """
+
+    def __init__(self, image: Image.Image, tracer: Tracer = NULL_TRACER,
+                 store: Optional[SharedImageStore] = None):
+        self.tracer = tracer
+        self.store = store
+        self._cache: Dict[str, Any] = {'original': image}
+        # node name -> shared array holding its pixels
+        self._arrays: Dict[str, np.ndarray] = {}
+        self._errors: Dict[str, Exception] = {}
+        self.timings: Dict[str, float] = {}
+        self.sizes: Dict[str, int] = {'original': value_nbytes(image)}
+        self.held_bytes = self.sizes['original']
+        self.peak_bytes = self.held_bytes
+
+    @classmethod
+    def open(cls, image_path: str, tracer: Tracer = NULL_TRACER,
+             store: Optional[SharedImageStore] = None) -> 'PreprocessingGraph':
+        return cls(Image.open(image_path), tracer, store)
+
+    @staticmethod
+    def ancestors(names: Iterable[str]) -> set:
+        """The given nodes plus everything they depend on"""
+        needed = set()
+        stack = list(names)
+        while stack:
+            name = stack.pop()
+            if name in needed:
+                continue
+            needed.add(name)
+            stack.extend(NODES.get(name, ((), None))[0])
+        return needed
+
+    def get(self, name: str) -> Any:
+        """Return a node's value, computing it (and its dependencies) on first use"""
+        if name in self._cache:
+            return self._cache[name]
+        if name in self._errors:
+            raise self._errors[name]
+        if name not in NODES:
+            raise KeyError(f"Unknown preprocessing variant: {name}")
+
+        dependencies, func = NODES[name]
+        args = [self.get(dependency) for dependency in dependencies]
+        start = time.perf_counter()
+        out = self._allocate(name, args)
+        try:
+            with self.tracer.span(f"preprocess:{name}", 'preprocess'):
+                value = func(*args, out=out)
+        except Exception as e:
+            self._errors[name] = e
+            if out is not None:
+                self.store.release(out)
+            raise
+        if out is not None:
+            self._arrays[name] = out
+        elif self.store is not None and self.store.owns(value):
+            # Passed through from a dependency (gray of a grayscale image)
+            self._arrays[name] = value
+        self.timings[name] = time.perf_counter() - start
+        self.sizes[name] = value_nbytes(value)
+        self._cache[name] = value
+        self.held_bytes += self.sizes[name]
+        self.peak_bytes = max(self.peak_bytes, self.held_bytes)
+        return value
+
+    def _allocate(self, name: str, args: list) -> Optional[np.ndarray]:
+        """Shared output array for a node, or None to let it allocate its own"""
+        if self.store is None or name in ARRAY_SOURCES:
+            return None
+        if name == 'array':
+            return self.store.allocate(_array_shape(args[0]))
+        if name == 'gray' and args[0].ndim == 2:
+            return None
+        return self.store.allocate(args[0].shape[:2])
+
+    def handle(self, name: str) -> SharedImageHandle:
+        """Shared-memory handle of a node's pixels (needs a store)"""
+        if self.store is None:
+            raise ValueError("Preprocessing graph has no shared image store")
+        source = ARRAY_SOURCES.get(name, name)
+        self.get(name)
+        self.get(source)
+        return self.store.handle(self._arrays[source])
+
+    def retain(self, variants: Iterable[str]):
+        """Release cached nodes not needed to produce any of `variants`"""
+        needed = self.ancestors(variants)
+        for name in list(self._cache):
+            if name not in needed:
+                self.held_bytes -= self.sizes.get(name, 0)
+                del self._cache[name]
+                array = self._arrays.pop(name, None)
+                if array is not None and not any(held is array for held in self._arrays.values()):
+                    self.store.release(array)
+
+    def release_all(self):
+        self.retain(())
+
+    def report(self) -> Dict[str, Dict[str, float]]:
+        """Per-node compute time (ms) and size (KB) for the nodes computed so far"""
+        return {name: {'ms': self.timings[name] * 1000, 'kb': self.sizes.get(name, 0) / 1024}
+                for name in self.timings}
@@ -10,28 +10,174 @@ Parses Japanese real estate listing data from screenshot images and generates SQ
 
  
 
+import os
+
 import re
 
 import argparse
 
 import sys
 
+import functools
+
+import time
+
 from datetime import datetime
 
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+
+from typing import Dict, Any, AsyncIterator, Iterable, Iterator, List, Optional, Tuple, Union
+
+from batch_processor import (
+
+    collect_image_paths, read_file_list,
+
+    iter_batch, ResultWriter, format_error_report
+
+)
+
+from ocr_cache import OCRCache, hash_file, add_cache_arguments, cache_from_args, tesseract_version
+
+from ocr_backends import OCRBackend, create_backend, add_backend_arguments, backend_from_args
+
+from field_scanner import scan_labels
+
+from address_resolver import address_hierarchy
+
+from geocoder import Gazetteer, add_geocoder_arguments, gazetteer_from_args
+
+from text_scale import (
+
+    TextScale, add_normalize_arguments, text_height_from_args, scaled_image_hash, format_scale_report
+
+)
+
+from batch_manifest import add_manifest_arguments, manifest_from_args, iter_incremental, format_manifest_report
+
+from tracing import NULL_TRACER, Tracer, quiet_print, add_trace_arguments, tracer_from_args, run_profiled
+
+from sql_output import OUTPUT_FORMATS, GeoPoint, PropertyRecord, render_row, render_document, psql_copy_command
+
+from db_loader import (
+
+    LOAD_METHODS, DEFAULT_BATCH_SIZE, DEFAULT_POOL_SIZE,
+
+    PropertyLoader, LoadWriter, default_dsn, redact_dsn, format_load_report, format_load_errors
+
+)
+
+ 
+
+# (raw label, parsed key, scalar parser) for the numeric and date fields;
+
+# parse_property_batch parses these as whole columns (see columnar_parsing)
+
+NUMERIC_FIELDS = [
+
+    ('価格', 'price', 'parse_price'),
 
-from PIL import Image
+    ('専有面積', 'area', 'parse_area'),
 
-import pytesseract
+    ('築年月', 'year_built', 'parse_year'),
+
+    ('バルコニー', 'balcony_area', 'parse_balcony_area'),
+
+    ('総戸数', 'total_units', 'parse_units'),
+
+    ('更新日', 'information_release_date', 'parse_date'),
+
+    ('次回更新予定', 'next_scheduled_update_date', 'parse_date'),
+
+    ('修繕積立金', 'repair_reserve_fund', 'parse_price'),
+
+]
+
+ 
+
+# Bump whenever field parsing, value parsing or rendering changes, so images
+
+# recorded in a batch manifest are re-parsed from their stored OCR text
+
+PARSER_VERSION = '3'
+
+ 
+
+class OCRError(Exception):
+
+    """Raised when a screenshot cannot be read or OCR'd"""
 
  
 
 class PropertySQLGenerator:
 
-    def __init__(self):
+    def __init__(self, ocr_cache: Optional[OCRCache] = None, output_format: str = 'sql',
+
+                 detect_regions: bool = False, ocr_workers: int = 1,
+
+                 ocr_backend: Optional[OCRBackend] = None,
+
+                 tracer: Optional[Tracer] = None, quiet: bool = False,
+
+                 gazetteer: Optional[Gazetteer] = None,
+
+                 text_height: Optional[int] = None):
 
         self.property_data = {}
 
+        self.ocr_cache = ocr_cache
+
+        # 'sql' for INSERT statements, 'copy' or 'csv' for bulk-load rows,
+
+        # 'row' for the PropertyRecord used by the database loader
+
+        self.output_format = output_format
+
+        # OCR only the detected text blocks (opt-in), up to ocr_workers of them at once
+
+        self.detect_regions = detect_regions
+
+        self.ocr_workers = max(1, ocr_workers)
+
+        # Glyph height (px) screenshots are rescaled to; None OCRs them as captured
+
+        self.text_height = text_height
+
+        # (pixels sent to Tesseract, pixels of the whole image) for the last image
+
+        self.last_ocr_pixels = None
+
+        # How the last image was rescaled (text_scale.TextScale) and its OCR time
+
+        self.last_text_scale = None
+
+        self.last_ocr_seconds = None
+
+        # OCR text of the last processed image (kept for the batch manifest)
+
+        self.last_ocr_text = None
+
+        # In-process tesserocr engines when installed, else a subprocess per call
+
+        self.ocr_backend = ocr_backend or create_backend()
+
+        # Timing spans for each stage, and whether to print progress at all
+
+        self.tracer = tracer or NULL_TRACER
+
+        self.log = quiet_print if quiet else print
+
+        # Offline town/chome centroids for the location column (None leaves it NULL)
+
+        self.gazetteer = gazetteer
+
+       
+
+    def close(self):
+
+        """Release the OCR engines held by the backend"""
+
+        self.ocr_backend.close()
+
        
 
     def extract_text_from_image(self, image_path: str) -> str:
@@ -42,11 +188,15 @@ class PropertySQLGenerator:
 
         """
 
+        self.last_ocr_pixels = None
+
+        self.last_text_scale = self.last_ocr_seconds = None
+
         try:
 
-            # Open the image
+            with self.tracer.span('load', path=image_path):
 
-            image = Image.open(image_path)
+                image, self.last_text_scale = self.load_image(image_path)
 
            
 
@@ -56,19 +206,87 @@ class PropertySQLGenerator:
 
             custom_config = r'--oem 3 --psm 6'
 
+            image_hash = scaled_image_hash(hash_file(image_path) if self.ocr_cache else None, self.last_text_scale)
+
+           
+
+            with self.tracer.span('detect_regions'):
+
+                regions = self.find_text_regions(image)
+
+            full_pixels = image.width * image.height
+
+            self.last_ocr_pixels = (sum(r.width * r.height for r in regions) or full_pixels, full_pixels)
+
+           
+
+            def ocr_region(lang, region):
+
+                crop, variant = image, 'original'
+
+                if region is not None:
+
+                    from text_regions import crop_region, region_key
+
+                    crop, variant = crop_region(image, region), region_key('original', region)
+
+               
+
+                def compute():
+
+                    with self.tracer.span('ocr', 'ocr', variant=variant, lang=lang, config=custom_config):
+
+                        return self.ocr_backend.image_to_string(crop, lang=lang, config=custom_config)
+
+               
+
+                if self.ocr_cache is None:
+
+                    return compute()
+
+                return self.ocr_cache.get_or_compute(image_hash, variant, lang, custom_config,
+
+                                                     self.ocr_backend.name, compute)
+
+           
+
+            def run_ocr(lang):
+
+                # Regions are OCR'd independently and joined in reading order
+
+                targets = regions or [None]
+
+                if self.ocr_workers > 1 and len(targets) > 1:
+
+                    with ThreadPoolExecutor(max_workers=min(self.ocr_workers, len(targets))) as executor:
+
+                        texts = list(executor.map(lambda region: ocr_region(lang, region), targets))
+
+                else:
+
+                    texts = [ocr_region(lang, region) for region in targets]
+
+                return '\n'.join(texts)
+
            
 
-            # Try Japanese first, then fallback to default
+            # Try Japanese first, then fallback to default ('eng' is what Tesseract
+
+            # uses when no language is given; naming it gives the cache key one)
+
+            start = time.perf_counter()
 
             try:
 
-                text = pytesseract.image_to_string(image, lang='jpn', config=custom_config)
+                text = run_ocr('jpn')
 
             except:
 
-                print("Warning: Japanese OCR failed, trying default language...")
+                self.log("Warning: Japanese OCR failed, trying default language...")
 
-                text = pytesseract.image_to_string(image, config=custom_config)
+                text = run_ocr('eng')
+
+            self.last_ocr_seconds = time.perf_counter() - start
 
            
 
@@ -78,15 +296,211 @@ class PropertySQLGenerator:
 
         except FileNotFoundError:
 
-            print(f"Error: Image file '{image_path}' not found.")
+            raise OCRError(f"Image file '{image_path}' not found.")
+
+        except Exception as e:
+
+            raise OCRError(f"Error processing image: {str(e)}")
+
+   
+
+    def load_image(self, image_path: str) -> Tuple['Image.Image', Optional[TextScale]]:
+
+        """
+
+        Decode a screenshot, rescaled so its text is about text_height pixels
 
-            sys.exit(1)
+        tall (see text_scale). Returns the image and how it was rescaled (None
+
+        when normalization is off); concurrent async loads each get their own.
+
+        """
+
+        if self.text_height is not None:
+
+            from text_scale import open_normalized
+
+            return open_normalized(image_path, self.text_height)
+
+        # PIL is imported here so parse-only use starts quickly
+
+        from PIL import Image
+
+        image = Image.open(image_path)
+
+        image.load()
+
+        return image, None
+
+   
+
+    async def extract_text_from_image_async(self, image_path: str, tesseract) -> str:
+
+        """
+
+        Async counterpart of extract_text_from_image for event-loop callers.
+
+       
+
+        Tesseract runs through `tesseract` (an async_ocr.AsyncTesseract)
+
+        rather than the OCR backend, with the image or its regions piped to
+
+        stdin and all regions OCR'd concurrently up to its process cap.
+
+        Loading, region detection and encoding run in worker threads.
+
+        Cancellation and timeouts propagate; only OCR errors fall back to eng.
+
+        """
+
+        import asyncio
+
+        from async_ocr import encode_image, gather_all
+
+        custom_config = r'--oem 3 --psm 6'
+
+        try:
+
+            image_hash = await asyncio.to_thread(hash_file, image_path) if self.ocr_cache else None
+
+           
+
+            def prepare():
+
+                regions, scaled = [], None
+
+                if self.detect_regions or self.text_height is not None:
+
+                    with self.tracer.span('load', path=image_path):
+
+                        image, scaled = self.load_image(image_path)
+
+                    with self.tracer.span('detect_regions'):
+
+                        regions = self.find_text_regions(image)
+
+                if not regions:
+
+                    if scaled is not None and scaled.scale != 1.0:
+
+                        return scaled, [('original', encode_image(image))]
+
+                    # The file goes to tesseract as is, without decoding it here
+
+                    with open(image_path, 'rb') as f:
+
+                        return scaled, [('original', f.read())]
+
+                from text_regions import crop_region, region_key
+
+                return scaled, [(region_key('original', region), encode_image(crop_region(image, region)))
+
+                                for region in regions]
+
+           
+
+            scaled, targets = await asyncio.to_thread(prepare)
+
+            image_hash = scaled_image_hash(image_hash, scaled)
+
+           
+
+            async def ocr_target(lang, variant, image_bytes):
+
+                key = None
+
+                if self.ocr_cache is not None:
+
+                    key = self.ocr_cache.make_key(image_hash, variant, lang, custom_config, tesseract.name)
+
+                    text = await asyncio.to_thread(self.ocr_cache.get, key)
+
+                    if text is not None:
+
+                        return text
+
+                with self.tracer.span('ocr', 'ocr', variant=variant, lang=lang, config=custom_config):
+
+                    text = await tesseract.run(image_bytes, lang, custom_config)
+
+                if key is not None:
+
+                    await asyncio.to_thread(self.ocr_cache.put, key, text)
+
+                return text
+
+           
+
+            async def run_ocr(lang):
+
+                texts = await gather_all(*(ocr_target(lang, variant, image_bytes)
+
+                                           for variant, image_bytes in targets))
+
+                return '\n'.join(texts)
+
+           
+
+            # Try Japanese first, then fallback to default ('eng', as in the sync path)
+
+            try:
+
+                return await run_ocr('jpn')
+
+            except asyncio.TimeoutError:
+
+                raise
+
+            except Exception:
+
+                self.log("Warning: Japanese OCR failed, trying default language...")
+
+                return await run_ocr('eng')
+
+           
+
+        except asyncio.TimeoutError:
+
+            raise
+
+        except FileNotFoundError:
+
+            raise OCRError(f"Image file '{image_path}' not found.")
 
         except Exception as e:
 
-            print(f"Error processing image: {str(e)}")
+            raise OCRError(f"Error processing image: {str(e)}")
+
+   
+
+    def find_text_regions(self, image) -> list:
+
+        """
+
+        Text blocks to crop before OCR, or an empty list to OCR the whole image
+
+        """
+
+        if not self.detect_regions:
+
+            return []
+
+        try:
 
-            sys.exit(1)
+            from preprocessing import PreprocessingGraph
+
+            from text_regions import select_regions
+
+        except ImportError:
+
+            # Text-region detection needs OpenCV; without it the whole image is OCR'd
+
+            return []
+
+        regions, _ = select_regions(PreprocessingGraph(image, self.tracer).get('gray'))
+
+        return regions
 
    
 
@@ -106,71 +520,73 @@ class PropertySQLGenerator:
 
        
 
-        # Common Japanese property listing fields to look for
+        # Common Japanese property listing fields to look for:
 
-        field_patterns = {
+        # field name -> (labels, stop tokens the value is cut before)
 
-            '所在地': r'所在地[：:\s]*(.+?)(?=\n|$)',
+        field_specs = {
 
-            '価格': r'価格[：:\s]*(.+?)(?=\n|万円)',
+            '所在地': (['所在地'], []),
 
-            '交通': r'交通[：:\s]*(.+?)(?=\n|駅)',
+            '価格': (['価格'], ['万円']),
 
-            '修繕積立金': r'修繕積立金[：:\s]*(.+?)(?=\n|円)',
+            '交通': (['交通'], ['駅']),
 
-            'その他費用': r'その他費用[：:\s]*(.+?)(?=\n|$)',
+            '修繕積立金': (['修繕積立金'], ['円']),
 
-            '間取り': r'間取り[：:\s]*(.+?)(?=\n|$)',
+            'その他費用': (['その他費用'], []),
 
-            '専有面積': r'専有面積[：:\s]*(.+?)(?=\n|㎡|m)',
+            '間取り': (['間取り'], []),
 
-            '築年月': r'築年月[：:\s]*(.+?)(?=\n|築)',
+            '専有面積': (['専有面積'], ['㎡', 'm']),
 
-            '階数': r'階数[／/]?構造[：:\s]*(.+?)(?=\n|階)',
+            '築年月': (['築年月'], ['築']),
 
-            '向き': r'向き[：:\s]*(.+?)(?=\n|$)',
+            '階数': (['階数／構造', '階数/構造', '階数構造'], ['階']),
 
-            'バルコニー': r'バルコニー[：:\s]*(.+?)(?=\n|㎡|m)',
+            '向き': (['向き'], []),
 
-            '現況': r'現況[：:\s]*(.+?)(?=\n|$)',
+            'バルコニー': (['バルコニー', 'バルコニー面積'], ['㎡', 'm']),
 
-            '駐車場': r'駐車場[：:\s]*(.+?)(?=\n|$)',
+            '現況': (['現況'], []),
 
-            '建物構造': r'建物構造[：:\s]*(.+?)(?=\n|造)',
+            '駐車場': (['駐車場'], []),
 
-            '総戸数': r'総戸数[：:\s]*(.+?)(?=\n|戸)',
+            '建物構造': (['建物構造'], ['造']),
 
-            '管理会社': r'管理会社[：:\s]*(.+?)(?=\n|$)',
+            '総戸数': (['総戸数'], ['戸']),
 
-            '管理形態': r'管理形態[：:\s]*(.+?)(?=\n|$)',
+            '管理会社': (['管理会社'], []),
 
-            '土地権利': r'土地権利[：:\s]*(.+?)(?=\n|$)',
+            '管理形態': (['管理形態'], []),
 
-            '取引態様': r'取引態様[：:\s]*(.+?)(?=\n|$)',
+            '土地権利': (['土地権利'], []),
 
-            '更新日': r'更新日[：:\s]*(.+?)(?=\n|日)',
+            '取引態様': (['取引態様'], []),
 
-            '次回更新予定': r'次回更新予定[：:\s]*(.+?)(?=\n|日)',
+            '更新日': (['更新日'], ['日']),
 
-            '物件番号': r'物件番号[：:\s]*(.+?)(?=\n|$)'
+            '次回更新予定': (['次回更新予定'], ['日']),
+
+            '物件番号': (['物件番号'], [])
 
         }
 
        
 
-        # Try to extract each field using regex patterns
+        # Find every label in one pass; each value runs to the next label or line end
 
-        full_text = ' '.join(lines)
+        scan = scan_labels(ocr_text)
 
        
 
-        for field_name, pattern in field_patterns.items():
+        for field_name, (labels, stop_tokens) in field_specs.items():
 
-            match = re.search(pattern, full_text, re.IGNORECASE | re.MULTILINE)
+            value = scan.first(labels, stop_tokens)
 
-            if match:
+            if value:
 
-                data[field_name] = match.group(1).strip()
+                data[field_name] = value
 
        
 
@@ -244,14 +660,26 @@ class PropertySQLGenerator:
 
    
 
-    def parse_property_data(self, data: Dict[str, str]) -> Dict[str, Any]:
+    def parse_property_data(self, data: Dict[str, str],
+
+                            numbers: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
 
         """
 
         Parse property data from the OCR results into structured format
 
+       
+
+        `numbers` holds the NUMERIC_FIELDS values when they were already
+
+        parsed as columns by parse_property_batch
+
         """
 
+        if numbers is None:
+
+            numbers = {key: getattr(self, parser)(data.get(label, '')) for label, key, parser in NUMERIC_FIELDS}
+
         parsed = {}
 
        
@@ -260,25 +688,25 @@ class PropertySQLGenerator:
 
         parsed['address'] = data.get('所在地', '').strip()
 
-        parsed['price'] = self.parse_price(data.get('価格', ''))
+        parsed['price'] = numbers['price']
 
         parsed['layout'] = data.get('間取り', '').strip()
 
-        parsed['area'] = self.parse_area(data.get('専有面積', ''))
+        parsed['area'] = numbers['area']
 
-        parsed['year_built'] = self.parse_year(data.get('築年月', ''))
+        parsed['year_built'] = numbers['year_built']
 
         parsed['floor_info'] = data.get('階数', '').strip()
 
         parsed['direction'] = data.get('向き', '').strip()
 
-        parsed['balcony_area'] = self.parse_balcony_area(data.get('バルコニー', ''))
+        parsed['balcony_area'] = numbers['balcony_area']
 
         parsed['current_situation'] = data.get('現況', '').strip()
 
         parsed['structure'] = data.get('建物構造', '').strip()
 
-        parsed['total_units'] = self.parse_units(data.get('総戸数', ''))
+        parsed['total_units'] = numbers['total_units']
 
         parsed['management_company'] = data.get('管理会社', '').strip()
 
@@ -288,9 +716,9 @@ class PropertySQLGenerator:
 
         parsed['transaction_mode'] = data.get('取引態様', '').strip()
 
-        parsed['information_release_date'] = self.parse_date(data.get('更新日', ''))
+        parsed['information_release_date'] = numbers['information_release_date']
 
-        parsed['next_scheduled_update_date'] = self.parse_date(data.get('次回更新予定', ''))
+        parsed['next_scheduled_update_date'] = numbers['next_scheduled_update_date']
 
         parsed['property_number'] = data.get('物件番号', '').strip()
 
@@ -304,7 +732,7 @@ class PropertySQLGenerator:
 
         # Management fees and costs
 
-        parsed['repair_reserve_fund'] = self.parse_price(data.get('修繕積立金', ''))
+        parsed['repair_reserve_fund'] = numbers['repair_reserve_fund']
 
         parsed['other_fees'] = data.get('その他費用', '').strip()
 
@@ -322,21 +750,41 @@ class PropertySQLGenerator:
 
    
 
-    def parse_price(self, price_str: str) -> Optional[int]:
+    def parse_property_batch(self, records: List[Dict[str, str]]) -> List[Dict[str, Any]]:
 
-        """Parse price string to integer (remove 万円, convert to yen)"""
+        """
 
-        if not price_str or price_str == '-':
+        parse_property_data for many records at once, with the numeric and
 
-            return None
+        date fields parsed column-wise; the results are identical
 
-       
+        """
 
-        # Remove commas and extract number
+        from columnar_parsing import parse_columns, column_values
 
-        price_str = re.sub(r'[,，]', '', price_str)
+        columns = {key: column_values(column) for key, column in parse_columns(records, NUMERIC_FIELDS).items()}
 
-        match = re.search(r'(\d+(?:\.\d+)?)', price_str)
+        return [self.parse_property_data(data, {key: values[index] for key, values in columns.items()})
+
+                for index, data in enumerate(records)]
+
+   
+
+    def parse_price(self, price_str: str) -> Optional[int]:
+
+        """Parse price string to integer (remove 万円, convert to yen)"""
+
+        if not price_str or price_str == '-':
+
+            return None
+
+       
+
+        # Remove commas and extract number
+
+        price_str = re.sub(r'[,，]', '', price_str)
+
+        match = re.search(r'(\d+(?:\.\d+)?)', price_str)
 
         if match:
 
@@ -470,607 +918,1363 @@ class PropertySQLGenerator:
 
     def parse_address_hierarchy(self, address: str) -> Dict[str, Optional[str]]:
 
-        """Parse Japanese address into hierarchical components"""
+        """
+
+        Parse Japanese address into hierarchical components (region, prefecture,
+
+        municipality, ward/town and postal code; see address_resolver)
+
+        """
+
+        return address_hierarchy(address)
+
+   
+
+    def build_row(self, property_data: Dict[str, Any]) -> PropertyRecord:
+
+        """
+
+        Map parsed property data to raw values for every properties column,
+
+        as a PropertyRecord whose fields are the SQL template placeholder names
+
+        """
+
+        # Calculate price per square meter if both price and area are available
+
+        price_per_sqm = None
+
+        if property_data.get('price') and property_data.get('area'):
+
+            price_per_sqm = int(property_data['price'] / property_data['area'])
+
+       
+
+        return PropertyRecord(
+
+            title='物件名未指定',  # Title not usually in screenshot
+
+            price=property_data.get('price'),
+
+            price_per_sqm=price_per_sqm,
+
+            address=property_data.get('address'),
+
+            layout=property_data.get('layout'),
+
+            area=property_data.get('area'),
+
+            floor_info=property_data.get('floor_info'),
+
+            structure=property_data.get('structure'),
+
+            management_fee=None,
+
+            area_of_use=None,
+
+            transportation=property_data.get('transportation'),
+
+            walk_distance=None,
+
+            location=property_data.get('location'),  # PostGIS point (GeoPoint)
+
+            property_type='中古マンション',
+
+            year_built=property_data.get('year_built'),
+
+            balcony_area=property_data.get('balcony_area'),
+
+            total_units=property_data.get('total_units'),
+
+            repair_reserve_fund=property_data.get('repair_reserve_fund'),
+
+            land_lease_fee=None,
 
-        if not address:
+            right_fee=None,
 
-            return {
+            deposit_guarantee=None,
 
-                'zipcode': None,
+            maintenance_fees=None,
 
-                'area_level_1': None,
+            other_fees=property_data.get('other_fees'),
 
-                'area_level_2': None,
+            bicycle_parking=None,
 
-                'area_level_3': None,
+            bike_storage=None,
 
-                'area_level_4': None
+            site_area=None,
 
-            }
+            pets=None,
+
+            land_rights=property_data.get('land_rights'),
+
+            management_form=property_data.get('management_form'),
+
+            land_law_notification=None,
+
+            current_situation=property_data.get('current_situation'),
+
+            extradition_possible_date=None,
+
+            transaction_mode=property_data.get('transaction_mode'),
+
+            property_number=property_data.get('property_number'),
+
+            information_release_date=property_data.get('information_release_date'),
+
+            next_scheduled_update_date=property_data.get('next_scheduled_update_date'),
+
+            remarks=None,
+
+            evaluation_certificate=None,
+
+            parking=None,
+
+            kitchen=None,
+
+            bath_toilet=None,
+
+            facilities_services=None,
+
+            others=None,
+
+            images=[],  # Empty array
+
+            zipcode=property_data.get('zipcode'),
+
+            area_level_1=property_data.get('area_level_1'),
+
+            area_level_2=property_data.get('area_level_2'),
+
+            area_level_3=property_data.get('area_level_3'),
+
+            area_level_4=property_data.get('area_level_4'),
+
+            status='for sale',
+
+            direction=property_data.get('direction'),
+
+            urban_planning=None,
+
+            condominium_sales_company=None,
+
+            construction_company=None,
+
+            design_company=None,
+
+            management_company=property_data.get('management_company'),
+
+            building_area=None,
+
+            land_area=None,
+
+            access_situation=None,
+
+            building_coverage_ratio=None,
+
+            floor_area_ratio=None,
+
+            estimated_rent=None,
+
+            assumed_yield=None,
+
+            current_rent=None,
+
+            current_yield=None,
+
+            rental_status=None,
+
+            number_of_units_in_building=None,
+
+            exclusive_area_of_each_residence=None
+
+        )
+
+   
+
+    def generate_sql_insert(self, property_data: Dict[str, Any]) -> str:
+
+        """Generate SQL INSERT statement from parsed property data"""
 
        
 
-        parts = {
+        sql_template = """
+
+INSERT INTO properties (
+
+    title, price, pricePerSquareMeter, address, layout, area, floorInfo,
+
+    structure, managementFee, areaOfUse, transportation, walkDistance, location, propertyType,
+
+    yearBuilt, balconyArea, totalUnits, repairReserveFund, landLeaseFee,
+
+    rightFee, depositGuarantee, maintenanceFees, otherFees, bicycleParking,
+
+    bikeStorage, siteArea, pets, landRights, managementForm, landLawNotification,
+
+    currentSituation, extraditionPossibleDate, transactionMode, propertyNumber,
+
+    informationReleaseDate, nextScheduledUpdateDate, remarks, evaluationCertificate,
+
+    parking, kitchen, bathToilet, facilitiesServices, others, images,
+
+    zipcode, area_level_1, area_level_2, area_level_3, area_level_4, status,
+
+    direction, urbanPlanning, condominiumSalesCompany, constructionCompany,
+
+    designCompany, managementCompany, buildingArea, landArea, accessSituation,
+
+    buildingCoverageRatio, floorAreaRatio, estimatedRent, assumedYield,
+
+    currentRent, currentYield, rentalStatus, numberOfUnitsInTheBuilding,
+
+    exclusiveAreaOfEachResidence         
+
+)
+
+VALUES (
+
+    {title},
+
+    {price},
+
+    {price_per_sqm},
+
+    {address},
+
+    {layout},
+
+    {area},
+
+    {floor_info},
+
+    {structure},
+
+    {management_fee},
+
+    {area_of_use},
+
+    {transportation},
+
+    {walk_distance},
+
+    {location},
+
+    {property_type},
+
+    {year_built},
+
+    {balcony_area},
+
+    {total_units},
+
+    {repair_reserve_fund},
+
+    {land_lease_fee},
+
+    {right_fee},
+
+    {deposit_guarantee},
+
+    {maintenance_fees},
+
+    {other_fees},
+
+    {bicycle_parking},
+
+    {bike_storage},
+
+    {site_area},
+
+    {pets},
+
+    {land_rights},
+
+    {management_form},
+
+    {land_law_notification},
+
+    {current_situation},
+
+    {extradition_possible_date},
+
+    {transaction_mode},
+
+    {property_number},
+
+    {information_release_date},
+
+    {next_scheduled_update_date},
+
+    {remarks},
+
+    {evaluation_certificate},
+
+    {parking},
+
+    {kitchen},
+
+    {bath_toilet},
+
+    {facilities_services},
+
+    {others},
+
+    {images},
+
+    {zipcode},
+
+    {area_level_1},
+
+    {area_level_2},
+
+    {area_level_3},
+
+    {area_level_4},
+
+    {status},
+
+    {direction},
+
+    {urban_planning},
+
+    {condominium_sales_company},
+
+    {construction_company},
+
+    {design_company},
+
+    {management_company},
+
+    {building_area},
+
+    {land_area},
+
+    {access_situation},
+
+    {building_coverage_ratio},
+
+    {floor_area_ratio},
+
+    {estimated_rent},
+
+    {assumed_yield},
+
+    {current_rent},
+
+    {current_yield},
+
+    {rental_status},
+
+    {number_of_units_in_building},
+
+    {exclusive_area_of_each_residence}
+
+);"""
+
+ 
+
+        # Format values safely for SQL
+
+        def format_value(value):
+
+            if value is None:
+
+                return 'NULL'
+
+            elif isinstance(value, str):
+
+                # Escape single quotes and wrap in quotes
+
+                escaped = value.replace("'", "''")
+
+                return f"'{escaped}'"
+
+            elif isinstance(value, (int, float)):
+
+                return str(value)
+
+            elif isinstance(value, GeoPoint):
+
+                return f"ST_SetSRID(ST_MakePoint({value.lng}, {value.lat}), 4326)"
+
+            elif isinstance(value, list):
+
+                if not value:
+
+                    return "ARRAY[]::TEXT[]"
+
+                return "ARRAY[" + ", ".join(format_value(item) for item in value) + "]"
+
+            else:
+
+                return f"'{str(value)}'"
+
+       
+
+        record = self.build_row(property_data)
+
+        values = {key: format_value(value) for key, value in zip(record._fields, record)}
+
+       
+
+        return sql_template.format(**values)
+
+   
+
+    def render_record(self, property_data: Dict[str, Any]) -> Union[str, PropertyRecord]:
+
+        """Render parsed property data in the configured output format (a PropertyRecord for 'row')"""
+
+        if self.output_format == 'sql':
+
+            return self.generate_sql_insert(property_data)
+
+        if self.output_format == 'row':
+
+            return self.build_row(property_data)
+
+        return render_row(self.build_row(property_data), self.output_format)
+
+   
+
+    def process_screenshot(self, image_path: str, verbose: bool = False) -> Union[str, PropertyRecord]:
+
+        """
+
+        Main method to process screenshot and generate SQL
+
+        """
+
+        if verbose:
+
+            self.log(f"Processing screenshot: {image_path}")
+
+       
+
+        # Extract text using OCR
+
+        if verbose:
+
+            self.log("Extracting text from image...")
+
+        self.last_ocr_text = None
+
+        ocr_text = self.extract_text_from_image(image_path)
+
+        self.last_ocr_text = ocr_text
+
+       
+
+        return self.process_ocr_text(ocr_text, verbose)
+
+   
+
+    def process_ocr_text(self, ocr_text: str, verbose: bool = False) -> Union[str, PropertyRecord]:
+
+        """
+
+        Parse already extracted OCR text and render it in the output format
+
+        """
+
+        if verbose:
+
+            self.log("OCR Text extracted:")
+
+            self.log("-" * 40)
+
+            self.log(ocr_text)
+
+            self.log("-" * 40)
+
+       
+
+        # Parse OCR text into structured data
+
+        if verbose:
+
+            self.log("Parsing structured data...")
+
+        with self.tracer.span('field_parse'):
+
+            structured_data = self.parse_ocr_text_to_dict(ocr_text)
+
+       
+
+        if verbose:
+
+            self.log("Structured data:")
+
+            for key, value in structured_data.items():
+
+                self.log(f"  {key}: {value}")
+
+            self.log("-" * 40)
+
+       
+
+        # Parse into final format
+
+        with self.tracer.span('value_parse'):
+
+            parsed_data = self.parse_property_data(structured_data)
+
+       
+
+        if self.gazetteer is not None:
+
+            with self.tracer.span('geocode'):
+
+                parsed_data['location'] = self.gazetteer.geocode(parsed_data['address'])
+
+       
+
+        # Generate SQL
+
+        if verbose:
+
+            self.log(f"Generating {self.output_format} output...")
+
+        with self.tracer.span('render'):
+
+            return self.render_record(parsed_data)
+
+   
+
+    def process_ocr_texts(self, ocr_texts: List[str]) -> List[Union[str, PropertyRecord]]:
+
+        """
+
+        process_ocr_text for many texts at once, with the values parsed
+
+        column-wise by parse_property_batch
+
+        """
+
+        with self.tracer.span('field_parse'):
+
+            structured = [self.parse_ocr_text_to_dict(ocr_text) for ocr_text in ocr_texts]
+
+       
+
+        with self.tracer.span('value_parse'):
+
+            parsed = self.parse_property_batch(structured)
+
+       
+
+        if self.gazetteer is not None:
+
+            with self.tracer.span('geocode'):
+
+                for parsed_data in parsed:
+
+                    parsed_data['location'] = self.gazetteer.geocode(parsed_data['address'])
+
+       
+
+        with self.tracer.span('render'):
+
+            return [self.render_record(parsed_data) for parsed_data in parsed]
+
+   
+
+    def iter_screenshots(self, image_paths: Iterable[str], verbose: bool = False) -> Iterator[Dict[str, Any]]:
+
+        """
+
+        Lazily run OCR, field parsing, value parsing and rendering per image.
+
+       
+
+        Yields {'path', 'sql', 'error'} for each image as soon as it is done;
+
+        a failing image yields its error instead of stopping the stream.
+
+        """
+
+        for image_path in image_paths:
+
+            result = {'path': image_path, 'sql': None, 'error': None}
+
+            try:
+
+                result['sql'] = self.process_screenshot(image_path, verbose)
+
+            except Exception as e:
+
+                result['error'] = f"{type(e).__name__}: {e}"
+
+            yield result
+
+   
+
+    async def aiter_screenshots(self, image_paths: Iterable[str], tesseract=None,
+
+                                timeout: Optional[float] = None,
+
+                                verbose: bool = False) -> AsyncIterator[Dict[str, Any]]:
+
+        """
+
+        Async counterpart of iter_screenshots, for `async for`.
+
+       
+
+        Yields {'path', 'sql', 'error', 'ocr_text'} for each image in the
+
+        order they complete. Tesseract runs through `tesseract` (a default
+
+        async_ocr.AsyncTesseract if None), and only a few images per allowed
+
+        process are in flight, so long path lists are read lazily. An image
+
+        taking longer than `timeout` seconds yields a timeout error. Closing
+
+        the iterator (use contextlib.aclosing to stop early) or cancelling
+
+        its consumer cancels the images in flight and kills their tesseract
+
+        processes.
+
+        """
+
+        import asyncio
+
+        from itertools import islice
+
+        from async_ocr import AsyncTesseract
+
+        tesseract = tesseract or AsyncTesseract()
+
+       
+
+        async def process(image_path):
+
+            result = {'path': image_path, 'sql': None, 'error': None, 'ocr_text': None}
+
+            try:
+
+                result['ocr_text'] = await asyncio.wait_for(
+
+                    self.extract_text_from_image_async(image_path, tesseract), timeout)
+
+                result['sql'] = self.process_ocr_text(result['ocr_text'], verbose)
+
+            except asyncio.TimeoutError as e:
+
+                result['error'] = f"TimeoutError: {str(e) or f'OCR took longer than {timeout}s'}"
+
+            except Exception as e:
+
+                result['error'] = f"{type(e).__name__}: {e}"
+
+            return result
+
+       
+
+        paths = iter(image_paths)
+
+        in_flight = 2 * tesseract.max_processes
+
+        pending = set()
+
+        try:
+
+            while True:
+
+                pending.update(asyncio.ensure_future(process(path))
+
+                               for path in islice(paths, in_flight - len(pending)))
+
+                if not pending:
+
+                    return
+
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+                for task in done:
+
+                    yield task.result()
+
+        finally:
+
+            for task in pending:
+
+                task.cancel()
+
+            if pending:
+
+                await asyncio.gather(*pending, return_exceptions=True)
+
+ 
+
+def main():
+
+    """
+
+    Main function with command line argument parsing
+
+    """
+
+    # `property_sql_generator.py watch DIR` runs the watch-folder daemon
+
+    if sys.argv[1:2] == ['watch']:
+
+        from watch_folder import main as watch_main
+
+        return watch_main(sys.argv[2:])
+
+   
+
+    parser = argparse.ArgumentParser(
+
+        description='Generate SQL INSERT statements from Japanese property listing screenshots',
+
+        epilog='Run "%(prog)s watch --help" to process screenshots as they are dropped into a folder.'
+
+    )
+
+    parser.add_argument(
+
+        'screenshots',
+
+        nargs='*',
+
+        help='Screenshot image files, directories or glob patterns'
+
+    )
+
+    parser.add_argument(
+
+        '--file-list',
+
+        help='Text file listing screenshot paths, one per line'
+
+    )
+
+    parser.add_argument(
+
+        '-r', '--recursive',
+
+        action='store_true',
+
+        help='Search directories recursively for images'
+
+    )
+
+    parser.add_argument(
+
+        '-j', '--jobs',
+
+        type=int,
+
+        default=os.cpu_count() or 1,
+
+        help='Number of worker processes for batch runs (default: CPU count)'
+
+    )
+
+    parser.add_argument(
+
+        '-v', '--verbose',
+
+        action='store_true',
+
+        help='Enable verbose output showing OCR results and parsing steps'
+
+    )
 
-            'zipcode': None,  # Not available in this format
+    parser.add_argument(
 
-            'area_level_1': '関東地方',  # Default region for this area
+        '-o', '--output',
 
-            'area_level_2': None,  # Prefecture
+        help='Output file for the SQL statement (default: print to stdout)'
 
-            'area_level_3': None,  # City
+    )
 
-            'area_level_4': None   # District/Area
+    add_output_arguments(parser)
 
-        }
+    add_generator_arguments(parser)
 
-       
+    add_manifest_arguments(parser)
 
-        # Extract prefecture (県)
+    add_trace_arguments(parser)
 
-        if '県' in address:
+   
 
-            pref_match = re.search(r'([^県]+県)', address)
+    args = parser.parse_args()
 
-            if pref_match:
+   
 
-                parts['area_level_2'] = pref_match.group(1)
+    inputs = list(args.screenshots)
 
-       
+    if args.file_list:
 
-        # Extract city (市)
+        inputs.extend(read_file_list(args.file_list))
 
-        if '市' in address:
+    if not inputs:
 
-            city_match = re.search(r'([^市]+市)', address)
+        parser.error('at least one screenshot, directory or --file-list is required')
 
-            if city_match:
+   
 
-                parts['area_level_3'] = city_match.group(1)
+    # A single plain image path keeps the original one-shot behaviour
 
-       
+    if len(inputs) == 1 and os.path.isfile(inputs[0]) and not (args.load or args.manifest):
 
-        # Extract ward/district (区)
+        run, run_args = run_single, (inputs[0], args)
 
-        if '区' in address:
+    else:
 
-            ward_match = re.search(r'([^区]+区)', address)
+        run, run_args = run_batch, (inputs, args)
 
-            if ward_match:
+    try:
 
-                parts['area_level_4'] = ward_match.group(1)
+        if args.profile:
 
-       
+            run_profiled(run, args.profile, *run_args)
 
-        return parts
+        else:
 
-   
+            run(*run_args)
 
-    def generate_sql_insert(self, property_data: Dict[str, Any]) -> str:
+    except BrokenPipeError:
 
-        """Generate SQL INSERT statement from parsed property data"""
+        # The reader of stdout went away (e.g. piped into `head`). Python
 
-       
+        # flushes stdout again on exit, so point it at devnull first
 
-        sql_template = """
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
 
-INSERT INTO properties (
+        sys.exit(1)
 
-    title, price, pricePerSquareMeter, address, layout, area, floorInfo,
+ 
 
-    structure, managementFee, areaOfUse, transportation, walkDistance, location, propertyType,
+def add_output_arguments(parser):
 
-    yearBuilt, balconyArea, totalUnits, repairReserveFund, landLeaseFee,
+    """Register the output format and --load database options on an argparse parser"""
 
-    rightFee, depositGuarantee, maintenanceFees, otherFees, bicycleParking,
+    parser.add_argument(
 
-    bikeStorage, siteArea, pets, landRights, managementForm, landLawNotification,
+        '--format',
 
-    currentSituation, extraditionPossibleDate, transactionMode, propertyNumber,
+        choices=OUTPUT_FORMATS,
 
-    informationReleaseDate, nextScheduledUpdateDate, remarks, evaluationCertificate,
+        default='sql',
 
-    parking, kitchen, bathToilet, facilitiesServices, others, images,
+        help='Output format: INSERT statements, COPY FROM STDIN data, or CSV for \\copy (default: sql)'
 
-    zipcode, area_level_1, area_level_2, area_level_3, area_level_4, status,
+    )
 
-    direction, urbanPlanning, condominiumSalesCompany, constructionCompany,
+    parser.add_argument(
 
-    designCompany, managementCompany, buildingArea, landArea, accessSituation,
+        '--load',
 
-    buildingCoverageRatio, floorAreaRatio, estimatedRent, assumedYield,
+        action='store_true',
 
-    currentRent, currentYield, rentalStatus, numberOfUnitsInTheBuilding,
+        help='Insert parsed records directly into the properties table instead of writing SQL'
 
-    exclusiveAreaOfEachResidence         
+    )
 
-)
+    parser.add_argument(
 
-VALUES (
+        '--dsn',
 
-    {title},
+        help='Database connection string for --load (default: DB_* environment variables; '
 
-    {price},
+             'sqlite:///path.db for a SQLite stand-in)'
 
-    {price_per_sqm},
+    )
 
-    {address},
+    parser.add_argument(
 
-    {layout},
+        '--batch-size',
 
-    {area},
+        type=int,
 
-    {floor_info},
+        default=DEFAULT_BATCH_SIZE,
 
-    {structure},
+        help='Rows per insert batch and commit for --load (default: %(default)s)'
 
-    {management_fee},
+    )
 
-    {area_of_use},
+    parser.add_argument(
 
-    {transportation},
+        '--db-pool-size',
 
-    {walk_distance},
+        type=int,
 
-    {location},
+        default=DEFAULT_POOL_SIZE,
 
-    {property_type},
+        help='Database connections used for --load (default: %(default)s)'
 
-    {year_built},
+    )
 
-    {balcony_area},
+    parser.add_argument(
 
-    {total_units},
+        '--load-method',
 
-    {repair_reserve_fund},
+        choices=LOAD_METHODS,
 
-    {land_lease_fee},
+        default='values',
 
-    {right_fee},
+        help='Batch insert with bound parameters (values) or COPY (default: values)'
 
-    {deposit_guarantee},
+    )
 
-    {maintenance_fees},
+ 
 
-    {other_fees},
+def add_generator_arguments(parser):
 
-    {bicycle_parking},
+    """Register the OCR and parsing options that configure PropertySQLGenerator"""
 
-    {bike_storage},
+    parser.add_argument(
 
-    {site_area},
+        '--regions',
 
-    {pets},
+        action='store_true',
 
-    {land_rights},
+        help='OCR only the detected text regions instead of the whole screenshot'
 
-    {management_form},
+    )
 
-    {land_law_notification},
+    parser.add_argument(
 
-    {current_situation},
+        '--ocr-workers',
 
-    {extradition_possible_date},
+        type=int,
 
-    {transaction_mode},
+        default=1,
 
-    {property_number},
+        help='Text regions of one image to OCR in parallel (default: %(default)s)'
 
-    {information_release_date},
+    )
 
-    {next_scheduled_update_date},
+    add_cache_arguments(parser)
 
-    {remarks},
+    add_backend_arguments(parser)
 
-    {evaluation_certificate},
+    add_geocoder_arguments(parser)
 
-    {parking},
+    add_normalize_arguments(parser)
 
-    {kitchen},
+ 
 
-    {bath_toilet},
+def generator_kwargs_from_args(args, output_format: str, tracer: Optional[Tracer] = None,
 
-    {facilities_services},
+                               gazetteer: Optional[Gazetteer] = None) -> Dict[str, Any]:
 
-    {others},
+    """PropertySQLGenerator keyword arguments for the options of add_generator_arguments()"""
 
-    {images},
+    return {'ocr_cache': cache_from_args(args),
 
-    {zipcode},
+            'output_format': output_format,
 
-    {area_level_1},
+            'detect_regions': args.regions,
 
-    {area_level_2},
+            'ocr_workers': args.ocr_workers,
 
-    {area_level_3},
+            'ocr_backend': backend_from_args(args),
 
-    {area_level_4},
+            'tracer': tracer,
 
-    {status},
+            'quiet': args.quiet,
 
-    {direction},
+            'gazetteer': gazetteer,
 
-    {urban_planning},
+            'text_height': text_height_from_args(args)}
 
-    {condominium_sales_company},
+ 
 
-    {construction_company},
+def run_single(image_path: str, args):
 
-    {design_company},
+    """Process one screenshot and print or write its SQL"""
 
-    {management_company},
+    generator = None
 
-    {building_area},
+    try:
 
-    {land_area},
+        generator = PropertySQLGenerator(**generator_kwargs_from_args(args, args.format, tracer_from_args(args),
 
-    {access_situation},
+                                                                      gazetteer_from_args(args)))
 
-    {building_coverage_ratio},
+        sql_result = generator.process_screenshot(image_path, args.verbose)
 
-    {floor_area_ratio},
+        if args.trace:
 
-    {estimated_rent},
+            generator.tracer.write(args.trace, args.trace_format)
 
-    {assumed_yield},
+        if args.verbose and generator.ocr_cache:
 
-    {current_rent},
+            stats = generator.ocr_cache.stats()
 
-    {current_yield},
+            generator.log(f"OCR cache: {stats['hits']} hits, {stats['misses']} misses")
 
-    {rental_status},
+        if args.verbose and generator.last_ocr_pixels:
 
-    {number_of_units_in_building},
+            generator.log(format_pixel_report(*generator.last_ocr_pixels))
 
-    {exclusive_area_of_each_residence}
+        if args.verbose and generator.last_text_scale:
 
-);"""
+            generator.log(format_scale_report(generator.last_text_scale))
 
- 
+        if args.verbose and generator.last_ocr_seconds is not None:
 
-        # Format values safely for SQL
+            generator.log(f"OCR time: {generator.last_ocr_seconds * 1000:.0f} ms")
 
-        def format_value(value):
+       
 
-            if value is None:
+        if args.format != 'sql':
 
-                return 'NULL'
+            write_bulk_output(render_document([sql_result], args.format), args)
 
-            elif isinstance(value, str):
+        elif args.output:
 
-                # Escape single quotes and wrap in quotes
+            with open(args.output, 'w', encoding='utf-8') as f:
 
-                escaped = value.replace("'", "''")
+                f.write(sql_result)
 
-                return f"'{escaped}'"
+            generator.log(f"SQL statement written to: {args.output}")
 
-            elif isinstance(value, (int, float)):
+        elif args.quiet:
 
-                return str(value)
+            print(sql_result)
 
-            else:
+        else:
 
-                return f"'{str(value)}'"
+            print("Generated SQL INSERT statement:")
 
-       
+            print("=" * 50)
 
-        # Calculate price per square meter if both price and area are available
+            print(sql_result)
 
-        price_per_sqm = None
+           
 
-        if property_data.get('price') and property_data.get('area'):
+    except KeyboardInterrupt:
 
-            price_per_sqm = int(property_data['price'] / property_data['area'])
+        print("\nOperation cancelled by user.")
 
-       
+        sys.exit(1)
 
-        values = {
+    except Exception as e:
 
-            'title': format_value('物件名未指定'),  # Title not usually in screenshot
+        print(f"Error: {str(e)}")
 
-            'price': format_value(property_data.get('price')),
+        sys.exit(1)
 
-            'price_per_sqm': format_value(price_per_sqm),
+    finally:
 
-            'address': format_value(property_data.get('address')),
+        if generator is not None:
 
-            'layout': format_value(property_data.get('layout')),
+            generator.close()
 
-            'area': format_value(property_data.get('area')),
+ 
 
-            'floor_info': format_value(property_data.get('floor_info')),
+def run_batch(inputs: list, args):
 
-            'structure': format_value(property_data.get('structure')),
+    """Process many screenshots in parallel, streaming records to one combined output"""
 
-            'management_fee': format_value(None),
+    image_paths = collect_image_paths(inputs, recursive=args.recursive)
 
-            'area_of_use': format_value(None),
+    if not image_paths:
 
-            'transportation': format_value(property_data.get('transportation')),
+        print("Error: No images found.")
 
-            'walk_distance': format_value(None),
+        sys.exit(1)
 
-            'location': format_value('NULL'),  # PostGIS point would go here
+   
 
-            'property_type': format_value('中古マンション'),
+    # Progress and summary lines go to stderr; --quiet keeps only errors
 
-            'year_built': format_value(property_data.get('year_built')),
+    log = quiet_print if args.quiet else functools.partial(print, file=sys.stderr)
 
-            'balcony_area': format_value(property_data.get('balcony_area')),
+    tracer = tracer_from_args(args)
 
-            'total_units': format_value(property_data.get('total_units')),
+    log(f"Processing {len(image_paths)} images with {args.jobs} worker(s)...")
 
-            'repair_reserve_fund': format_value(property_data.get('repair_reserve_fund')),
+   
 
-            'land_lease_fee': format_value(None),
+    out = None
 
-            'right_fee': format_value(None),
+    try:
 
-            'deposit_guarantee': format_value(None),
+        if args.load:
 
-            'maintenance_fees': format_value(None),
+            output_format = 'row'
 
-            'other_fees': format_value(property_data.get('other_fees')),
+            writer = LoadWriter(PropertyLoader(args.dsn, batch_size=args.batch_size,
 
-            'bicycle_parking': format_value(None),
+                                               pool_size=args.db_pool_size, method=args.load_method))
 
-            'bike_storage': format_value(None),
+        else:
 
-            'site_area': format_value(None),
+            output_format = args.format
 
-            'pets': format_value(None),
+            out = open(args.output, 'w', encoding='utf-8') if args.output else sys.stdout
 
-            'land_rights': format_value(property_data.get('land_rights')),
+            writer = ResultWriter(out, args.format)
 
-            'management_form': format_value(property_data.get('management_form')),
+    except Exception as e:
 
-            'land_law_notification': format_value(None),
+        # e.g. psycopg2 missing, an unreachable database or an unwritable output file
 
-            'current_situation': format_value(property_data.get('current_situation')),
+        print(f"Error: {str(e)}")
 
-            'extradition_possible_date': format_value(None),
+        sys.exit(1)
 
-            'transaction_mode': format_value(property_data.get('transaction_mode')),
+   
 
-            'property_number': format_value(property_data.get('property_number')),
+    gazetteer = gazetteer_from_args(args)
 
-            'information_release_date': format_value(property_data.get('information_release_date')),
+    generator_kwargs = generator_kwargs_from_args(args, output_format, tracer, gazetteer)
 
-            'next_scheduled_update_date': format_value(property_data.get('next_scheduled_update_date')),
+   
 
-            'remarks': format_value(None),
+    def process(paths):
 
-            'evaluation_certificate': format_value(None),
+        return iter_batch(paths, PropertySQLGenerator, jobs=max(1, min(args.jobs, len(paths))),
 
-            'parking': format_value(None),
+                          verbose=args.verbose, generator_kwargs=generator_kwargs)
 
-            'kitchen': format_value(None),
+   
 
-            'bath_toilet': format_value(None),
+    manifest = manifest_from_args(args)
 
-            'facilities_services': format_value(None),
+    load_stats = None
 
-            'others': format_value(None),
+    try:
 
-            'images': format_value('ARRAY[]'),  # Empty array
+        if manifest is None:
 
-            'zipcode': format_value(property_data.get('zipcode')),
+            results = process(image_paths)
 
-            'area_level_1': format_value(property_data.get('area_level_1')),
+        else:
 
-            'area_level_2': format_value(property_data.get('area_level_2')),
+            # Stored OCR text is re-parsed in this process, in column-parsed chunks;
 
-            'area_level_3': format_value(property_data.get('area_level_3')),
+            # it is cheap next to OCR. It never runs OCR, so it borrows the workers' backend rather than opening one
 
-            'area_level_4': format_value(property_data.get('area_level_4')),
+            reparser = PropertySQLGenerator(output_format=output_format, quiet=True, gazetteer=gazetteer,
 
-            'status': format_value('for sale'),
+                                            ocr_backend=generator_kwargs['ocr_backend'])
 
-            'direction': format_value(property_data.get('direction')),
+            results = iter_incremental(image_paths, manifest, manifest_target(args, output_format),
 
-            'urban_planning': format_value(None),
+                                       ocr_version=ocr_pipeline_version(args),
 
-            'condominium_sales_company': format_value(None),
+                                       parser_version=parser_pipeline_version(gazetteer),
 
-            'construction_company': format_value(None),
+                                       process=process, reparse=reparser.process_ocr_text,
 
-            'design_company': format_value(None),
+                                       reparse_batch=reparser.process_ocr_texts,
 
-            'management_company': format_value(property_data.get('management_company')),
+                                       output_location=redact_dsn(args.dsn or default_dsn()) if args.load
 
-            'building_area': format_value(None),
+                                       else args.output,
 
-            'land_area': format_value(None),
+                                       replay=not args.load, force=args.reprocess)
 
-            'access_situation': format_value(None),
+        writer.write_all(results)
 
-            'building_coverage_ratio': format_value(None),
+    except KeyboardInterrupt:
 
-            'floor_area_ratio': format_value(None),
+        print(f"\nOperation cancelled by user after {len(writer.summaries)} images.", file=sys.stderr)
 
-            'estimated_rent': format_value(None),
+        sys.exit(1)
 
-            'assumed_yield': format_value(None),
+    finally:
 
-            'current_rent': format_value(None),
+        load_stats = writer.close()
 
-            'current_yield': format_value(None),
+        if out is not None and args.output:
 
-            'rental_status': format_value(None),
+            out.close()
 
-            'number_of_units_in_building': format_value(None),
+        if manifest is not None:
 
-            'exclusive_area_of_each_residence': format_value(None)
+            manifest.close()
 
-        }
+   
 
-       
+    results = writer.summaries
 
-        return sql_template.format(**values)
+    if args.trace:
 
-   
+        # Workers ship their spans back with each result
 
-    def process_screenshot(self, image_path: str, verbose: bool = False) -> str:
+        for result in results:
 
-        """
+            tracer.extend(result.pop('spans', []))
 
-        Main method to process screenshot and generate SQL
+        tracer.write(args.trace, args.trace_format)
 
-        """
+        log(f"Trace written to: {args.trace}")
 
-        if verbose:
+    if args.load:
 
-            print(f"Processing screenshot: {image_path}")
+        log(format_load_report(load_stats))
 
-       
+        load_errors = format_load_errors(writer.loader)
 
-        # Extract text using OCR
+        if load_errors:
 
-        if verbose:
+            print(load_errors, file=sys.stderr)
 
-            print("Extracting text from image...")
+    elif args.output:
 
-        ocr_text = self.extract_text_from_image(image_path)
+        if args.format == 'csv':
 
-       
+            log(f"CSV written to: {args.output}")
 
-        if verbose:
+            log(f"Load with: {psql_copy_command(args.output)}")
 
-            print("OCR Text extracted:")
+        else:
 
-            print("-" * 40)
+            log(f"Output written to: {args.output}")
 
-            print(ocr_text)
+   
 
-            print("-" * 40)
+    succeeded = sum(1 for r in results if not r['error'])
 
-       
+    log(f"Processed {succeeded}/{len(results)} images successfully.")
 
-        # Parse OCR text into structured data
+    if manifest is not None:
 
-        if verbose:
+        log(format_manifest_report(manifest))
 
-            print("Parsing structured data...")
+    if not args.no_cache:
 
-        structured_data = self.parse_ocr_text_to_dict(ocr_text)
+        hits = sum(r.get('cache_hits', 0) for r in results)
 
-       
+        misses = sum(r.get('cache_misses', 0) for r in results)
 
-        if verbose:
+        log(f"OCR cache: {hits} hits, {misses} misses")
 
-            print("Structured data:")
+    ocr_pixels = sum(r.get('ocr_pixels', 0) for r in results)
 
-            for key, value in structured_data.items():
+    if ocr_pixels:
 
-                print(f"  {key}: {value}")
+        log(format_pixel_report(ocr_pixels, sum(r.get('full_image_pixels', 0) for r in results)))
 
-            print("-" * 40)
+    scaled = [r for r in results if 'pixels_before' in r]
 
-       
+    if scaled:
 
-        # Parse into final format
+        log(format_normalization_report(scaled))
 
-        parsed_data = self.parse_property_data(structured_data)
+   
 
-       
+    error_report = format_error_report(results)
 
-        # Generate SQL
+    if error_report:
 
-        if verbose:
+        print(error_report, file=sys.stderr)
 
-            print("Generating SQL INSERT statement...")
+   
 
-        sql_insert = self.generate_sql_insert(parsed_data)
+    # Only fail the run when nothing could be processed
 
-       
+    if succeeded == 0:
 
-        return sql_insert
+        sys.exit(1)
 
  
 
-def main():
+def manifest_target(args, output_format: str) -> str:
 
     """
 
-    Main function with command line argument parsing
+    Manifest key for where records go: the output format for file output, or
+
+    the database for --load (hashed, so no credentials end up in the manifest)
 
     """
 
-    parser = argparse.ArgumentParser(
+    if not args.load:
 
-        description='Generate SQL INSERT statements from Japanese property listing screenshots'
+        return output_format
 
-    )
+    import hashlib
 
-    parser.add_argument(
+    return 'load:' + hashlib.sha256((args.dsn or 'env').encode('utf-8')).hexdigest()[:16]
 
-        'screenshot',
+ 
 
-        help='Path to the screenshot image file'
+def parser_pipeline_version(gazetteer: Optional[Gazetteer]) -> str:
 
-    )
+    """Everything that changes records built from the same OCR text"""
 
-    parser.add_argument(
+    return f"parser={PARSER_VERSION};gazetteer={gazetteer.version if gazetteer else None}"
 
-        '-v', '--verbose',
+ 
 
-        action='store_true',
+def ocr_pipeline_version(args) -> str:
 
-        help='Enable verbose output showing OCR results and parsing steps'
+    """Everything that changes the OCR text: a change re-OCRs the affected images"""
 
-    )
+    version = f"tesseract={tesseract_version(args.cache_dir)};regions={args.regions}"
 
-    parser.add_argument(
+    text_height = text_height_from_args(args)
 
-        '-o', '--output',
+    return version if text_height is None else f"{version};text_height={text_height}"
 
-        help='Output file for the SQL statement (default: print to stdout)'
+ 
 
-    )
+def format_pixel_report(ocr_pixels: int, full_pixels: int) -> str:
 
-   
+    saved = 1 - ocr_pixels / full_pixels if full_pixels else 0.0
 
-    args = parser.parse_args()
+    return f"OCR input: {ocr_pixels:,} of {full_pixels:,} image pixels ({saved:.0%} saved by text regions)"
 
-   
+ 
 
-    try:
+def format_normalization_report(results: list) -> str:
 
-        generator = PropertySQLGenerator()
+    """Pixel counts before/after text-height normalization and OCR time per image over a batch"""
 
-        sql_result = generator.process_screenshot(args.screenshot, args.verbose)
+    before = sum(r['pixels_before'] for r in results)
 
-       
+    after = sum(r['pixels_after'] for r in results)
 
-        if args.output:
+    rescaled = sum(1 for r in results if r['pixels_before'] != r['pixels_after'])
 
-            with open(args.output, 'w', encoding='utf-8') as f:
+    ocr_ms = sum(r.get('ocr_seconds', 0.0) for r in results) * 1000 / len(results)
 
-                f.write(sql_result)
+    return (f"Text height normalization: {rescaled} of {len(results)} images rescaled, "
 
-            print(f"SQL statement written to: {args.output}")
+            f"{before:,} -> {after:,} pixels; OCR {ocr_ms:.0f} ms per image")
 
-        else:
+ 
 
-            print("Generated SQL INSERT statement:")
+def write_bulk_output(document: str, args):
 
-            print("=" * 50)
+    """Write a COPY/CSV document to the output file or stdout"""
 
-            print(sql_result)
+    if not args.output:
 
-           
+        sys.stdout.write(document)
 
-    except KeyboardInterrupt:
+        return
 
-        print("\nOperation cancelled by user.")
+    with open(args.output, 'w', encoding='utf-8') as f:
 
-        sys.exit(1)
+        f.write(document)
 
-    except Exception as e:
+    if args.quiet:
 
-        print(f"Error: {str(e)}")
+        return
 
-        sys.exit(1)
+    if args.format == 'csv':
+
+        print(f"CSV written to: {args.output}", file=sys.stderr)
+
+        print(f"Load with: {psql_copy_command(args.output)}", file=sys.stderr)
+
+    else:
+
+        print(f"COPY data written to: {args.output} (load with: psql -f {args.output})", file=sys.stderr)
 
  
 
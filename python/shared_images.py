@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+
+"""
+Shared-memory image buffers for worker processes
+
+Pixel arrays are allocated in multiprocessing.shared_memory segments, so a
+decoded screenshot or a preprocessing variant reaches a worker process as a
+small picklable handle instead of a pickled copy of its pixels. The owning
+process allocates from a SharedImageStore, which unlinks each segment when
+its array is released and every remaining one when the store is closed.
+Workers map a handle with attached() and unmap it on exit. Grayscale arrays
+wrap into PIL images without a copy (Image.fromarray shares 'L' buffers).
+"""
+
+import weakref
+from collections import namedtuple
+from contextlib import contextmanager
+from multiprocessing import resource_tracker, shared_memory
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+
+# What a worker needs to map an array: segment name, shape and dtype
+SharedImageHandle = namedtuple('SharedImageHandle', ['name', 'shape', 'dtype'])
+
+# Segments still mapped because a view of them was alive when they were
+# released or detached; shared by every store and attached(), so a segment
+# outliving its store is kept (not closed under its views by __del__) and
+# unmapped by a later release, close or attached()
+_lingering: List[shared_memory.SharedMemory] = []
+
+
+def _view(segment: shared_memory.SharedMemory, shape: Tuple[int, ...], dtype: np.dtype) -> np.ndarray:
+    # np.frombuffer keeps the segment's buffer exported while the array (or
+    # any view of it) lives, so closing the segment under it raises
+    # BufferError; np.ndarray(buffer=...) does not, and would let it unmap
+    count = int(np.prod(shape))
+    return np.frombuffer(segment.buf, dtype=dtype, count=count).reshape(shape)
+
+
+def _close_segments(segments: Dict[int, Tuple[shared_memory.SharedMemory, SharedImageHandle, np.ndarray]],
+                    lingering: List[shared_memory.SharedMemory]):
+    """Unlink every segment, then unmap the ones no array view uses any more"""
+    while segments:
+        segment = segments.popitem()[1][0]
+        segment.unlink()
+        lingering.append(segment)
+    for segment in list(lingering):
+        try:
+            segment.close()
+        except BufferError:
+            # A view (array or PIL image) is still alive; retried on the next close
+            continue
+        lingering.remove(segment)
+
+
+class SharedImageStore:
+    """
+    Owner of the shared segments for one image's arrays.
+
+    allocate() returns a NumPy array backed by a new segment; handle() gives
+    the picklable handle for such an array. Segments are unlinked on
+    release(), on close(), or at the latest when the store is collected, and
+    unmapped as soon as the caller holds no view of them.
+    """
+
+    def __init__(self):
+        # id(array) -> (segment, handle, array)
+        self._segments: Dict[int, Tuple[shared_memory.SharedMemory, SharedImageHandle, np.ndarray]] = {}
+        self._lingering = _lingering
+        weakref.finalize(self, _close_segments, self._segments, self._lingering)
+        self.peak_bytes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    @property
+    def held_bytes(self) -> int:
+        return sum(array.nbytes for _, _, array in self._segments.values())
+
+    def allocate(self, shape: Tuple[int, ...], dtype=np.uint8) -> np.ndarray:
+        """Uninitialised array of `shape` in a new shared segment"""
+        dtype = np.dtype(dtype)
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        segment = shared_memory.SharedMemory(create=True, size=size)
+        array = _view(segment, shape, dtype)
+        self._segments[id(array)] = (segment, SharedImageHandle(segment.name, tuple(shape), dtype.str), array)
+        self.peak_bytes = max(self.peak_bytes, self.held_bytes)
+        return array
+
+    def share(self, array: np.ndarray) -> np.ndarray:
+        """Shared copy of an array that was allocated elsewhere"""
+        shared = self.allocate(array.shape, array.dtype)
+        shared[...] = array
+        return shared
+
+    def owns(self, array) -> bool:
+        return id(array) in self._segments
+
+    def handle(self, array: np.ndarray) -> SharedImageHandle:
+        """Handle of an array returned by allocate()"""
+        try:
+            return self._segments[id(array)][1]
+        except KeyError:
+            raise ValueError("Array is not in this shared image store") from None
+
+    def release(self, array: np.ndarray):
+        """Unlink an array's segment, unmapping it once no view of it is left"""
+        entry = self._segments.pop(id(array), None)
+        if entry is None:
+            return
+        segment = entry[0]
+        del entry, array
+        segment.unlink()
+        self._lingering.append(segment)
+        _close_segments({}, self._lingering)
+
+    def close(self):
+        """Unlink every segment still held and unmap the ones no longer viewed"""
+        _close_segments(self._segments, self._lingering)
+
+
+def share_resource_tracker():
+    """
+    Start this process's resource tracker before forking worker processes.
+    Workers that attach to a segment register it with the tracker; forked
+    after it started, they share the owner's, instead of each starting one
+    that would unlink the segment (and warn of a leak) when the worker exits.
+    """
+    resource_tracker.ensure_running()
+
+
+@contextmanager
+def attached(handle: SharedImageHandle) -> Iterator[np.ndarray]:
+    """
+    Map a shared array in a worker process. It is unmapped when the block
+    ends, or if views of it (including PIL images made with Image.fromarray)
+    are still alive then, by a later attached() once they are gone.
+    """
+    segment = shared_memory.SharedMemory(name=handle.name)
+    try:
+        yield _view(segment, handle.shape, np.dtype(handle.dtype))
+    finally:
+        _lingering.append(segment)
+        _close_segments({}, _lingering)
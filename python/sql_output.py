@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+
+"""
+Bulk-load output formats for the properties table
+
+Renders property rows either as PostgreSQL COPY text-format data (for
+`COPY properties (...) FROM STDIN`) or as CSV for psql's `\\copy`, so a
+batch of listings loads in one round trip instead of one INSERT per row.
+"""
+
+import io
+import csv
+from collections import namedtuple
+from typing import Any, List, Sequence
+
+OUTPUT_FORMATS = ('sql', 'copy', 'csv')
+
+# A WGS84 point for the PostGIS `location GEOMETRY(POINT, 4326)` column
+GeoPoint = namedtuple('GeoPoint', ['lng', 'lat'])
+
+# (properties column, row key) in the same order as the INSERT template
+PROPERTY_COLUMNS = [
+    ('title', 'title'),
+    ('price', 'price'),
+    ('pricePerSquareMeter', 'price_per_sqm'),
+    ('address', 'address'),
+    ('layout', 'layout'),
+    ('area', 'area'),
+    ('floorInfo', 'floor_info'),
+    ('structure', 'structure'),
+    ('managementFee', 'management_fee'),
+    ('areaOfUse', 'area_of_use'),
+    ('transportation', 'transportation'),
+    ('walkDistance', 'walk_distance'),
+    ('location', 'location'),
+    ('propertyType', 'property_type'),
+    ('yearBuilt', 'year_built'),
+    ('balconyArea', 'balcony_area'),
+    ('totalUnits', 'total_units'),
+    ('repairReserveFund', 'repair_reserve_fund'),
+    ('landLeaseFee', 'land_lease_fee'),
+    ('rightFee', 'right_fee'),
+    ('depositGuarantee', 'deposit_guarantee'),
+    ('maintenanceFees', 'maintenance_fees'),
+    ('otherFees', 'other_fees'),
+    ('bicycleParking', 'bicycle_parking'),
+    ('bikeStorage', 'bike_storage'),
+    ('siteArea', 'site_area'),
+    ('pets', 'pets'),
+    ('landRights', 'land_rights'),
+    ('managementForm', 'management_form'),
+    ('landLawNotification', 'land_law_notification'),
+    ('currentSituation', 'current_situation'),
+    ('extraditionPossibleDate', 'extradition_possible_date'),
+    ('transactionMode', 'transaction_mode'),
+    ('propertyNumber', 'property_number'),
+    ('informationReleaseDate', 'information_release_date'),
+    ('nextScheduledUpdateDate', 'next_scheduled_update_date'),
+    ('remarks', 'remarks'),
+    ('evaluationCertificate', 'evaluation_certificate'),
+    ('parking', 'parking'),
+    ('kitchen', 'kitchen'),
+    ('bathToilet', 'bath_toilet'),
+    ('facilitiesServices', 'facilities_services'),
+    ('others', 'others'),
+    ('images', 'images'),
+    ('zipcode', 'zipcode'),
+    ('area_level_1', 'area_level_1'),
+    ('area_level_2', 'area_level_2'),
+    ('area_level_3', 'area_level_3'),
+    ('area_level_4', 'area_level_4'),
+    ('status', 'status'),
+    ('direction', 'direction'),
+    ('urbanPlanning', 'urban_planning'),
+    ('condominiumSalesCompany', 'condominium_sales_company'),
+    ('constructionCompany', 'construction_company'),
+    ('designCompany', 'design_company'),
+    ('managementCompany', 'management_company'),
+    ('buildingArea', 'building_area'),
+    ('landArea', 'land_area'),
+    ('accessSituation', 'access_situation'),
+    ('buildingCoverageRatio', 'building_coverage_ratio'),
+    ('floorAreaRatio', 'floor_area_ratio'),
+    ('estimatedRent', 'estimated_rent'),
+    ('assumedYield', 'assumed_yield'),
+    ('currentRent', 'current_rent'),
+    ('currentYield', 'current_yield'),
+    ('rentalStatus', 'rental_status'),
+    ('numberOfUnitsInTheBuilding', 'number_of_units_in_building'),
+    ('exclusiveAreaOfEachResidence', 'exclusive_area_of_each_residence'),
+]
+
+COLUMN_NAMES = [column for column, _ in PROPERTY_COLUMNS]
+ROW_KEYS = [key for _, key in PROPERTY_COLUMNS]
+
+# One properties row, fields in column order. Being a tuple it has no
+# per-record __dict__, so large batches held in memory stay compact, and
+# loaders bind it as the parameter sequence as is
+PropertyRecord = namedtuple('PropertyRecord', ROW_KEYS)
+
+# Backslash escapes used by COPY's text format
+_COPY_ESCAPES = str.maketrans({
+    '\\': '\\\\',
+    '\t': '\\t',
+    '\n': '\\n',
+    '\r': '\\r',
+    '\b': '\\b',
+    '\f': '\\f',
+    '\v': '\\v',
+})
+
+
+def format_geometry(point: GeoPoint) -> str:
+    """EWKT for a point, accepted by PostGIS geometry input in COPY/CSV"""
+    return f"SRID=4326;POINT({point.lng!r} {point.lat!r})"
+
+
+def format_array_literal(items: Sequence[Any]) -> str:
+    """PostgreSQL array literal for TEXT[] (e.g. {"a","b"}), NULL elements unquoted"""
+    elements = []
+    for item in items:
+        if item is None:
+            elements.append('NULL')
+        else:
+            escaped = str(item).replace('\\', '\\\\').replace('"', '\\"')
+            elements.append(f'"{escaped}"')
+    return '{' + ','.join(elements) + '}'
+
+
+def to_text(value: Any) -> Any:
+    """Convert a row value to its PostgreSQL text input form (None stays None)"""
+    if value is None:
+        return None
+    if isinstance(value, GeoPoint):
+        return format_geometry(value)
+    if isinstance(value, (list, tuple)):
+        return format_array_literal(value)
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    return str(value)
+
+
+def copy_text_line(values: Sequence[Any]) -> str:
+    """One COPY text-format line: tab separated, \\N for NULL, backslash escapes"""
+    fields = []
+    for value in values:
+        text = to_text(value)
+        fields.append('\\N' if text is None else text.translate(_COPY_ESCAPES))
+    return '\t'.join(fields) + '\n'
+
+
+def csv_line(values: Sequence[Any]) -> str:
+    """
+    One CSV line for `\\copy ... WITH (FORMAT csv)`.
+
+    NULL is an empty unquoted field; every non-NULL value is quoted, so an
+    empty string stays distinguishable from NULL.
+    """
+    fields = []
+    for value in values:
+        text = to_text(value)
+        if text is None:
+            fields.append('')
+        else:
+            fields.append('"' + text.replace('"', '""') + '"')
+    return ','.join(fields) + '\n'
+
+
+def as_record(row) -> PropertyRecord:
+    """A PropertyRecord as is, or one built from a row dict keyed by ROW_KEYS"""
+    if isinstance(row, PropertyRecord):
+        return row
+    return PropertyRecord._make(row.get(key) for key in ROW_KEYS)
+
+
+def render_row(row, output_format: str) -> str:
+    """Render a PropertyRecord (or row dict) as one COPY or CSV line"""
+    values = as_record(row)
+    if output_format == 'copy':
+        return copy_text_line(values)
+    if output_format == 'csv':
+        return csv_line(values)
+    raise ValueError(f"Unsupported row format: {output_format}")
+
+
+def copy_statement(table: str = 'properties') -> str:
+    return f"COPY {table} ({', '.join(COLUMN_NAMES)}) FROM STDIN;"
+
+
+def psql_copy_command(csv_path: str, table: str = 'properties') -> str:
+    """psql meta-command that loads a CSV file written by this module"""
+    return (f"\\copy {table} ({', '.join(COLUMN_NAMES)}) FROM '{csv_path}' "
+            f"WITH (FORMAT csv, HEADER true)")
+
+
+def output_preamble(output_format: str) -> str:
+    """Text written before the first record"""
+    if output_format == 'copy':
+        return copy_statement() + '\n'
+    if output_format == 'csv':
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator='\n').writerow(COLUMN_NAMES)
+        return buffer.getvalue()
+    return ''
+
+
+def output_epilogue(output_format: str) -> str:
+    """Text written after the last record"""
+    if output_format == 'copy':
+        return '\\.\n'
+    return ''
+
+
+def render_document(records: List[str], output_format: str) -> str:
+    """Wrap rendered COPY/CSV lines into a complete, loadable document"""
+    return output_preamble(output_format) + ''.join(records) + output_epilogue(output_format)
@@ -0,0 +1,287 @@
+#!/usr/bin/env python3
+
+"""
+Synthetic listing-screenshot corpus
+
+Renders Japanese 物件概要 tables with PIL from randomised field values,
+varying font, text size, layout, page chrome, resolution, noise, blur and
+JPEG quality. Each image is written next to a manifest.jsonl entry holding
+the rendered label/value pairs, the plain table text and the ground-truth
+parsed values, so OCR and parsing changes can be measured offline.
+"""
+
+import io
+import os
+import glob
+import json
+import random
+import argparse
+from typing import Any, Dict, List, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFilter, ImageFont
+
+MANIFEST_NAME = 'manifest.jsonl'
+
+# Fonts with Japanese glyphs on common Linux/macOS/Windows installs
+FONT_PATTERNS = [
+    '/usr/share/fonts/**/NotoSansCJK*.tt[cf]',
+    '/usr/share/fonts/**/NotoSerifCJK*.tt[cf]',
+    '/usr/share/fonts/**/NotoSansJP*.[ot]tf',
+    '/usr/share/fonts/**/ipa*.ttf',
+    '/usr/share/fonts/**/Takao*.ttf',
+    '/usr/share/fonts/**/VL-Gothic*.ttf',
+    '/Library/Fonts/*Gothic*.tt[cfo]',
+    '/System/Library/Fonts/ヒラギノ*.ttc',
+    'C:/Windows/Fonts/msgothic.ttc',
+    'C:/Windows/Fonts/meiryo.ttc',
+    'C:/Windows/Fonts/YuGoth*.ttc',
+]
+
+ADDRESSES = [
+    ('東京都', '中央区', '勝どき'), ('東京都', '港区', '芝浦'), ('東京都', '江東区', '豊洲'),
+    ('東京都', '世田谷区', '三軒茶屋'), ('東京都', '新宿区', '西新宿'), ('東京都', '武蔵野市', '吉祥寺本町'),
+    ('神奈川県', '横浜市西区', 'みなとみらい'), ('神奈川県', '川崎市中原区', '小杉町'),
+    ('埼玉県', 'さいたま市大宮区', '桜木町'), ('千葉県', '船橋市', '本町'), ('千葉県', '市川市', '八幡'),
+    ('大阪府', '大阪市北区', '梅田'), ('愛知県', '名古屋市中区', '栄'), ('福岡県', '福岡市中央区', '天神'),
+]
+STATIONS = [
+    ('都営大江戸線', '勝どき'), ('ゆりかもめ', '芝浦ふ頭'), ('東京メトロ有楽町線', '豊洲'),
+    ('東急田園都市線', '三軒茶屋'), ('JR山手線', '新宿'), ('JR中央線', '吉祥寺'),
+    ('みなとみらい線', 'みなとみらい'), ('東急東横線', '武蔵小杉'), ('JR京浜東北線', '大宮'),
+    ('JR総武線', '船橋'), ('大阪メトロ御堂筋線', '梅田'), ('名古屋市営地下鉄東山線', '栄'),
+]
+LAYOUTS = ['1R', '1K', '1DK', '1LDK', '2DK', '2LDK', '3LDK', '4LDK', '2SLDK', '3SLDK']
+DIRECTIONS = ['南', '南東', '南西', '東', '西', '北東', '北西', '北']
+STRUCTURES = ['RC造', 'SRC造', '鉄骨造', '木造']
+SITUATIONS = ['居住中', '空家', '賃貸中', '完成済']
+LAND_RIGHTS = ['所有権', '借地権', '定期借地権']
+MANAGEMENT_FORMS = ['区分所有', '管理会社に全部委託', '自主管理']
+TRANSACTION_MODES = ['仲介', '売主', '代理']
+
+
+def find_japanese_fonts() -> List[str]:
+    """Installed font files likely to contain Japanese glyphs"""
+    fonts = []
+    for pattern in FONT_PATTERNS:
+        fonts.extend(sorted(glob.glob(pattern, recursive=True)))
+    return fonts
+
+
+def random_listing(rng: random.Random) -> Tuple[List[Tuple[str, str]], Dict[str, Any]]:
+    """
+    Random listing as (label, value) rows in display order, plus the values
+    a correct parser should produce for them (keyed like parse_property_data).
+    """
+    prefecture, city, town = rng.choice(ADDRESSES)
+    address = f"{prefecture}{city}{town}{rng.randint(1, 6)}丁目"
+    line, station = rng.choice(STATIONS)
+    transportation = f"{line}「{station}」駅 徒歩{rng.randint(1, 20)}分"
+    price_man = rng.randrange(1500, 15000, 10)
+    area = round(rng.uniform(20, 120), 2)
+    balcony = round(rng.uniform(3, 25), 2)
+    built_year, built_month = rng.randint(1975, 2024), rng.randint(1, 12)
+    floors = rng.randint(3, 45)
+    floor = rng.randint(1, floors)
+    management_fee = rng.randrange(5000, 40000, 100)
+    repair_fund = rng.randrange(3000, 30000, 100)
+    units = rng.randint(8, 600)
+    updated = (2025, rng.randint(1, 12), rng.randint(1, 28))
+    next_update = (2025, rng.randint(1, 12), rng.randint(1, 28))
+    property_number = str(rng.randint(10 ** 9, 10 ** 10 - 1))
+
+    fields = {
+        'direction': rng.choice(DIRECTIONS),
+        'structure': rng.choice(STRUCTURES),
+        'current_situation': rng.choice(SITUATIONS),
+        'land_rights': rng.choice(LAND_RIGHTS),
+        'management_form': rng.choice(MANAGEMENT_FORMS),
+        'transaction_mode': rng.choice(TRANSACTION_MODES),
+    }
+    layout = rng.choice(LAYOUTS)
+
+    rows = [
+        ('価格', f"{price_man:,}万円"),
+        ('所在地', address),
+        ('交通', transportation),
+        ('管理費等', f"{management_fee:,}円／月"),
+        ('修繕積立金', f"{repair_fund:,}円／月"),
+        ('間取り', layout),
+        ('専有面積', f"{area:.2f}㎡"),
+        ('バルコニー', f"{balcony:.2f}㎡"),
+        ('築年月', f"{built_year}年{built_month:02d}月"),
+        ('階数', f"{floor}階／{floors}階建"),
+        ('向き', fields['direction']),
+        ('建物構造', fields['structure']),
+        ('総戸数', f"{units}戸"),
+        ('現況', fields['current_situation']),
+        ('土地権利', fields['land_rights']),
+        ('管理形態', fields['management_form']),
+        ('取引態様', fields['transaction_mode']),
+        ('物件番号', property_number),
+        ('更新日', '{}年{:02d}月{:02d}日'.format(*updated)),
+        ('次回更新予定', '{}年{:02d}月{:02d}日'.format(*next_update)),
+    ]
+
+    truth = dict(fields)
+    truth.update({
+        'address': address,
+        'price': price_man * 10000,
+        'layout': layout,
+        'area': area,
+        'year_built': f"{built_year}-{built_month:02d}-01",
+        'balcony_area': balcony,
+        'total_units': units,
+        'transportation': transportation,
+        'management_fee': management_fee,
+        'repair_reserve_fund': repair_fund,
+        'property_number': property_number,
+        'information_release_date': '{}-{:02d}-{:02d}'.format(*updated),
+        'next_scheduled_update_date': '{}-{:02d}-{:02d}'.format(*next_update),
+    })
+    return rows, truth
+
+
+def listing_text(rows: List[Tuple[str, str]], columns: int) -> str:
+    """The table as plain text in reading order, one table row per line"""
+    lines = []
+    for start in range(0, len(rows), columns):
+        lines.append(' '.join(f"{label} {value}" for label, value in rows[start:start + columns]))
+    return '物件概要\n' + '\n'.join(lines)
+
+
+def render_listing(rows: List[Tuple[str, str]], rng: random.Random,
+                   fonts: List[str]) -> Tuple[Image.Image, Dict[str, Any]]:
+    """Render rows as a listing screenshot; returns the image and its style parameters"""
+    style = {
+        'font': rng.choice(fonts),
+        'font_size': rng.randint(12, 22),
+        'columns': rng.choice([1, 2]),
+        'chrome': rng.random() < 0.6,
+        'scale': round(rng.uniform(0.6, 1.6), 2),
+        'noise': round(rng.choice([0, 0, rng.uniform(2, 14)]), 1),
+        'blur': round(rng.choice([0, 0, rng.uniform(0.3, 1.2)]), 2),
+        'jpeg_quality': rng.choice([None, None, rng.randint(55, 95)]),
+    }
+    font = ImageFont.truetype(style['font'], style['font_size'])
+    title_font = ImageFont.truetype(style['font'], style['font_size'] + 4)
+    measure = ImageDraw.Draw(Image.new('L', (1, 1)))
+    text_width = lambda text, f=font: int(measure.textlength(text, font=f))
+
+    pad = style['font_size'] // 2
+    row_height = style['font_size'] + 2 * pad
+    columns = style['columns']
+    table_rows = [rows[i:i + columns] for i in range(0, len(rows), columns)]
+    label_width = max(text_width(label) for label, _ in rows) + 2 * pad
+    value_width = max(text_width(value) for _, value in rows) + 2 * pad
+    table_width = columns * (label_width + value_width)
+    table_height = len(table_rows) * row_height
+
+    margin = 20
+    header = 60 if style['chrome'] else 0
+    photo = (min(table_width, 480), 300) if style['chrome'] else (0, 0)
+    width = table_width + 2 * margin
+    title_height = style['font_size'] + 4 + pad * 2
+    height = header + (photo[1] + margin if photo[1] else 0) + title_height + table_height + 2 * margin
+
+    image = Image.new('RGB', (width, height), 'white')
+    draw = ImageDraw.Draw(image)
+    y = 0
+    if style['chrome']:
+        draw.rectangle((0, 0, width, header), fill=(rng.randint(0, 80), rng.randint(40, 120), rng.randint(100, 200)))
+        # Smooth random blotches stand in for a listing photo
+        photo_image = Image.effect_noise(photo, 64).convert('RGB').filter(ImageFilter.GaussianBlur(12))
+        image.paste(photo_image, (margin, header + margin))
+        y = header + photo[1] + margin
+
+    y += margin
+    draw.text((margin, y), '物件概要', font=title_font, fill='black')
+    y += title_height
+    line_color = (rng.randint(160, 210),) * 3
+    label_fill = (rng.randint(225, 245), rng.randint(225, 245), rng.randint(225, 245))
+    for row in table_rows:
+        x = margin
+        for label, value in row:
+            draw.rectangle((x, y, x + label_width, y + row_height), fill=label_fill, outline=line_color)
+            draw.text((x + pad, y + pad), label, font=font, fill=(40, 40, 40))
+            x += label_width
+            draw.rectangle((x, y, x + value_width, y + row_height), fill='white', outline=line_color)
+            draw.text((x + pad, y + pad), value, font=font, fill='black')
+            x += value_width
+        y += row_height
+
+    if style['scale'] != 1.0:
+        image = image.resize((int(width * style['scale']), int(height * style['scale'])), Image.LANCZOS)
+    if style['noise']:
+        noise = Image.effect_noise(image.size, style['noise'] * 4).convert('RGB')
+        image = Image.blend(image, noise, style['noise'] / 100)
+    if style['blur']:
+        image = image.filter(ImageFilter.GaussianBlur(style['blur']))
+    if style['jpeg_quality']:
+        buffer = io.BytesIO()
+        image.save(buffer, format='JPEG', quality=style['jpeg_quality'])
+        buffer.seek(0)
+        image = Image.open(buffer)
+        image.load()
+    return image, style
+
+
+def generate_corpus(out_dir: str, count: int, seed: int = 0,
+                    fonts: Optional[List[str]] = None) -> str:
+    """Render `count` listings into out_dir and return the manifest path"""
+    fonts = fonts or find_japanese_fonts()
+    if not fonts:
+        raise RuntimeError("No Japanese font found; pass one with --font")
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest_path = os.path.join(out_dir, MANIFEST_NAME)
+    with open(manifest_path, 'w', encoding='utf-8') as manifest:
+        for index in range(count):
+            rows, truth = random_listing(rng)
+            image, style = render_listing(rows, rng, fonts)
+            extension = 'jpg' if style['jpeg_quality'] else 'png'
+            name = f"listing_{index:05d}.{extension}"
+            if extension == 'jpg':
+                image.save(os.path.join(out_dir, name), quality=style['jpeg_quality'])
+            else:
+                image.save(os.path.join(out_dir, name))
+            entry = {
+                'image': name,
+                'rows': rows,
+                'text': listing_text(rows, style['columns']),
+                'truth': truth,
+                'style': style,
+            }
+            manifest.write(json.dumps(entry, ensure_ascii=False) + '\n')
+    return manifest_path
+
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Read a corpus manifest (file or directory); image paths are made absolute"""
+    if os.path.isdir(path):
+        path = os.path.join(path, MANIFEST_NAME)
+    base = os.path.dirname(os.path.abspath(path))
+    entries = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                entry = json.loads(line)
+                entry['path'] = os.path.join(base, entry['image'])
+                entries.append(entry)
+    return entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic listing screenshots with ground truth')
+    parser.add_argument('out_dir', help='Directory for images and manifest.jsonl')
+    parser.add_argument('-n', '--count', type=int, default=100, help='Number of images (default: %(default)s)')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed (default: %(default)s)')
+    parser.add_argument('--font', action='append', dest='fonts',
+                        help='Font file with Japanese glyphs (repeatable; default: auto-detect)')
+    args = parser.parse_args()
+
+    manifest = generate_corpus(args.out_dir, args.count, seed=args.seed, fonts=args.fonts)
+    print(f"Wrote {args.count} images and {manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import os
+import sys
+import random
+
+import pytest
+
+# The pipeline modules are flat scripts in python/, imported by name
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+FULLWIDTH = str.maketrans('0123456789,.', '０１２３４５６７８９，．')
+
+
+def random_numeric_fields(rng):
+    """Raw OCR values for the NUMERIC_FIELDS labels of one listing, with the usual noise"""
+    price = rng.randint(800, 25000)
+    area = f"{rng.randint(15, 150)}.{rng.randint(0, 99):02d}"
+    fields = {
+        '価格': rng.choice([f"{price:,}万円", f"{price}万円", f"{price * 10000:,}円", f"{price / 10000:.2f}億円"]),
+        '専有面積': rng.choice([f"{area}㎡", f"{area}m²（壁芯）", f"約{area}m2"]),
+        '築年月': rng.choice([f"{rng.randint(1970, 2025)}年{rng.randint(1, 12)}月築", f"{rng.randint(1970, 2025)}年"]),
+        'バルコニー': f"{rng.randint(2, 30)}.{rng.randint(0, 9)}㎡",
+        '総戸数': rng.choice([f"{rng.randint(10, 900)}戸", f"総戸数 {rng.randint(10, 900)}戸 (1棟)"]),
+        '更新日': f"2025年{rng.randint(1, 12):02d}月{rng.randint(1, 31):02d}日",
+        '次回更新予定': f"2025年{rng.randint(1, 12)}月{rng.randint(1, 31)}日",
+        '修繕積立金': f"{rng.randint(5000, 40000):,}円／月",
+    }
+    for label in list(fields):
+        roll = rng.random()
+        if roll < 0.05:
+            fields[label] = '-'
+        elif roll < 0.08:
+            fields[label] = ''
+        elif roll < 0.1:
+            del fields[label]
+        elif roll < 0.25:
+            fields[label] = fields[label].translate(FULLWIDTH)
+        elif roll < 0.3:
+            fields[label] = f" {fields[label]}\n"
+    return fields
+
+
+@pytest.fixture
+def make_records():
+    """Factory of `count` random listing records, reproducible per seed"""
+    def make(count, seed):
+        rng = random.Random(seed)
+        return [random_numeric_fields(rng) for _ in range(count)]
+    return make
@@ -0,0 +1,59 @@
+import pytest
+
+from address_resolver import AreaTrie, normalize_address, resolve_address, split_address
+
+
+@pytest.mark.parametrize('address, expected', [
+    # Tokyo: subdivision, then the ward or municipality
+    ('東京都港区芝浦1丁目', (None, '関東地方', '東京都', '23区', '港区')),
+    ('東京都武蔵村山市学園4丁目', (None, '関東地方', '東京都', '市部', '武蔵村山市')),
+    ('東京都東村山市本町1-2', (None, '関東地方', '東京都', '市部', '東村山市')),
+    ('東京都羽村市羽東1', (None, '関東地方', '東京都', '市部', '羽村市')),
+    ('東京都小平市小川町1', (None, '関東地方', '東京都', '市部', '小平市')),
+    ('東京都西多摩郡瑞穂町箱根ケ崎', (None, '関東地方', '東京都', '郡部', '西多摩郡瑞穂町')),
+    ('東京都八丈町三根', (None, '関東地方', '東京都', '郡部', '八丈町')),
+    # Elsewhere: municipality, then the ward or town
+    ('三重県四日市市諏訪町1-5', (None, '関西地方', '三重県', '四日市市', '諏訪町')),
+    ('新潟県十日町市本町', (None, '中部地方', '新潟県', '十日町市', '本町')),
+    ('長野県大町市大町', (None, '中部地方', '長野県', '大町市', '大町')),
+    ('広島県廿日市市下平良1丁目', (None, '中国地方', '広島県', '廿日市市', '下平良')),
+    ('奈良県大和郡山市北郡山町', (None, '関西地方', '奈良県', '大和郡山市', '北郡山町')),
+    ('千葉県市原市五井', (None, '関東地方', '千葉県', '市原市', '五井')),
+    ('神奈川県横浜市中区山下町', (None, '関東地方', '神奈川県', '横浜市', '中区')),
+    # Names outside the dataset fall back to their suffix
+    ('静岡県静岡市葵区追手町9-6', (None, '中部地方', '静岡県', '静岡市', '葵区')),
+    ('兵庫県姫路市安田4丁目', (None, '関西地方', '兵庫県', '姫路市', '安田')),
+    ('北海道虻田郡倶知安町南1条', (None, '北海道地方', '北海道', '虻田郡倶知安町', '南')),
+    ('富山県中新川郡上市町法音寺', (None, '中部地方', '富山県', '中新川郡上市町', '法音寺')),
+    # No prefecture: from a municipality unique to one, or the postal code
+    ('武蔵村山市学園4丁目', (None, '関東地方', '東京都', '市部', '武蔵村山市')),
+    ('〒150-0002 渋谷区渋谷2-1', ('150-0002', '関東地方', '東京都', '23区', '渋谷区')),
+    ('〒５１０－００８５ 四日市市諏訪町', ('510-0085', '関西地方', '三重県', '四日市市', '諏訪町')),
+])
+def test_resolve_address(address, expected):
+    assert tuple(resolve_address(address)) == expected
+
+
+def test_split_address_keeps_the_rest():
+    parts = split_address('東京都 武蔵村山市 学園４丁目５番 ハイツ101')
+    assert (parts.prefecture, parts.municipality, parts.ward) == ('東京都', '武蔵村山市', None)
+    assert parts.rest == '学園4丁目5番ハイツ101'
+
+
+def test_empty_address():
+    assert tuple(resolve_address('')) == (None,) * 5
+    assert tuple(split_address('')) == (None, None, None, None, '')
+
+
+def test_normalize_address():
+    assert normalize_address('東京都　港区 芝浦１－２') == '東京都港区芝浦1－2'
+
+
+def test_trie_longest_prefix():
+    trie = AreaTrie()
+    for name in ('四日市', '四日市市', '市川市'):
+        trie.insert(name, name)
+    assert trie.size == 3
+    assert trie.longest_prefix('四日市市諏訪町') == ('四日市市', 4)
+    assert trie.longest_prefix('三重県四日市市', 3) == ('四日市市', 7)
+    assert trie.longest_prefix('市原市') == (None, 0)
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+from PIL import Image
+
+from property_sql_generator import PropertySQLGenerator
+
+
+class SlowTesseract:
+    """AsyncTesseract stand-in that sleeps, or raises its own timeout"""
+
+    name = 'pytesseract'
+    max_processes = 1
+
+    def __init__(self, delay, error=None):
+        self.delay = delay
+        self.error = error
+
+    async def run(self, image_bytes, lang, config=''):
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return ''
+
+
+def collect(image_path, tesseract, timeout):
+    async def run():
+        generator = PropertySQLGenerator(quiet=True)
+        return [result async for result in generator.aiter_screenshots([image_path], tesseract, timeout)]
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def image_path(tmp_path):
+    path = tmp_path / 'listing.png'
+    Image.new('RGB', (40, 20), 'white').save(path)
+    return str(path)
+
+
+def test_timeout_reports_the_limit(image_path):
+    [result] = collect(image_path, SlowTesseract(1.0), timeout=0.05)
+    assert result['error'] == 'TimeoutError: OCR took longer than 0.05s'
+
+
+def test_timeout_keeps_the_tesseract_message(image_path):
+    error = asyncio.TimeoutError('tesseract took longer than 3s')
+    [result] = collect(image_path, SlowTesseract(0, error), timeout=10)
+    assert result['error'] == 'TimeoutError: tesseract took longer than 3s'
@@ -0,0 +1,152 @@
+import sqlite3
+
+import pytest
+
+import batch_manifest
+from batch_manifest import BatchManifest, iter_incremental, PROCESS, REPARSE, SKIP
+from db_loader import LoadWriter, PropertyLoader, redact_dsn
+from sql_output import ROW_KEYS, PropertyRecord
+
+TARGET = 'load:test'
+
+
+def row(address):
+    return PropertyRecord._make([None] * len(ROW_KEYS))._replace(address=address)
+
+
+@pytest.fixture
+def images(tmp_path):
+    paths = []
+    for i in range(3):
+        path = tmp_path / f'listing-{i}.png'
+        path.write_bytes(b'image %d' % i)
+        paths.append(str(path))
+    return paths
+
+
+@pytest.fixture
+def dsn(tmp_path):
+    return f"sqlite:///{tmp_path / 'properties.db'}"
+
+
+def process(paths):
+    for path in paths:
+        yield {'path': path, 'sql': row(path), 'error': None, 'ocr_text': path, 'elapsed': 0.0}
+
+
+def load(images, manifest, dsn, parser_version='p1', force=False, close=True):
+    writer = LoadWriter(PropertyLoader(dsn, batch_size=10))
+    for result in iter_incremental(images, manifest, TARGET, 'o1', parser_version, process,
+                                   reparse=row, output_location='sqlite', replay=False, force=force):
+        writer.write(result)
+    if close:
+        writer.close()
+    return writer
+
+
+def table(dsn):
+    conn = sqlite3.connect(dsn[len('sqlite:///'):])
+    try:
+        return dict(conn.execute('SELECT address, id FROM properties'))
+    finally:
+        conn.close()
+
+
+def row_ids(manifest, images):
+    return {path: manifest.lookup(path, TARGET)['row_id'] for path in images}
+
+
+def test_entries_wait_for_the_commit(tmp_path, images, dsn):
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        # Crash with every row still buffered: nothing is journalled
+        load(images, manifest, dsn, close=False)
+        assert all(manifest.lookup(path, TARGET) is None for path in images)
+
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        load(images, manifest, dsn)
+        assert manifest.counts[PROCESS] == 3
+        assert row_ids(manifest, images) == table(dsn)
+
+
+def test_resume_skips_loaded_images(tmp_path, images, dsn):
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        load(images[:2], manifest, dsn)
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        load(images, manifest, dsn)
+        assert manifest.counts == {SKIP: 2, REPARSE: 0, PROCESS: 1}
+        assert row_ids(manifest, images) == table(dsn)
+
+
+@pytest.mark.parametrize('change', ['parser', 'content', 'force'])
+def test_reloaded_images_replace_their_rows(tmp_path, images, dsn, change):
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        load(images, manifest, dsn)
+        first = table(dsn)
+        if change == 'content':
+            with open(images[0], 'ab') as f:
+                f.write(b' edited')
+        load(images, manifest, dsn, parser_version='p2' if change == 'parser' else 'p1', force=change == 'force')
+
+        rows = table(dsn)
+        assert sorted(rows) == sorted(images)
+        assert row_ids(manifest, images) == rows
+        assert rows[images[0]] != first[images[0]]
+
+
+def test_rejected_rows_are_not_journalled(tmp_path, images, dsn):
+    def process_with_bad_row(paths):
+        for result in process(paths):
+            if result['path'] == images[1]:
+                # SQLite cannot bind an arbitrary object, so only this row fails
+                result['sql'] = row(object())
+            yield result
+
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        writer = LoadWriter(PropertyLoader(dsn, batch_size=10))
+        writer.write_all(iter_incremental(images, manifest, TARGET, 'o1', 'p1', process_with_bad_row,
+                                          reparse=row, replay=False))
+        stats = writer.close()
+
+        assert (stats['rows_loaded'], stats['rows_failed']) == (2, 1)
+        assert manifest.lookup(images[1], TARGET) is None
+        assert row_ids(manifest, [images[0], images[2]]) == table(dsn)
+
+
+def test_reparse_in_chunks_and_isolate_failures(tmp_path, images, monkeypatch):
+    monkeypatch.setattr(batch_manifest, 'REPARSE_CHUNK_SIZE', 2)
+    chunks = []
+
+    def reparse_batch(texts):
+        chunks.append(len(texts))
+        if images[2] in texts:
+            raise ValueError('unparseable')
+        return [f'batch {text}' for text in texts]
+
+    def reparse(text):
+        if text == images[2]:
+            raise ValueError('unparseable')
+        return f'single {text}'
+
+    with BatchManifest(str(tmp_path / 'manifest.db')) as manifest:
+        list(iter_incremental(images, manifest, TARGET, 'o1', 'p1', process, reparse=row))
+        results = list(iter_incremental(images, manifest, TARGET, 'o1', 'p2', process,
+                                        reparse=reparse, reparse_batch=reparse_batch))
+
+        assert manifest.counts[REPARSE] == 3 and chunks == [2, 1]
+        assert [(result['path'], result['sql'], result['error']) for result in results] == [
+            (images[0], f'batch {images[0]}', None),
+            (images[1], f'batch {images[1]}', None),
+            (images[2], None, 'ValueError: unparseable'),
+        ]
+
+
+@pytest.mark.parametrize('dsn, redacted', [
+    ('postgresql://bob:secret@db:5432/props?sslmode=require', 'postgresql://db:5432/props?sslmode=require'),
+    ('postgresql://db/props?password=secret&sslmode=require', 'postgresql://db/props?sslmode=require'),
+    ('postgresql://db/props?sslmode=require&password=secret', 'postgresql://db/props?sslmode=require'),
+    ('host=db dbname=props user=bob password=secret', 'host=db dbname=props user=bob'),
+    ("password='se cret' host=db", 'host=db'),
+    ('sqlite:///tmp/properties.db', 'sqlite:///tmp/properties.db'),
+])
+def test_redact_dsn(dsn, redacted):
+    assert redact_dsn(dsn) == redacted
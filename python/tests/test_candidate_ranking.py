@@ -0,0 +1,85 @@
+import pytest
+from PIL import Image, ImageDraw
+
+from candidate_ranking import (MIN_IMAGES, MIN_TRIES, CandidateRanker, format_ranking_report,
+                               layout_fingerprint)
+
+JPN = {'lang': 'jpn', 'config': '--psm 6'}
+SPARSE = {'lang': 'jpn', 'config': '--psm 11'}
+ENG = {'lang': 'eng', 'config': '--psm 6'}
+CANDIDATES = [('original', JPN), ('original', SPARSE), ('threshold', JPN), ('threshold', ENG)]
+
+
+def screenshot(width, height, background=(255, 255, 255), header=(200, 40, 40)):
+    image = Image.new('RGB', (width, height), background)
+    ImageDraw.Draw(image).rectangle((0, 0, width, height // 4), fill=header)
+    return image
+
+
+def test_fingerprint_ignores_the_page_length():
+    site = layout_fingerprint(screenshot(1400, 2000))
+    assert site == layout_fingerprint(screenshot(1420, 2600))
+    assert site.startswith('1400/portrait:')
+    assert layout_fingerprint(screenshot(1400, 900)).startswith('1400/landscape:')
+    assert layout_fingerprint(screenshot(1000, 2000)) != site
+    assert layout_fingerprint(screenshot(1400, 2000, background=(20, 20, 20))) != site
+
+
+@pytest.fixture
+def ranker(tmp_path):
+    with CandidateRanker(str(tmp_path / 'stats' / 'ranking.sqlite'), exploration=0, seed=0) as ranker:
+        yield ranker
+
+
+def train(ranker, fingerprint, images, winner, tried=CANDIDATES):
+    for _ in range(images):
+        ranker.record(fingerprint, list(tried), winner)
+
+
+def test_static_order_until_the_layout_has_history(ranker):
+    train(ranker, 'site', MIN_IMAGES - 1, CANDIDATES[3])
+    assert ranker.order('site', CANDIDATES) == (CANDIDATES, 0)
+
+
+def test_winners_first_and_steady_losers_pruned(ranker):
+    train(ranker, 'site', MIN_TRIES, CANDIDATES[2])
+    train(ranker, 'site', 1, CANDIDATES[1], tried=CANDIDATES[:2])
+    unseen = ('adaptive', JPN)
+
+    # Candidates that never ran are kept, after the ones with wins
+    assert ranker.order('site', CANDIDATES + [unseen]) == ([CANDIDATES[2], CANDIDATES[1], unseen], 2)
+    # Other layouts keep their own (here: no) history
+    assert ranker.order('other', CANDIDATES) == (CANDIDATES, 0)
+
+
+def test_best_candidate_always_runs(ranker):
+    train(ranker, 'site', MIN_TRIES, None)
+    assert ranker.order('site', CANDIDATES) == (CANDIDATES[:1], 3)
+
+
+def test_exploration_keeps_the_full_grid(tmp_path):
+    with CandidateRanker(str(tmp_path / 'ranking.sqlite'), exploration=1.0) as ranker:
+        train(ranker, 'site', MIN_TRIES, CANDIDATES[3])
+        assert ranker.order('site', CANDIDATES) == ([CANDIDATES[3]] + CANDIDATES[:3], 0)
+        assert ranker.counts['explored'] == 1
+
+
+def test_record_counts_each_candidate_once_and_persists(tmp_path):
+    path = str(tmp_path / 'ranking.sqlite')
+    with CandidateRanker(path) as ranker:
+        ranker.record('site', [CANDIDATES[0], CANDIDATES[0], CANDIDATES[1]], CANDIDATES[0])
+        ranker.record('site', CANDIDATES[:2], CANDIDATES[1])
+    with CandidateRanker(path) as ranker:
+        assert ranker.stats('site') == (2, {('original', 'jpn', '--psm 6'): (2, 1),
+                                            ('original', 'jpn', '--psm 11'): (2, 1)})
+        assert ranker.stats('other') == (0, {})
+
+
+def test_ranking_report(ranker):
+    train(ranker, 'site', MIN_TRIES, CANDIDATES[0])
+    kept, _ = ranker.order('site', CANDIDATES)
+    ranker.record('site', kept, kept[0])
+    ranker.order('new', CANDIDATES)
+    assert format_ranking_report(ranker) == (
+        f"Learned ranking: {MIN_TRIES * 4 + 1} of 8 OCR candidates run over 2 images, 3 pruned; "
+        f"learned order used for 1 images, 0 of them exploring the full grid")
@@ -0,0 +1,61 @@
+import random
+
+import pytest
+
+from columnar_parsing import COLUMN_PARSERS, column_values, parse_columns
+from property_sql_generator import NUMERIC_FIELDS, PropertySQLGenerator
+
+# Shapes the scalar parsers handle specially, plus OCR noise
+EDGE_CASES = [
+    None, '', '-', ' ', '万円', '1.5万円', '1,234万円', '１，２３４万円', '12,345,000円', '3億2,000万円',
+    '0.5', '.5', '5.', '1.2.3', '65.5㎡', '65.5m²（壁芯）', '㎡65', '65 ㎡', '１２.３４㎡', '約70m2',
+    '2019年3月築', '2019年12月', '19年3月', '2019年3月1日', '2025年02月30日', '2025年1月1日更新',
+    '12戸', '総戸数 300戸 (1棟)', 'abc', 'line\nbreak 4,500万円', '4,500万円\n', '\n', '５０戸',
+]
+ALPHABET = '0123456789０１２３４５６７８９.,，万円年月日㎡m²- \n'
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return PropertySQLGenerator(quiet=True)
+
+
+def scalar_column(generator, method, values):
+    return [getattr(generator, method)(value) for value in values]
+
+
+def random_strings(count, seed):
+    rng = random.Random(seed)
+    return [''.join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 14))) for _ in range(count)]
+
+
+@pytest.mark.parametrize('method', sorted(COLUMN_PARSERS))
+def test_column_parsers_match_the_scalar_parsers(generator, method):
+    values = EDGE_CASES + random_strings(2000, seed=method)
+    assert column_values(COLUMN_PARSERS[method](values)) == scalar_column(generator, method, values)
+
+
+@pytest.mark.parametrize('method', sorted(COLUMN_PARSERS))
+def test_empty_column(method):
+    assert column_values(COLUMN_PARSERS[method]([])) == []
+
+
+def test_parse_columns_matches_per_record_parsing(generator, make_records):
+    records = make_records(2000, seed=1) + [{}]
+    columns = parse_columns(records, NUMERIC_FIELDS)
+    for label, key, method in NUMERIC_FIELDS:
+        expected = scalar_column(generator, method, [record.get(label, '') for record in records])
+        assert column_values(columns[key]) == expected, key
+
+
+def test_parse_property_batch_matches_parse_property_data(generator, make_records):
+    records = make_records(200, seed=2)
+    for record in records:
+        record['所在地'] = '東京都千代田区丸の内1-1'
+    assert generator.parse_property_batch(records) == [generator.parse_property_data(record) for record in records]
+
+
+def test_process_ocr_texts_matches_process_ocr_text(generator):
+    texts = ['所在地 東京都港区芝浦1丁目\n価格 5,480万円\n専有面積 65.5㎡\n築年月 2019年3月築',
+             '価格 １，２３４万円 総戸数 300戸\n更新日 2025年02月30日', '', 'noise only']
+    assert generator.process_ocr_texts(texts) == [generator.process_ocr_text(text) for text in texts]
@@ -0,0 +1,187 @@
+import itertools
+import sqlite3
+import sys
+import types
+
+import pytest
+
+from db_loader import PropertyLoader
+from sql_output import ROW_KEYS, GeoPoint, PropertyRecord, copy_text_line
+
+BAD = 'rejected'
+
+
+def row(address, **values):
+    return PropertyRecord._make([None] * len(ROW_KEYS))._replace(address=address, **values)
+
+
+class FakeConnection:
+    """psycopg2 connection stand-in: statements run in a transaction that rejects any row addressed BAD"""
+
+    def __init__(self, database):
+        self.database = database
+        self.pending = []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def commit(self):
+        for statement in self.pending:
+            self.database.log.append(statement)
+        self.database.commits += 1
+        self.pending = []
+
+    def rollback(self):
+        self.database.rollbacks += 1
+        self.pending = []
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, sql, params=None):
+        if 'nextval' in sql:
+            self.rows = [(self.conn.database.allocate(),) for _ in range(params[0])]
+        self.conn.pending.append((sql, params))
+
+    def fetchall(self):
+        return self.rows
+
+    def copy_expert(self, sql, stream):
+        data = stream.read()
+        if BAD in data:
+            raise ValueError('bad row')
+        self.conn.pending.append((sql, data))
+
+
+class FakeDatabase:
+    def __init__(self):
+        # The id sequence; next() on a count is atomic, as batches may run on pool threads
+        self.ids = itertools.count(101)
+        self.log, self.commits, self.rollbacks, self.checked_out = [], 0, 0, 0
+
+    def allocate(self):
+        return next(self.ids)
+
+
+@pytest.fixture
+def database(monkeypatch):
+    """A fake psycopg2 whose pool hands out FakeConnections to one FakeDatabase"""
+    database = FakeDatabase()
+
+    class ThreadedConnectionPool:
+        def __init__(self, minconn, maxconn, dsn):
+            pass
+
+        def getconn(self):
+            database.checked_out += 1
+            return FakeConnection(database)
+
+        def putconn(self, conn):
+            database.checked_out -= 1
+
+        def closeall(self):
+            pass
+
+    def execute_values(cur, sql, argslist, template=None, page_size=100, fetch=False):
+        assert page_size == len(argslist) and fetch
+        if any(BAD in params for params in argslist):
+            raise ValueError('bad row')
+        cur.conn.pending.append((sql, argslist, template))
+        return [(database.allocate(),) for _ in argslist]
+
+    psycopg2 = types.ModuleType('psycopg2')
+    psycopg2.pool = types.SimpleNamespace(ThreadedConnectionPool=ThreadedConnectionPool)
+    psycopg2.extras = types.SimpleNamespace(execute_values=execute_values)
+    monkeypatch.setitem(sys.modules, 'psycopg2', psycopg2)
+    monkeypatch.setitem(sys.modules, 'psycopg2.pool', psycopg2.pool)
+    monkeypatch.setitem(sys.modules, 'psycopg2.extras', psycopg2.extras)
+    return database
+
+
+def load(loader, rows, replaces=None):
+    replaces = replaces or {}
+    for record in rows:
+        loader.add(record, source=record.address, replaces=replaces.get(record.address))
+    stats = loader.close()
+    return stats, {source: (row_id, error) for source, row_id, error in loader.take_outcomes()}
+
+
+def test_values_binds_rows_and_returns_their_ids(database):
+    loader = PropertyLoader('host=db', batch_size=10, pool_size=1)
+    point = GeoPoint(139.7, 35.6)
+    stats, outcomes = load(loader, [row('a', location=point), row('b')], replaces={'a': 7})
+
+    assert outcomes == {'a': (101, None), 'b': (102, None)}
+    assert (stats['rows_loaded'], stats['batches'], database.commits) == (2, 1, 1)
+    delete, (insert, params, template) = database.log
+    assert delete == ('DELETE FROM properties WHERE id = ANY(%s)', ([7],))
+    assert insert.endswith('VALUES %s RETURNING id') and 'ST_GeomFromEWKT(%s)' in template
+    assert params[0].location == 'SRID=4326;POINT(139.7 35.6)' and params[1].location is None
+
+
+def test_copy_draws_ids_from_the_sequence(database):
+    loader = PropertyLoader('host=db', batch_size=10, pool_size=1, method='copy')
+    rows = [row('a'), row('b'), row('c')]
+    stats, outcomes = load(loader, rows)
+
+    assert outcomes == {'a': (101, None), 'b': (102, None), 'c': (103, None)}
+    (allocate, count), (copy, data) = database.log
+    assert 'nextval' in allocate and count == (3,)
+    assert copy.startswith('COPY properties (id, ')
+    assert data == ''.join(f"{row_id}\t{copy_text_line(record)}" for row_id, record in zip((101, 102, 103), rows))
+
+
+@pytest.mark.parametrize('method', ['values', 'copy'])
+def test_failed_batch_rolls_back_and_retries_row_by_row(database, method):
+    loader = PropertyLoader('host=db', batch_size=10, pool_size=1, method=method)
+    stats, outcomes = load(loader, [row('a'), row(BAD), row('c')], replaces={'a': 1, BAD: 2})
+
+    assert (stats['rows_loaded'], stats['rows_failed']) == (2, 1)
+    assert outcomes['a'][1] is None and outcomes['c'][1] is None
+    assert outcomes[BAD] == (None, 'bad row')
+    assert loader.errors == [f"{BAD}: bad row"]
+    # The batch and the bad row's retry were rolled back, with the delete of the row it replaced
+    assert database.rollbacks == 2 and database.checked_out == 0
+    deletes = [params for sql, params, *_ in database.log if sql.startswith('DELETE')]
+    assert deletes == [([1],)]
+
+
+def test_background_batches_report_every_row(database):
+    loader = PropertyLoader('host=db', batch_size=2, pool_size=3)
+    stats, outcomes = load(loader, [row(str(i)) for i in range(9)])
+
+    assert (stats['rows_loaded'], stats['batches']) == (9, 5)
+    assert sorted(row_id for row_id, _ in outcomes.values()) == list(range(101, 110))
+
+
+def sqlite_rows(path):
+    conn = sqlite3.connect(path)
+    try:
+        return dict(conn.execute('SELECT id, address FROM properties'))
+    finally:
+        conn.close()
+
+
+def test_sqlite_failed_batch_is_rolled_back(tmp_path):
+    path = str(tmp_path / 'properties.db')
+    _, first = load(PropertyLoader(f'sqlite:///{path}'), [row('old a'), row('old b')])
+    # SQLite cannot bind an arbitrary object, so only that row fails
+    bad = row(object())
+    loader = PropertyLoader(f'sqlite:///{path}', batch_size=10)
+    loader.add(row('a'), source='a', replaces=first['old a'][0])
+    loader.add(bad, source='bad', replaces=first['old b'][0])
+    loader.add(row('c'), source='c')
+    stats = loader.close()
+
+    assert (stats['rows_loaded'], stats['rows_failed']) == (2, 1)
+    # 'old b' survives: its delete went with the rejected row
+    assert sorted(sqlite_rows(path).values()) == ['a', 'c', 'old b']
@@ -0,0 +1,80 @@
+import random
+import re
+
+import pytest
+
+from field_scanner import LabelScanner, scan_labels
+from property_sql_generator import PropertySQLGenerator
+from synthetic_listings import listing_text, random_listing
+
+# The per-field regexes the scanner replaced: field -> (label, lookahead
+# stop tokens the value was cut before)
+BASELINE = {
+    '所在地': ('所在地', []), '価格': ('価格', ['万円']), '交通': ('交通', ['駅']),
+    '修繕積立金': ('修繕積立金', ['円']), 'その他費用': ('その他費用', []), '間取り': ('間取り', []),
+    '専有面積': ('専有面積', ['㎡', 'm']), '築年月': ('築年月', ['築']), '向き': ('向き', []),
+    'バルコニー': ('バルコニー', ['㎡', 'm']), '現況': ('現況', []), '駐車場': ('駐車場', []),
+    '建物構造': ('建物構造', ['造']), '総戸数': ('総戸数', ['戸']), '管理会社': ('管理会社', []),
+    '管理形態': ('管理形態', []), '土地権利': ('土地権利', []), '取引態様': ('取引態様', []),
+    '更新日': ('更新日', ['日']), '次回更新予定': ('次回更新予定', ['日']), '物件番号': ('物件番号', []),
+}
+COMPANIES = ['三井不動産レジデンシャルサービス', '(株)東急コミュニティー', '大京アステージ']
+
+
+@pytest.fixture(scope='module')
+def generator():
+    return PropertySQLGenerator(quiet=True)
+
+
+def baseline_value(field, row_text):
+    """What the baseline regex found in a table row on its own"""
+    label, stop_tokens = BASELINE[field]
+    lookahead = '|'.join(['\n'] + [re.escape(token) for token in stop_tokens] + ['$'])
+    match = re.search(rf'{label}[：:\s]*(.+?)(?={lookahead})', row_text)
+    return match.group(1).strip() if match else None
+
+
+def realistic_rows(seed):
+    rng = random.Random(seed)
+    rows, _ = random_listing(rng)
+    # Next to 管理形態, whose value may itself start with 管理会社
+    management_form = [label for label, _ in rows].index('管理形態')
+    rows.insert(management_form + rng.randint(0, 1), ('管理会社', rng.choice(COMPANIES)))
+    rows.insert(rng.randrange(len(rows)), ('その他費用', '-'))
+    rows.insert(rng.randrange(len(rows)), ('駐車場', rng.choice(['空有', '無', '敷地内 5,000円／月'])))
+    return rows
+
+
+@pytest.mark.parametrize('columns', [1, 2, 3])
+@pytest.mark.parametrize('seed', range(20))
+def test_fields_match_the_baseline_parser_per_row(generator, seed, columns):
+    rows = realistic_rows(seed)
+    data = generator.parse_ocr_text_to_dict(listing_text(rows, columns))
+    for label, value in rows:
+        if label in BASELINE:
+            assert data.get(label) == baseline_value(label, f"{label} {value}"), (label, value)
+
+
+@pytest.mark.parametrize('text', [
+    '管理形態 管理会社に全部委託\n管理会社 三井不動産レジデンシャルサービス',
+    '管理形態 管理会社に全部委託 管理会社 三井不動産レジデンシャルサービス',
+    '管理会社 三井不動産レジデンシャルサービス 管理形態 管理会社に全部委託',
+])
+def test_label_at_a_value_start_is_part_of_the_value(text):
+    scan = scan_labels(text)
+    assert scan.values('管理形態') == ['管理会社に全部委託']
+    assert scan.values('管理会社') == ['三井不動産レジデンシャルサービス']
+
+
+def test_label_starting_the_next_line_is_the_next_row():
+    scan = scan_labels('その他費用\n間取り 3LDK\n所在地\n東京都港区芝浦1丁目')
+    assert scan.values('その他費用') == ['']
+    assert scan.values('間取り') == ['3LDK']
+    assert scan.values('所在地') == ['東京都港区芝浦1丁目']
+
+
+def test_longest_label_wins_and_first_cuts_at_stop_tokens():
+    scan = LabelScanner(['面積', '専有面積', '価格']).scan('価格 ５,４８０万円 専有面積：65.5㎡')
+    assert scan.values('面積') == []
+    assert scan.first(['専有面積'], ['㎡']) == '65.5'
+    assert scan.first(['価格', '専有面積'], ['万円']) == '５,４８０'
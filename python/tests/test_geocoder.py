@@ -0,0 +1,117 @@
+import os
+import pickle
+
+import numpy as np
+import pytest
+
+from geocoder import GAZETTEER_FILE, Gazetteer, kanji_number, normalize_town, read_gazetteer
+from sql_output import GeoPoint
+
+ROWS = [
+    ('東京都', '新宿区', '西新宿四丁目', 35.6870, 139.6900),
+    ('東京都', '新宿区', '西新宿六丁目', 35.6930, 139.6910),
+    ('東京都', '新宿区', '歌舞伎町', 35.6950, 139.7020),
+    ('東京都', '武蔵村山市', '学園四丁目', 35.7530, 139.3860),
+    ('神奈川県', '横浜市中区', '山下町', 35.4440, 139.6450),
+]
+
+
+def write_gazetteer(path, rows, encoding='utf-8'):
+    with open(path, 'w', encoding=encoding, newline='') as f:
+        f.write('都道府県名,市区町村名,大字町丁目名,緯度,経度\n')
+        for row in rows:
+            f.write(','.join(str(value) for value in row) + '\n')
+    return str(path)
+
+
+@pytest.fixture
+def gazetteer(tmp_path):
+    return Gazetteer([write_gazetteer(tmp_path / 'towns.csv', ROWS)])
+
+
+@pytest.mark.parametrize('text, value', [('三', 3), ('十', 10), ('十二', 12), ('二十', 20), ('二十四', 24)])
+def test_kanji_number(text, value):
+    assert kanji_number(text) == value
+
+
+@pytest.mark.parametrize('town, expected', [
+    ('西新宿四丁目', '西新宿4丁目'),
+    ('西新宿4丁目15-3', '西新宿4丁目15-3'),
+    ('西新宿4-15-3', '西新宿4丁目-15-3'),
+    ('歌舞伎町', '歌舞伎町'),
+])
+def test_normalize_town(town, expected):
+    assert normalize_town(town) == expected
+
+
+@pytest.mark.parametrize('address, expected', [
+    # Chome, written with kanji, ASCII or fullwidth digits, or dashes
+    ('東京都新宿区西新宿四丁目15-3', GeoPoint(139.6900, 35.6870)),
+    ('東京都新宿区西新宿4-15-3', GeoPoint(139.6900, 35.6870)),
+    ('東京都 新宿区 西新宿６丁目', GeoPoint(139.6910, 35.6930)),
+    ('武蔵村山市学園4丁目5番', GeoPoint(139.3860, 35.7530)),
+    # A chome the gazetteer lacks falls back to its town, then the municipality
+    ('東京都新宿区西新宿8-1', GeoPoint(139.6905, 35.69)),
+    ('東京都新宿区歌舞伎町1-2-3', GeoPoint(139.7020, 35.6950)),
+    ('東京都新宿区大久保2丁目', GeoPoint(139.694333, 35.691667)),
+    # Designated-city wards are listed with their city
+    ('神奈川県横浜市中区山下町10', GeoPoint(139.6450, 35.4440)),
+])
+def test_geocode(gazetteer, address, expected):
+    point = gazetteer.geocode(address)
+    assert point == pytest.approx(expected)
+
+
+@pytest.mark.parametrize('address', [None, '', '東京都港区芝浦1丁目', '新宿', '大阪府大阪市北区梅田1丁目'])
+def test_unknown_addresses(gazetteer, address):
+    assert gazetteer.geocode(address) is None
+
+
+def test_geocode_batch_matches_geocode(gazetteer):
+    addresses = ['東京都新宿区西新宿4-15-3', None, '東京都港区芝浦1丁目', '東京都新宿区西新宿4-15-3',
+                 '東京都新宿区大久保2丁目']
+    lng, lat = gazetteer.geocode_batch(addresses)
+    for address, x, y in zip(addresses, lng, lat):
+        point = gazetteer.geocode(address)
+        if point is None:
+            assert np.isnan(x) and np.isnan(y)
+        else:
+            assert (x, y) == point
+    assert gazetteer.locate.cache_info().currsize == 3
+
+
+def test_shift_jis_and_several_files(tmp_path):
+    first = write_gazetteer(tmp_path / 'tokyo.csv', ROWS[:4], encoding='cp932')
+    second = write_gazetteer(tmp_path / 'kanagawa.csv', ROWS[4:])
+    assert read_gazetteer(first)[0] == ROWS[0]
+    gazetteer = Gazetteer([first, second])
+    assert gazetteer.geocode('神奈川県横浜市中区山下町10') == GeoPoint(139.6450, 35.4440)
+    assert gazetteer.geocode('東京都新宿区歌舞伎町1') == GeoPoint(139.7020, 35.6950)
+
+
+def test_missing_columns(tmp_path):
+    path = tmp_path / 'bad.csv'
+    path.write_text('都道府県名,市区町村名,緯度,経度\n東京都,新宿区,35.6,139.7\n', encoding='utf-8')
+    with pytest.raises(ValueError, match='大字町丁目名'):
+        Gazetteer([str(path)])
+
+
+def test_version_follows_the_files(tmp_path):
+    path = write_gazetteer(tmp_path / 'towns.csv', ROWS)
+    version = Gazetteer([path]).version
+    assert version == Gazetteer([path]).version
+    write_gazetteer(path, ROWS[:2])
+    assert Gazetteer([path]).version != version
+
+
+def test_pickled_gazetteer_reloads_its_files(gazetteer):
+    copy = pickle.loads(pickle.dumps(gazetteer))
+    assert copy.paths == gazetteer.paths and len(copy) == len(gazetteer)
+    assert copy.geocode('東京都新宿区西新宿4-15-3') == gazetteer.geocode('東京都新宿区西新宿4-15-3')
+
+
+def test_bundled_gazetteer():
+    gazetteer = Gazetteer()
+    assert gazetteer.paths == [GAZETTEER_FILE] and os.path.exists(GAZETTEER_FILE)
+    for prefecture, municipality, town, lat, lng in read_gazetteer(GAZETTEER_FILE)[:20]:
+        assert gazetteer.geocode(f'{prefecture}{municipality}{town}1-1') == GeoPoint(lng, lat)
@@ -0,0 +1,69 @@
+import os
+
+import pytest
+
+import ocr_cache
+from ocr_backends import OCRBackend
+from ocr_cache import OCRCache
+from batch_processor import iter_batch
+from property_sql_generator import PropertySQLGenerator
+
+
+class MarkerBackend(OCRBackend):
+    """Backend that leaves a file named after the process that closed it"""
+
+    name = 'marker'
+
+    def __init__(self, marker_dir):
+        self.marker_dir = marker_dir
+
+    def image_to_string(self, image, lang, config=''):
+        return ''
+
+    def get_languages(self):
+        return ['eng']
+
+    def close(self):
+        open(os.path.join(self.marker_dir, f'closed-{os.getpid()}'), 'w').close()
+
+
+def test_backend_interface_is_abstract():
+    with pytest.raises(TypeError):
+        OCRBackend()
+
+    class Partial(OCRBackend):
+        def image_to_string(self, image, lang, config=''):
+            return ''
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+def test_cache_entries_are_per_backend(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, 'tesseract_version', lambda cache_dir: '5.3.0')
+    cache = OCRCache(str(tmp_path))
+    assert cache.make_key('h', 'original', 'jpn', '', 'tesserocr') != \
+        cache.make_key('h', 'original', 'jpn', '', 'pytesseract')
+
+    assert cache.get_or_compute('h', 'original', 'jpn', '', 'tesserocr', lambda: 'one') == 'one'
+    assert cache.get_or_compute('h', 'original', 'jpn', '', 'pytesseract', lambda: 'two') == 'two'
+    assert cache.get_or_compute('h', 'original', 'jpn', '', 'tesserocr', lambda: 'three') == 'one'
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+    cache.close()
+
+
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_batch_closes_each_worker_backend(tmp_path, jobs):
+    markers = tmp_path / 'markers'
+    markers.mkdir()
+    paths = [str(tmp_path / f'missing-{i}.png') for i in range(4)]
+    results = list(iter_batch(paths, PropertySQLGenerator, jobs=jobs,
+                              generator_kwargs={'ocr_backend': MarkerBackend(str(markers)), 'quiet': True}))
+
+    assert all(result['error'] for result in results)
+    closed = os.listdir(markers)
+    if jobs == 1:
+        assert closed == [f'closed-{os.getpid()}']
+    else:
+        # Every pool worker that started closed its own copy of the backend
+        assert 1 <= len(closed) <= jobs and f'closed-{os.getpid()}' not in closed
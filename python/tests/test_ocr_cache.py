@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+import pytest
+
+import ocr_cache
+from ocr_backends import create_backend
+from ocr_cache import OCRCache, tesseract_capabilities, tesseract_languages, tesseract_version
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, 'tesseract_version', lambda cache_dir: '5.3.0')
+    cache = OCRCache(str(tmp_path / 'cache'))
+    yield cache
+    cache.close()
+
+
+def test_hits_and_misses(cache):
+    assert cache.get_or_compute('h', 'original', 'jpn', '', 'pytesseract', lambda: 'text') == 'text'
+    assert cache.get_or_compute('h', 'original', 'jpn', '', 'pytesseract', lambda: 'other') == 'text'
+    assert cache.get(cache.make_key('h', 'gray', 'jpn', '', 'pytesseract')) is None
+    assert cache.stats() == {'hits': 1, 'misses': 2}
+
+
+def test_threads_sharing_a_cache_count_every_lookup(cache):
+    rounds, threads = 200, 8
+
+    def work(index):
+        for i in range(rounds):
+            cache.get_or_compute(f'h{i % 20}', 'original', 'jpn', '', 'pytesseract', lambda: f'text {index}')
+
+    workers = [threading.Thread(target=work, args=(index,)) for index in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    stats = cache.stats()
+    assert stats['hits'] + stats['misses'] == rounds * threads
+    assert stats['misses'] >= 20
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, 'tesseract_version', lambda cache_dir: '5.3.0')
+    cache = OCRCache(str(tmp_path), max_bytes=25)
+    for name in ('a', 'b', 'c'):
+        cache.put(name, name * 10)
+        # Touch 'a' so 'b' is the least recently used
+        cache.get('a')
+    assert [cache.get(name) is not None for name in ('a', 'b', 'c')] == [True, False, True]
+    cache.close()
+
+
+def test_refresh_ignores_and_overwrites_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(ocr_cache, 'tesseract_version', lambda cache_dir: '5.3.0')
+    OCRCache(str(tmp_path)).put('key', 'old')
+    refreshing = OCRCache(str(tmp_path), refresh=True)
+    assert refreshing.get_or_compute('h', 'original', 'jpn', '', 'b', lambda: 'new') == 'new'
+    assert refreshing.stats() == {'hits': 0, 'misses': 1}
+    assert OCRCache(str(tmp_path)).get(refreshing.make_key('h', 'original', 'jpn', '', 'b')) == 'new'
+
+
+def test_probe_is_cached_in_the_configured_directory(tmp_path, monkeypatch):
+    probes = []
+
+    def probe(binary):
+        probes.append(binary)
+        return {'version': '5.3.0', 'languages': ['eng', 'jpn'], 'tessdata': None}
+
+    binary = tmp_path / 'tesseract'
+    binary.write_text('')
+    monkeypatch.setattr(ocr_cache, '_tesseract_binary', lambda: str(binary))
+    monkeypatch.setattr(ocr_cache, '_probe_tesseract', probe)
+    tesseract_capabilities.cache_clear()
+    try:
+        cache_dir = str(tmp_path / 'cache')
+        assert tesseract_version(cache_dir) == '5.3.0'
+        with open(os.path.join(cache_dir, ocr_cache.PROBE_FILE), encoding='utf-8') as f:
+            assert json.load(f)['languages'] == ['eng', 'jpn']
+        assert create_backend('pytesseract', cache_dir=cache_dir).get_languages() == ['eng', 'jpn']
+
+        # A new process reads the stored probe instead of running tesseract again
+        tesseract_capabilities.cache_clear()
+        assert tesseract_languages(cache_dir) == ['eng', 'jpn']
+        assert probes == [str(binary)]
+    finally:
+        tesseract_capabilities.cache_clear()
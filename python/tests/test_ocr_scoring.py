@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from ocr_scoring import GARBAGE_WINDOW, JAPANESE_RANGES, score_components
+
+
+def is_japanese(char):
+    return any(low <= ord(char) <= high for low, high in JAPANESE_RANGES)
+
+
+def garbage_chars(text):
+    """Per-character reference: ASCII letters with no Japanese character within GARBAGE_WINDOW"""
+    count = 0
+    for i, char in enumerate(text):
+        if char.isascii() and char.isalpha():
+            neighbours = text[max(0, i - GARBAGE_WINDOW):i + GARBAGE_WINDOW + 1]
+            count += not any(is_japanese(c) for c in neighbours)
+    return count
+
+
+@pytest.mark.parametrize('text', ['a', 'ab', '価', 'a価', 'x価格', '1LDK', 'abcd', '駅 ab'])
+def test_texts_shorter_than_the_window(text):
+    components = score_components(text)
+    assert components['length'] == len(text.strip())
+    assert components['garbage_chars'] == garbage_chars(text)
+
+
+def test_garbage_matches_the_per_character_reference():
+    rng = random.Random(6)
+    alphabet = 'abXY 12価格駅ダ\n'
+    for _ in range(500):
+        text = ''.join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+        assert score_components(text)['garbage_chars'] == garbage_chars(text), text
+
+
+def test_empty_text_scores_zero():
+    assert score_components('')['score'] == 0
+    assert score_components('   ')['score'] == 0
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+import pytest
+from PIL import Image
+
+import preprocessing
+from preprocessing import VARIANTS, PreprocessingGraph
+from shared_images import SharedImageStore, attached
+from tracing import Tracer
+
+
+def screenshot(mode):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(200, 256, (60, 80, 3), dtype=np.uint8)
+    pixels[10:20, 5:70] = rng.integers(0, 60, (10, 65, 3), dtype=np.uint8)
+    pixels[35:45, 5:50] = 40
+    return Image.fromarray(pixels).convert(mode)
+
+
+def eager_variants(original):
+    """The variants as preprocess_image built them before the graph, all at once"""
+    array = np.array(original.convert('RGB') if original.mode not in ('L', 'RGB', 'RGBA') else original)
+    if array.ndim == 2:
+        gray = array
+    else:
+        gray = cv2.cvtColor(array, cv2.COLOR_RGBA2GRAY if array.shape[2] == 4 else cv2.COLOR_RGB2GRAY)
+    _, thresh = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    return {
+        'contrast': cv2.convertScaleAbs(gray, alpha=2.0, beta=0),
+        'threshold': thresh,
+        'denoised': cv2.fastNlMeansDenoising(gray),
+        'adaptive': cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 2),
+        'morphological': cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, np.ones((1, 1), np.uint8)),
+    }
+
+
+def computed(tracer):
+    return [span['name'].split(':', 1)[1] for span in tracer.spans]
+
+
+@pytest.mark.parametrize('mode', ['RGB', 'RGBA', 'L', 'P'])
+@pytest.mark.parametrize('shared', [False, True])
+def test_variants_match_eager_preprocessing(mode, shared):
+    original = screenshot(mode)
+    with SharedImageStore() as store:
+        graph = PreprocessingGraph(original, store=store if shared else None)
+        assert graph.get('original') is original
+        for name, expected in eager_variants(original).items():
+            assert np.array_equal(np.asarray(graph.get(name)), expected), name
+            if shared:
+                with attached(graph.handle(name)) as array:
+                    assert np.array_equal(array, expected), name
+                del array
+        graph.release_all()
+        assert store.held_bytes == 0
+
+
+def test_variants_are_computed_on_demand_and_once():
+    tracer = Tracer()
+    graph = PreprocessingGraph(screenshot('RGB'), tracer)
+    threshold = graph.get('threshold')
+    assert computed(tracer) == ['array', 'gray', 'otsu', 'threshold']
+
+    assert graph.get('threshold') is threshold
+    graph.get('morphological')
+    graph.get('contrast')
+    # Shared intermediates are reused; the expensive denoise never ran
+    assert computed(tracer) == ['array', 'gray', 'otsu', 'threshold', 'morphological', 'contrast']
+    assert set(graph.report()) == set(computed(tracer))
+
+
+def test_retain_releases_what_remaining_variants_do_not_need():
+    tracer = Tracer()
+    graph = PreprocessingGraph(screenshot('RGB'), tracer)
+    for name in VARIANTS:
+        graph.get(name)
+    peak = graph.peak_bytes
+    assert peak == graph.held_bytes == sum(graph.sizes.values())
+
+    graph.retain(['morphological'])
+    assert set(graph._cache) == {'original', 'array', 'gray', 'otsu', 'morphological'}
+    assert graph.held_bytes == sum(graph.sizes[name] for name in graph._cache)
+    assert graph.peak_bytes == peak
+
+    # A released node is recomputed from the ones still held
+    del tracer.spans[:]
+    graph.get('contrast')
+    assert computed(tracer) == ['contrast']
+    graph.release_all()
+    assert graph._cache == {} and graph.held_bytes == 0
+
+
+def test_failure_is_remembered(monkeypatch):
+    calls = []
+
+    def broken(gray, out=None):
+        calls.append(gray)
+        raise cv2.error('denoise failed')
+
+    monkeypatch.setitem(preprocessing.NODES, 'denoised', (('gray',), broken))
+    graph = PreprocessingGraph(screenshot('RGB'))
+    for _ in range(2):
+        with pytest.raises(cv2.error):
+            graph.get('denoised')
+    assert len(calls) == 1
+    assert 'denoised' not in graph.report()
+    with pytest.raises(KeyError):
+        graph.get('sharpened')
+
+
+def test_handle_needs_a_store():
+    with pytest.raises(ValueError):
+        PreprocessingGraph(screenshot('RGB')).handle('gray')
@@ -0,0 +1,79 @@
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+import pytest
+
+from shared_images import SharedImageStore, attached, share_resource_tracker
+
+
+def checksum(handle):
+    with attached(handle) as array:
+        return array.shape, array.dtype.str, float(array.sum())
+
+
+def invert(handle):
+    with attached(handle) as array:
+        np.subtract(255, array, out=array)
+
+
+def exists(name):
+    try:
+        segment = shared_memory.SharedMemory(name=name)
+    except FileNotFoundError:
+        return False
+    segment.close()
+    return True
+
+
+@pytest.mark.parametrize('shape, dtype', [((48, 64), np.uint8), ((20, 30, 3), np.uint8), ((7, 5), np.float32)])
+def test_handle_round_trip(shape, dtype):
+    rng = np.random.default_rng(0)
+    source = (rng.random(shape) * 255).astype(dtype)
+    with SharedImageStore() as store:
+        shared = store.share(source)
+        handle = pickle.loads(pickle.dumps(store.handle(shared)))
+        with attached(handle) as array:
+            assert array.shape == shape and array.dtype == np.dtype(dtype)
+            assert np.array_equal(array, source)
+        del array, shared
+
+
+def test_worker_processes_see_and_modify_the_pixels():
+    share_resource_tracker()
+    source = np.arange(64 * 48, dtype=np.uint32).reshape(64, 48).astype(np.uint8)
+    with SharedImageStore() as store, ProcessPoolExecutor(max_workers=2) as pool:
+        shared = store.share(source)
+        handle = store.handle(shared)
+        assert pool.submit(checksum, handle).result() == ((64, 48), '|u1', float(source.sum()))
+        pool.submit(invert, handle).result()
+        assert np.array_equal(shared, 255 - source)
+        del shared
+
+
+def test_release_and_close_unlink_segments():
+    store = SharedImageStore()
+    first, second = store.allocate((10, 10)), store.allocate((5, 5))
+    names = [store.handle(first).name, store.handle(second).name]
+    assert store.held_bytes == 125 and all(exists(name) for name in names)
+
+    store.release(first)
+    assert not exists(names[0]) and exists(names[1])
+    assert store.held_bytes == 25
+    # The array is still mapped, so it stays usable after its segment is unlinked
+    first[...] = 7
+    assert first.sum() == 700
+    del first
+
+    store.close()
+    assert not exists(names[1])
+    del second
+    store.close()
+    assert store.peak_bytes == 125
+
+
+def test_handle_of_a_foreign_array():
+    with SharedImageStore() as store:
+        with pytest.raises(ValueError):
+            store.handle(np.zeros((2, 2), dtype=np.uint8))
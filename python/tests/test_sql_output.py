@@ -0,0 +1,103 @@
+import csv
+import io
+
+import pytest
+
+from property_sql_generator import PropertySQLGenerator
+from sql_output import (COLUMN_NAMES, ROW_KEYS, GeoPoint, PropertyRecord, as_record, copy_text_line, csv_line,
+                        format_array_literal, render_document, render_row)
+
+COPY_UNESCAPES = {'\\': '\\', 't': '\t', 'n': '\n', 'r': '\r', 'b': '\b', 'f': '\f', 'v': '\v'}
+
+
+def read_copy_line(line):
+    """Split a COPY text-format line back into values, as the server would"""
+    assert line.endswith('\n') and '\n' not in line[:-1]
+    values = []
+    for field in line[:-1].split('\t'):
+        if field == '\\N':
+            values.append(None)
+            continue
+        chars, i = [], 0
+        while i < len(field):
+            if field[i] == '\\':
+                chars.append(COPY_UNESCAPES[field[i + 1]])
+                i += 2
+            else:
+                chars.append(field[i])
+                i += 1
+        values.append(''.join(chars))
+    return values
+
+
+AWKWARD = ['タブ\t入り', '改行\n入り\r\n', 'C:\\path\\N', '\\N', '"引用"', '', 'a,b', '\b\f\v']
+
+
+def test_copy_line_escapes_separators_and_backslashes():
+    line = copy_text_line(AWKWARD + [None])
+    assert read_copy_line(line) == AWKWARD + [None]
+    # A literal backslash-N is data, only the bare marker is NULL
+    assert line.split('\t')[3] == '\\\\N'
+
+
+def test_csv_line_quotes_every_value_and_leaves_null_bare():
+    line = csv_line(AWKWARD + [None])
+    assert line.endswith(',\n')
+    (fields,) = csv.reader(io.StringIO(line))
+    assert fields == AWKWARD + ['']
+    # The empty string is quoted, so it stays distinct from NULL
+    assert ',"",' in line
+
+
+def test_values_use_postgres_text_input():
+    values = [GeoPoint(139.7454, 35.6586), ['駅徒歩5分', None, 'say "hi"', 'a\\b'], True, False, 5480, 65.5]
+    expected = ['SRID=4326;POINT(139.7454 35.6586)', '{"駅徒歩5分",NULL,"say \\"hi\\"","a\\\\b"}',
+                'true', 'false', '5480', '65.5']
+    assert read_copy_line(copy_text_line(values)) == expected
+    assert next(csv.reader(io.StringIO(csv_line(values)))) == expected
+
+
+@pytest.mark.parametrize('items, expected', [
+    ([], '{}'),
+    ([None], '{NULL}'),
+    (['NULL'], '{"NULL"}'),
+    (['{a,b}'], '{"{a,b}"}'),
+    (['\\"'], '{"\\\\\\""}'),
+])
+def test_format_array_literal(items, expected):
+    assert format_array_literal(items) == expected
+
+
+def test_render_document():
+    line = copy_text_line(['a', None])
+    assert render_document([line], 'copy') == (f"COPY properties ({', '.join(COLUMN_NAMES)}) FROM STDIN;\n"
+                                               f"{line}\\.\n")
+    rows = list(csv.reader(io.StringIO(render_document([csv_line(['a', None])], 'csv'))))
+    assert rows == [COLUMN_NAMES, ['a', '']]
+
+
+def test_property_record_follows_the_column_order():
+    assert PropertyRecord._fields == tuple(ROW_KEYS) and len(ROW_KEYS) == len(COLUMN_NAMES)
+    assert not hasattr(PropertyRecord._make([None] * len(ROW_KEYS)), '__dict__')
+
+
+def test_as_record():
+    record = PropertyRecord._make(range(len(ROW_KEYS)))
+    assert as_record(record) is record
+    # Missing keys are NULL, keys that are not columns are ignored
+    built = as_record({'address': '東京都港区芝浦1丁目', 'price': 5480, 'parsed_at': 'today'})
+    assert (built.address, built.price) == ('東京都港区芝浦1丁目', 5480)
+    assert sum(value is not None for value in built) == 2
+    assert as_record(record._asdict()) == record
+
+
+def test_records_and_row_dicts_render_alike():
+    generator = PropertySQLGenerator(quiet=True, output_format='row')
+    record = generator.render_record({'address': '東京都港区芝浦1丁目', 'price': 5480, 'area': 65.5, 'layout': '3LDK',
+                                      'location': GeoPoint(139.7, 35.6)})
+    assert isinstance(record, PropertyRecord)
+    assert (record.price, record.area, record.price_per_sqm, record.layout) == (5480, 65.5, 83, '3LDK')
+    for output_format in ('copy', 'csv'):
+        assert render_row(record, output_format) == render_row(record._asdict(), output_format)
+    with pytest.raises(ValueError):
+        render_row(record, 'sql')
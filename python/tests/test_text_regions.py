@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+from text_regions import (TextRegion, crop_region, detect_text_regions, merge_regions, region_key,
+                          region_pixels, select_regions)
+
+TABLE_TOP, ROW_HEIGHT, ROWS = 450, 36, 8
+
+
+def listing_page(chrome=True):
+    """
+    A banner, a photo and a two-column key/value table with rules, as
+    grayscale; without chrome, only the table text
+    """
+    rng = np.random.default_rng(0)
+    image = Image.new('L', (900, 1000), 255)
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default(size=18)
+    if chrome:
+        draw.rectangle((0, 0, 899, 60), fill=30)
+        image.paste(Image.fromarray(rng.integers(0, 256, (260, 380), dtype=np.uint8)), (40, 100))
+        for row in range(ROWS + 1):
+            draw.line((40, TABLE_TOP + row * ROW_HEIGHT - 8, 860, TABLE_TOP + row * ROW_HEIGHT - 8), fill=0)
+        draw.line((400, TABLE_TOP - 8, 400, TABLE_TOP + ROWS * ROW_HEIGHT - 8), fill=0)
+    for row in range(ROWS):
+        y = TABLE_TOP + row * ROW_HEIGHT
+        draw.text((50, y), f'Price {3480 + row}', font=font, fill=0)
+        # Close enough to the column rule to be joined to it if the rule stayed
+        draw.text((408, y), f'Area 72.{row} Floor {row}F', font=font, fill=0)
+    return np.asarray(image)
+
+
+def text_outside(regions):
+    """Pixels of the table text not covered by any region"""
+    text = listing_page(chrome=False) < 255
+    for r in regions:
+        text[r.y:r.y + r.height, r.x:r.x + r.width] = False
+    return int(text.sum())
+
+
+@pytest.mark.parametrize('invert', [False, True])
+def test_regions_cover_the_table_text_only(invert):
+    gray = listing_page()
+    regions = detect_text_regions(255 - gray if invert else gray)
+
+    # One block per table column, in reading order, clear of the banner and photo
+    assert len(regions) == 2 and regions[0].x < regions[1].x
+    assert all(r.y >= TABLE_TOP - 10 and r.y + r.height <= TABLE_TOP + ROWS * ROW_HEIGHT for r in regions)
+    assert text_outside(regions) == 0
+
+    selected, coverage = select_regions(gray)
+    assert selected == regions
+    assert coverage == pytest.approx(region_pixels(regions) / gray.size) and coverage < 0.1
+
+
+def test_whole_image_when_there_is_nothing_to_crop():
+    assert select_regions(np.full((400, 400), 255, dtype=np.uint8)) == ([], 1.0)
+    # A page that is all text: cropping would not save anything
+    image = Image.new('L', (260, 260), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(10):
+        draw.text((4, 4 + line * 25), 'Price 3480 Area 72.5 Floor', font=ImageFont.load_default(size=20), fill=0)
+    gray = np.asarray(image)
+    assert detect_text_regions(gray)
+    assert select_regions(gray) == ([], 1.0)
+
+
+def test_merge_regions_joins_chains_of_overlaps():
+    regions = [TextRegion(0, 0, 10, 10), TextRegion(50, 50, 5, 5), TextRegion(8, 8, 10, 10),
+               TextRegion(16, 16, 10, 10), TextRegion(10, 0, 5, 5)]
+    assert sorted(merge_regions(regions)) == [TextRegion(0, 0, 26, 26), TextRegion(50, 50, 5, 5)]
+
+
+def test_crop_and_cache_key():
+    region = TextRegion(3, 2, 4, 5)
+    array = np.arange(100, dtype=np.uint8).reshape(10, 10)
+    assert np.array_equal(crop_region(array, region), array[2:7, 3:7])
+    assert np.array_equal(np.asarray(crop_region(Image.fromarray(array), region)), array[2:7, 3:7])
+    assert region_key('threshold', region) == 'threshold@3,2,4x5'
+    assert region_key('threshold', None) == 'threshold'
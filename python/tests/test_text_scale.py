@@ -0,0 +1,122 @@
+import io
+import asyncio
+import time
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw, ImageFont
+
+import text_scale
+from text_scale import (
+    MAX_OUTPUT_PIXELS, MAX_SCALE, MIN_SCALE, TARGET_TEXT_HEIGHT, TextScale,
+    estimate_text_height, normalize_image, scale_for, scaled_image_hash
+)
+
+
+def page(font_size, width=900, lines=8):
+    """Grayscale page of black Latin text at `font_size`"""
+    font = ImageFont.load_default(size=font_size)
+    image = Image.new('L', (width, (lines + 2) * font_size * 2), 255)
+    draw = ImageDraw.Draw(image)
+    for line in range(lines):
+        draw.text((20, (line + 1) * font_size * 2), 'Price 3480 Area 72.5 Floor 12F', font=font, fill=0)
+    return image
+
+
+@pytest.mark.parametrize('font_size', [12, 20, 32, 56])
+def test_estimate_follows_the_font_size(font_size):
+    height = estimate_text_height(np.asarray(page(font_size)))
+    # Glyph ink height is a fraction of the nominal font size
+    assert 0.5 * font_size <= height <= 1.0 * font_size
+
+
+def test_estimate_scales_with_the_image():
+    small = estimate_text_height(np.asarray(page(16)))
+    large = estimate_text_height(np.asarray(page(48)))
+    assert large / small == pytest.approx(3, rel=0.2)
+
+
+def test_blank_image_has_no_estimate():
+    assert estimate_text_height(np.full((400, 400), 255, dtype=np.uint8)) is None
+
+
+def test_scale_for_bounds():
+    assert scale_for(None, 10_000) == 1.0
+    assert scale_for(TARGET_TEXT_HEIGHT * 1.2, 10_000) == 1.0
+    assert scale_for(TARGET_TEXT_HEIGHT / 2, 10_000) == pytest.approx(2.0)
+    assert scale_for(1, 10_000) == MAX_SCALE
+    assert scale_for(1000, 10_000) == MIN_SCALE
+    # Never upscale past the output pixel budget
+    assert scale_for(5, MAX_OUTPUT_PIXELS) == pytest.approx(1.0)
+
+
+def test_normalize_image_reaches_the_target():
+    image, scaled = normalize_image(page(12).convert('RGB'))
+    assert scaled.scale > 1.5
+    assert scaled.pixels_after == image.width * image.height
+    height = estimate_text_height(np.asarray(image.convert('L')))
+    assert TARGET_TEXT_HEIGHT / 1.5 <= height <= TARGET_TEXT_HEIGHT * 1.5
+
+
+def test_scaled_image_hash():
+    assert scaled_image_hash('abc', None) == 'abc'
+    assert scaled_image_hash('abc', TextScale(30.0, 1.0, 1, 1, 1)) == 'abc'
+    assert scaled_image_hash('abc', TextScale(15.0, 2.0, 1, 4, 1)) == 'abc@2.0000'
+
+
+class RecordingCache:
+    """OCR cache stand-in recording the image hash each lookup used"""
+
+    def __init__(self):
+        self.hashes = {}
+
+    def make_key(self, image_hash, variant, lang, config, backend):
+        return image_hash
+
+    def get(self, key):
+        return None
+
+    def put(self, key, text):
+        self.hashes[text] = key
+
+
+class EchoTesseract:
+    """AsyncTesseract stand-in returning the size of the PNG it was given"""
+
+    name = 'pytesseract'
+
+    async def run(self, image_bytes, lang, config=''):
+        await asyncio.sleep(0.01)
+        with Image.open(io.BytesIO(image_bytes)) as image:
+            return f"{image.width}x{image.height}"
+
+
+def test_concurrent_async_loads_keep_their_own_scale(tmp_path, monkeypatch):
+    from ocr_cache import hash_file
+    from property_sql_generator import PropertySQLGenerator
+    paths, scales = [], {}
+    for name, scale, delay in (('slow.png', 0.5, 0.2), ('fast.png', 2.0, 0.0)):
+        path = str(tmp_path / name)
+        Image.new('L', (100, 40), 255).save(path)
+        paths.append(path)
+        scales[path] = (scale, delay)
+
+    def open_normalized(image_path, target):
+        scale, delay = scales[image_path]
+        time.sleep(delay)
+        image = Image.open(image_path).resize((int(100 * scale), int(40 * scale)))
+        return image, TextScale(target / scale, scale, 4000, image.width * image.height, 1)
+
+    monkeypatch.setattr(text_scale, 'open_normalized', open_normalized)
+    cache = RecordingCache()
+    generator = PropertySQLGenerator(ocr_cache=cache, quiet=True, text_height=TARGET_TEXT_HEIGHT)
+
+    async def run_both():
+        return await asyncio.gather(*(generator.extract_text_from_image_async(path, EchoTesseract())
+                                      for path in paths))
+
+    texts = asyncio.run(run_both())
+    assert texts == ['50x20', '200x80']
+    assert cache.hashes == {'50x20': hash_file(paths[0]) + '@0.5000', '200x80': hash_file(paths[1]) + '@2.0000'}
+    # Only the sync path reports through the shared attribute
+    assert generator.last_text_scale is None
@@ -0,0 +1,177 @@
+import os
+import sqlite3
+
+import pytest
+
+from db_loader import PropertyLoader
+from sql_output import ROW_KEYS, PropertyRecord
+from watch_folder import WorkQueue, DatabaseOutput, RotatingOutput, DONE, FAILED, PENDING, RUNNING
+
+
+def row(address):
+    return PropertyRecord._make([None] * len(ROW_KEYS))._replace(address=address)
+
+
+@pytest.fixture
+def queue(tmp_path):
+    with WorkQueue(str(tmp_path / 'queue.db'), max_attempts=2) as queue:
+        yield queue
+
+
+def state(queue, path):
+    return queue.conn.execute('SELECT state FROM work_queue WHERE path = ?', (path,)).fetchone()[0]
+
+
+def claim(queue, path, mtime_ns=1):
+    """Queue an image (again, when mtime_ns changed) and claim it"""
+    queue.enqueue(path, 100, mtime_ns)
+    assert queue.claim(10) == [path]
+
+
+def test_enqueue_only_requeues_modified_images(queue):
+    assert queue.enqueue('a.png', 100, 1)
+    assert not queue.enqueue('a.png', 100, 1)
+    assert queue.claim(10) == ['a.png']
+    queue.finish('a.png', 0.5)
+    assert not queue.enqueue('a.png', 100, 1)
+    assert state(queue, 'a.png') == DONE
+
+    assert queue.enqueue('a.png', 100, 2)
+    assert state(queue, 'a.png') == PENDING
+    assert queue.counts['enqueued'] == 2
+
+
+def test_claim_takes_the_oldest_new_images(queue):
+    for i in range(3):
+        queue.enqueue(f'{i}.png', 100, 1)
+    assert queue.claim(0) == []
+    assert queue.claim(2) == ['0.png', '1.png']
+    assert queue.depth() == 1
+    assert queue.claim(2) == ['2.png']
+    assert queue.claim(2) == []
+
+
+def test_release_retries_until_max_attempts(queue):
+    claim(queue, 'a.png')
+    assert queue.release('a.png', 'worker died')
+    assert state(queue, 'a.png') == PENDING and queue.has_retries()
+    # Retries are claimed separately from new images
+    assert queue.claim(10) == []
+    assert queue.claim(10, retries=True) == ['a.png']
+
+    assert not queue.release('a.png', 'worker died')
+    assert state(queue, 'a.png') == FAILED
+    assert queue.counts[FAILED] == 1
+
+    assert queue.retry_failed() == 1
+    assert queue.claim(10) == ['a.png']
+
+
+def test_recover_requeues_running_images(tmp_path):
+    with WorkQueue(str(tmp_path / 'queue.db')) as queue:
+        claim(queue, 'a.png')
+        assert state(queue, 'a.png') == RUNNING
+    with WorkQueue(str(tmp_path / 'queue.db')) as queue:
+        assert queue.recover() == 1
+        assert state(queue, 'a.png') == PENDING
+        assert queue.claim(10, retries=True) == ['a.png']
+
+
+def load(queue, sink, images):
+    for path, address in images:
+        claim(queue, path, mtime_ns=queue.counts['enqueued'] + 1)
+        sink.write({'path': path, 'sql': row(address), 'error': None, 'elapsed': 0.1})
+    sink.commit()
+
+
+def table(dsn):
+    conn = sqlite3.connect(dsn[len('sqlite:///'):])
+    try:
+        return dict(conn.execute('SELECT id, address FROM properties'))
+    finally:
+        conn.close()
+
+
+@pytest.fixture
+def database(tmp_path, queue):
+    dsn = f"sqlite:///{tmp_path / 'properties.db'}"
+    sink = DatabaseOutput(queue, PropertyLoader(dsn, batch_size=10, pool_size=1))
+    yield sink, dsn
+    sink.close()
+
+
+def test_modified_image_replaces_its_row(queue, database):
+    sink, dsn = database
+    load(queue, sink, [('a.png', 'first a'), ('b.png', 'b')])
+    load(queue, sink, [('a.png', 'second a')])
+
+    rows = table(dsn)
+    assert sorted(rows.values()) == ['b', 'second a']
+    assert rows[queue.previous('a.png')['row_id']] == 'second a'
+
+
+def test_rejected_row_fails_only_its_image(queue, database):
+    sink, dsn = database
+    # SQLite cannot bind an arbitrary object, so only this row fails
+    load(queue, sink, [('a.png', 'a'), ('b.png', object()), ('c.png', 'c')])
+
+    assert [state(queue, path) for path in ('a.png', 'b.png', 'c.png')] == [DONE, FAILED, DONE]
+    error = queue.conn.execute("SELECT error FROM work_queue WHERE path = 'b.png'").fetchone()[0]
+    assert error.startswith('database rejected the row:')
+    assert sorted(table(dsn).values()) == ['a', 'c']
+
+
+def write_records(queue, sink, names):
+    for name in names:
+        claim(queue, name, mtime_ns=queue.counts['enqueued'] + 1)
+        sql = f"\nINSERT INTO properties (address) VALUES ('{name} {queue.counts['enqueued']}');"
+        sink.write({'path': name, 'sql': sql, 'error': None, 'elapsed': 0.1})
+
+
+def published(directory):
+    files = {}
+    for name in sorted(os.listdir(directory)):
+        with open(os.path.join(directory, name), encoding='utf-8') as f:
+            files[name] = f.read()
+    return files
+
+
+def assert_locations(queue, directory):
+    """Every recorded location still points at its image's record"""
+    files = published(directory)
+    for path, output, offset, length in queue.conn.execute(
+            'SELECT path, output, record_offset, record_length FROM work_queue WHERE output IS NOT NULL'):
+        data = files[output].encode('utf-8')[offset:offset + length].decode('utf-8')
+        assert data.startswith(f'-- Source: {path}\n'), path
+
+
+@pytest.mark.parametrize('max_records', [2, 10])
+def test_reprocessed_image_replaces_its_record(tmp_path, queue, max_records):
+    directory = str(tmp_path / 'out')
+    sink = RotatingOutput(queue, directory, 'sql', max_records=max_records)
+    write_records(queue, sink, ['a.png', 'b.png', 'c.png'])
+    write_records(queue, sink, ['a.png', 'c.png'])
+    sink.close()
+
+    text = ''.join(published(directory).values())
+    for name in ('a.png', 'b.png', 'c.png'):
+        assert text.count(f'-- Source: {name}\n') == 1
+    assert "'a.png 4'" in text and "'c.png 5'" in text
+    assert sink.stats()['records_replaced'] == 2
+    assert_locations(queue, directory)
+
+
+def test_changed_record_is_left_alone(tmp_path, queue):
+    directory = str(tmp_path / 'out')
+    sink = RotatingOutput(queue, directory, 'sql', max_records=1)
+    write_records(queue, sink, ['a.png'])
+    (name,) = os.listdir(directory)
+    with open(os.path.join(directory, name), 'r+', encoding='utf-8') as f:
+        text = f.read()
+        f.seek(0)
+        f.write(text.replace('a.png 1', 'A.PNG 1'))
+
+    write_records(queue, sink, ['a.png'])
+    sink.close()
+    assert sink.stats()['records_replaced'] == 0
+    assert 'A.PNG 1' in published(directory)[name]
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+
+"""
+Text-region detection for listing screenshots
+
+Finds the blocks of text (typically the 物件概要 key/value table) in a
+screenshot with OpenCV morphology so OCR only sees those crops instead of
+the whole page. Table rules are removed first, characters are joined into
+text lines, lines taller than a text line (photos, banners) are rejected,
+and the surviving lines are grouped into blocks.
+"""
+
+from collections import namedtuple
+from typing import List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+# A crop rectangle in pixel coordinates of the source image
+TextRegion = namedtuple('TextRegion', ['x', 'y', 'width', 'height'])
+
+MIN_LINE_HEIGHT = 5
+MAX_LINE_HEIGHT = 60
+# Ink fraction of a text line's bounding box; solid blocks and specks fall outside
+MIN_LINE_DENSITY = 0.03
+MAX_LINE_DENSITY = 0.7
+# Gap (px) below which neighbouring lines are grouped into one block
+BLOCK_GAP = 25
+REGION_PADDING = 6
+# Fall back to the whole image when the regions cover more than this fraction
+MAX_COVERAGE = 0.85
+
+
+def _binarize(gray: np.ndarray) -> np.ndarray:
+    """Ink as 255 on a 0 background, for dark-on-light and light-on-dark pages"""
+    _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
+    if cv2.countNonZero(binary) > binary.size // 2:
+        binary = cv2.bitwise_not(binary)
+    return binary
+
+
+def _remove_rules(binary: np.ndarray) -> np.ndarray:
+    """Strip long horizontal/vertical table rules so they don't join cells together"""
+    height, width = binary.shape
+    horizontal = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                  cv2.getStructuringElement(cv2.MORPH_RECT, (max(40, width // 8), 1)))
+    vertical = cv2.morphologyEx(binary, cv2.MORPH_OPEN,
+                                cv2.getStructuringElement(cv2.MORPH_RECT, (1, max(40, height // 8))))
+    return cv2.subtract(binary, cv2.bitwise_or(horizontal, vertical))
+
+
+def _text_line_mask(ink: np.ndarray) -> np.ndarray:
+    """Mask of bounding boxes of components that look like lines of text"""
+    width = ink.shape[1]
+    joined = cv2.morphologyEx(ink, cv2.MORPH_CLOSE,
+                              cv2.getStructuringElement(cv2.MORPH_RECT, (max(9, width // 60), 1)))
+    contours, _ = cv2.findContours(joined, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    mask = np.zeros_like(ink)
+    for contour in contours:
+        x, y, w, h = cv2.boundingRect(contour)
+        if not MIN_LINE_HEIGHT <= h <= MAX_LINE_HEIGHT or w < MIN_LINE_HEIGHT:
+            continue
+        density = cv2.countNonZero(ink[y:y + h, x:x + w]) / (w * h)
+        if MIN_LINE_DENSITY <= density <= MAX_LINE_DENSITY:
+            mask[y:y + h, x:x + w] = 255
+    return mask
+
+
+def merge_regions(regions: Sequence[TextRegion]) -> List[TextRegion]:
+    """Merge overlapping rectangles until none overlap"""
+    boxes = [[r.x, r.y, r.x + r.width, r.y + r.height] for r in regions]
+    merged = True
+    while merged:
+        merged = False
+        for i in range(len(boxes)):
+            for j in range(i + 1, len(boxes)):
+                a, b = boxes[i], boxes[j]
+                if a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]:
+                    boxes[i] = [min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])]
+                    del boxes[j]
+                    merged = True
+                    break
+            if merged:
+                break
+    return [TextRegion(x0, y0, x1 - x0, y1 - y0) for x0, y0, x1, y1 in boxes]
+
+
+def detect_text_regions(gray: np.ndarray) -> List[TextRegion]:
+    """
+    Text blocks in a grayscale screenshot, in reading order (top to bottom,
+    then left to right). Returns an empty list when nothing text-like is found.
+    """
+    height, width = gray.shape
+    lines = _text_line_mask(_remove_rules(_binarize(gray)))
+    blocks = cv2.dilate(lines, cv2.getStructuringElement(cv2.MORPH_RECT, (BLOCK_GAP, BLOCK_GAP)))
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(blocks)
+
+    regions = []
+    for label in range(1, count):
+        bx, by, bw, bh = (int(v) for v in stats[label, :4])
+        # Extent of the text lines inside this block, without the dilation margin
+        window = (labels[by:by + bh, bx:bx + bw] == label) & (lines[by:by + bh, bx:bx + bw] > 0)
+        ys, xs = np.nonzero(window)
+        if len(xs) == 0:
+            continue
+        x0 = max(0, bx + int(xs.min()) - REGION_PADDING)
+        y0 = max(0, by + int(ys.min()) - REGION_PADDING)
+        x1 = min(width, bx + int(xs.max()) + 1 + REGION_PADDING)
+        y1 = min(height, by + int(ys.max()) + 1 + REGION_PADDING)
+        regions.append(TextRegion(x0, y0, x1 - x0, y1 - y0))
+
+    return sorted(merge_regions(regions), key=lambda r: (r.y, r.x))
+
+
+def region_pixels(regions: Sequence[TextRegion]) -> int:
+    return sum(r.width * r.height for r in regions)
+
+
+def select_regions(gray: np.ndarray) -> Tuple[List[TextRegion], float]:
+    """
+    Regions worth cropping and the fraction of the image they cover.
+
+    Returns no regions (meaning: OCR the whole image) when detection finds
+    nothing or the crops would cover most of the image anyway.
+    """
+    regions = detect_text_regions(gray)
+    coverage = region_pixels(regions) / gray.size if gray.size else 1.0
+    if not regions or coverage > MAX_COVERAGE:
+        return [], 1.0
+    return regions, coverage
+
+
+def region_key(variant: str, region: Optional[TextRegion]) -> str:
+    """OCR cache variant name for a crop of a preprocessing variant"""
+    if region is None:
+        return variant
+    return f"{variant}@{region.x},{region.y},{region.width}x{region.height}"
+
+
+def crop_region(image, region: TextRegion):
+    """Crop a PIL image or numpy array to a region"""
+    if isinstance(image, np.ndarray):
+        return image[region.y:region.y + region.height, region.x:region.x + region.width]
+    return image.crop((region.x, region.y, region.x + region.width, region.y + region.height))
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Text-height normalization for screenshots
+
+Screenshots arrive at whatever resolution the capturing browser used: 4K
+retina captures are slow to OCR and small captures are misread. The
+dominant glyph height is estimated from the connected components of a
+locally thresholded grayscale image, and images whose text is outside
+Tesseract's comfortable range are resized so it lands on TARGET_TEXT_HEIGHT.
+Large JPEGs are decoded at a reduced size directly (PIL's draft mode) when
+the text is tall enough to allow it, so the full-size pixels are never built.
+"""
+
+from collections import namedtuple
+from typing import Optional, Tuple
+
+# OpenCV, NumPy and PIL are imported where images are processed, so the
+# generators can import the options below without loading them
+
+# Glyph ink height (px) Tesseract reads most reliably; text within a factor
+# of TOLERANCE of it is left as is
+TARGET_TEXT_HEIGHT = 30
+TOLERANCE = 1.5
+# Never scale past these factors, nor beyond MAX_OUTPUT_PIXELS
+MIN_SCALE = 0.2
+MAX_SCALE = 3.0
+MAX_OUTPUT_PIXELS = 40_000_000
+# Glyph-like components: height range, width/height bounds and ink density
+MIN_GLYPH_HEIGHT = 4
+MAX_GLYPH_ASPECT = 12
+MIN_GLYPH_DENSITY = 0.1
+# Fewer glyph-like components than this and the estimate is not trusted
+MIN_GLYPHS = 10
+# JPEGs with more pixels than this are probed at 1/DRAFT_PROBE size first
+DRAFT_MIN_PIXELS = 4_000_000
+DRAFT_PROBE = 4
+
+# How one image was normalized: estimated glyph height (px, None when no text
+# was found), the scale applied, pixel counts and the JPEG draft reduction used
+TextScale = namedtuple('TextScale', ['text_height', 'scale', 'pixels_before', 'pixels_after', 'draft'])
+
+
+def estimate_text_height(gray) -> Optional[float]:
+    """
+    Dominant glyph height in a grayscale array, or None when too few
+    glyph-like components are found. Heights are weighted by themselves, so
+    whole characters outweigh the dots, strokes and radicals split off them.
+    """
+    import cv2
+    import numpy as np
+    ink = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_MEAN_C, cv2.THRESH_BINARY_INV, 31, 15)
+    _, _, stats, _ = cv2.connectedComponentsWithStats(ink, connectivity=8)
+    widths, heights, areas = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT], stats[1:, cv2.CC_STAT_AREA]
+    glyphs = ((heights >= MIN_GLYPH_HEIGHT) & (heights <= gray.shape[0] // 8)
+              & (widths <= MAX_GLYPH_ASPECT * heights) & (widths * 5 >= heights)
+              & (areas >= MIN_GLYPH_DENSITY * widths * heights))
+    heights = heights[glyphs]
+    if len(heights) < MIN_GLYPHS:
+        return None
+    counts = np.convolve(np.bincount(heights).astype(float), [1, 1, 1], 'same')
+    return float(np.argmax(counts * np.arange(len(counts))))
+
+
+def scale_for(text_height: Optional[float], pixels: int, target: int = TARGET_TEXT_HEIGHT) -> float:
+    """Resize factor that brings text_height to the target, or 1.0 when it is close enough"""
+    if text_height is None or target / TOLERANCE <= text_height <= target * TOLERANCE:
+        return 1.0
+    scale = min(max(target / text_height, MIN_SCALE), MAX_SCALE)
+    return min(scale, (MAX_OUTPUT_PIXELS / pixels) ** 0.5)
+
+
+def _gray(image):
+    import numpy as np
+    return np.asarray(image if image.mode == 'L' else image.convert('L'))
+
+
+def _resize(image, scale: float):
+    from PIL import Image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    if scale < 1:
+        # reducing_gap box-reduces first, then filters the small remainder
+        return image.resize(size, Image.LANCZOS, reducing_gap=2.0)
+    return image.resize(size, Image.BICUBIC)
+
+
+def normalize_image(image, target: int = TARGET_TEXT_HEIGHT) -> Tuple['Image.Image', TextScale]:
+    """Resize a decoded PIL image so its text is about `target` pixels tall"""
+    pixels = image.width * image.height
+    text_height = estimate_text_height(_gray(image))
+    scale = scale_for(text_height, pixels, target)
+    if scale != 1.0:
+        image = _resize(image, scale)
+    return image, TextScale(text_height, scale, pixels, image.width * image.height, 1)
+
+
+def open_normalized(image_path: str, target: int = TARGET_TEXT_HEIGHT) -> Tuple['Image.Image', TextScale]:
+    """
+    Open and normalize a screenshot. A large JPEG is first probed at a
+    fraction of its size; when its text allows a downscale of 2x or more,
+    it is decoded at that reduction directly and only the rest is resized.
+    """
+    from PIL import Image
+    image = Image.open(image_path)
+    width, height = image.size
+    draft = 1
+    if image.format == 'JPEG' and width * height > DRAFT_MIN_PIXELS:
+        probe = Image.open(image_path)
+        probe.draft('L', (width // DRAFT_PROBE, height // DRAFT_PROBE))
+        reduction = width / probe.width
+        probe_height = estimate_text_height(_gray(probe))
+        if probe_height is not None and scale_for(probe_height * reduction, width * height, target) <= 0.5:
+            # Largest power-of-two reduction that keeps the text at or above the target
+            while draft < 8 and probe_height * reduction / (draft * 2) >= target:
+                draft *= 2
+            if draft > 1:
+                image.draft(image.mode, (width // draft, height // draft))
+                draft = round(width / image.width)
+    image.load()
+    image, scaled = normalize_image(image, target)
+    if draft == 1:
+        return image, scaled
+    # Report against the file's full resolution
+    return image, scaled._replace(text_height=scaled.text_height and scaled.text_height * draft,
+                                  scale=scaled.scale / draft, pixels_before=width * height, draft=draft)
+
+
+def scaled_image_hash(image_hash: Optional[str], scaled: Optional[TextScale]) -> Optional[str]:
+    """OCR cache key for an image file as rescaled, so OCR of other scales is not reused"""
+    if image_hash is None or scaled is None or scaled.scale == 1.0:
+        return image_hash
+    return f"{image_hash}@{scaled.scale:.4f}"
+
+
+def format_scale_report(scaled: TextScale) -> str:
+    height = 'no text found' if scaled.text_height is None else f"text {scaled.text_height:.0f}px"
+    return (f"Text height normalization: {height}, scaled {scaled.scale:.2f}x "
+            f"({scaled.pixels_before:,} -> {scaled.pixels_after:,} pixels"
+            + (f", JPEG decoded at 1/{scaled.draft})" if scaled.draft > 1 else ")"))
+
+
+def add_normalize_arguments(parser):
+    """Register the text-height normalization options on an argparse parser"""
+    parser.add_argument(
+        '--normalize',
+        action='store_true',
+        help='Rescale screenshots whose text height is far from --text-height before OCR'
+    )
+    parser.add_argument(
+        '--text-height',
+        type=int,
+        default=TARGET_TEXT_HEIGHT,
+        help=f'Glyph height (px) --normalize rescales screenshots to when their text is more '
+             f'than {TOLERANCE}x off it (default: %(default)s)'
+    )
+
+
+def text_height_from_args(args) -> Optional[int]:
+    """Target glyph height from the command line, or None to keep images as captured"""
+    return args.text_height if args.normalize else None
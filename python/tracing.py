@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+
+"""
+Per-stage tracing and profiling hooks
+
+A Tracer records timed spans (load, preprocess per variant, OCR per config,
+score, field parse, value parse, render, ...) from any thread and writes
+them as JSON lines or as a Chrome trace (chrome://tracing, Perfetto).
+Timestamps come from the monotonic clock, so spans recorded in batch worker
+processes line up with the parent's. The disabled tracer used by default
+costs one attribute check per span.
+"""
+
+import os
+import sys
+import json
+import time
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+TRACE_FORMATS = ('jsonl', 'chrome')
+
+
+class Tracer:
+    """Collects spans; `span()` is a no-op context manager when disabled"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # Worker processes start with an empty span list of their own
+        return {'enabled': self.enabled}
+
+    def __setstate__(self, state):
+        self.__init__(state['enabled'])
+
+    @contextmanager
+    def span(self, name: str, category: str = 'pipeline', **args):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self.record(name, category, start, time.perf_counter_ns() - start, args)
+
+    def record(self, name: str, category: str, start_ns: int, duration_ns: int,
+               args: Optional[Dict[str, Any]] = None):
+        span = {
+            'name': name,
+            'cat': category,
+            'ts_ns': start_ns,
+            'dur_ns': duration_ns,
+            'pid': os.getpid(),
+            'tid': threading.get_ident(),
+            'args': args or {},
+        }
+        with self._lock:
+            self.spans.append(span)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return and forget the recorded spans (used to ship them out of workers)"""
+        with self._lock:
+            spans, self.spans = self.spans, []
+        return spans
+
+    def extend(self, spans: List[Dict[str, Any]]):
+        with self._lock:
+            self.spans.extend(spans)
+
+    def write_jsonl(self, stream):
+        for span in self.spans:
+            stream.write(json.dumps({
+                'name': span['name'],
+                'cat': span['cat'],
+                'start_ms': span['ts_ns'] / 1e6,
+                'duration_ms': span['dur_ns'] / 1e6,
+                'pid': span['pid'],
+                'tid': span['tid'],
+                'args': span['args'],
+            }, ensure_ascii=False, default=str) + '\n')
+
+    def write_chrome_trace(self, stream):
+        events = [{
+            'name': span['name'],
+            'cat': span['cat'],
+            'ph': 'X',
+            'ts': span['ts_ns'] / 1000,
+            'dur': span['dur_ns'] / 1000,
+            'pid': span['pid'],
+            'tid': span['tid'],
+            'args': span['args'],
+        } for span in self.spans]
+        json.dump({'traceEvents': events, 'displayTimeUnit': 'ms'}, stream, ensure_ascii=False, default=str)
+
+    def write(self, path: str, trace_format: Optional[str] = None):
+        """Write spans to `path`; the format defaults to chrome for .json, else jsonl"""
+        trace_format = trace_format or ('chrome' if path.endswith('.json') else 'jsonl')
+        with open(path, 'w', encoding='utf-8') as f:
+            if trace_format == 'chrome':
+                self.write_chrome_trace(f)
+            else:
+                self.write_jsonl(f)
+
+
+# Shared disabled tracer for code paths that were not given one
+NULL_TRACER = Tracer(enabled=False)
+
+
+def quiet_print(*args, **kwargs):
+    """Drop-in replacement for print() in quiet mode"""
+
+
+def run_profiled(func, profile_path: str, *args, **kwargs):
+    """
+    Run func under cProfile, dump the stats to `profile_path` (readable with
+    pstats or snakeviz) and print the top entries by cumulative time to stderr.
+    """
+    import cProfile
+    import pstats
+    profiler = cProfile.Profile()
+    try:
+        return profiler.runcall(func, *args, **kwargs)
+    finally:
+        profiler.dump_stats(profile_path)
+        print(f"Profile written to: {profile_path}", file=sys.stderr)
+        pstats.Stats(profiler, stream=sys.stderr).sort_stats('cumulative').print_stats(15)
+
+
+def add_trace_arguments(parser):
+    """Register the shared tracing/profiling/quiet options on an argparse parser"""
+    parser.add_argument(
+        '--trace',
+        metavar='PATH',
+        help='Write per-stage timing spans to PATH (Chrome trace for .json, JSON lines otherwise)'
+    )
+    parser.add_argument(
+        '--trace-format',
+        choices=TRACE_FORMATS,
+        help='Override the trace format chosen from the --trace file extension'
+    )
+    parser.add_argument(
+        '--profile',
+        metavar='PATH',
+        help='Run under cProfile and dump the stats to PATH (covers the main process only)'
+    )
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Suppress progress and diagnostic output'
+    )
+
+
+def tracer_from_args(args) -> Tracer:
+    """A recording tracer when --trace was given, else the shared disabled one"""
+    return Tracer() if args.trace else NULL_TRACER
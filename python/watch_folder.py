@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+
+"""
+Watch-folder daemon for property listing screenshots
+
+`property_sql_generator.py watch DIR` keeps running and turns screenshots
+dropped into DIR into SQL as they arrive. New files are noticed through
+inotify where the kernel offers it, or by polling the folder (network shares
+and other platforms), and are only picked up once their size and mtime have
+stopped changing, so a screenshot still being copied is not read half
+written. Settled images go into a durable SQLite work queue that a fixed
+pool of worker processes drains; records are appended to rotating SQL/COPY/
+CSV files or loaded into the database, and an image is marked done only once
+its record is written. The record of a modified image replaces the one it
+had before. A daemon that is stopped or killed resumes from the queue and
+re-runs only what was in flight. Queue depth, latency and failure counts go
+to the log, to an optional JSON status file and to `--status`.
+"""
+
+import os
+import sys
+import json
+import time
+import errno
+import select
+import signal
+import sqlite3
+import argparse
+import shutil
+import hashlib
+import functools
+from typing import Any, Dict, List, Optional, Tuple
+
+from batch_processor import collect_image_paths, is_image_file, start_worker_pool, submit_image, ResultWriter
+from db_loader import PropertyLoader, format_load_report
+from geocoder import gazetteer_from_args
+from ocr_cache import DEFAULT_CACHE_DIR
+from sql_output import output_epilogue
+from tracing import quiet_print
+from property_sql_generator import (
+    PropertySQLGenerator, add_output_arguments, add_generator_arguments, generator_kwargs_from_args
+)
+
+# Queue states
+PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+# Seconds a file's size and mtime must stay unchanged before it is queued
+DEFAULT_SETTLE = 2.0
+DEFAULT_POLL_INTERVAL = 2.0
+# Output files are closed and renamed after this many records or seconds
+DEFAULT_ROTATE_RECORDS = 1000
+DEFAULT_ROTATE_SECONDS = 3600
+DEFAULT_STATUS_INTERVAL = 60
+# Claims of one image whose worker process died before it counts as failed
+MAX_ATTEMPTS = 3
+# Buffered --load rows are committed at least this often
+DB_FLUSH_SECONDS = 5.0
+# Main loop wake-up interval (s): bounds the time to notice results and signals
+TICK = 0.5
+# Finished images the latency percentiles are computed over
+LATENCY_WINDOW = 1000
+# Output file extension per format
+OUTPUT_EXTENSIONS = {'sql': '.sql', 'copy': '.copy.sql', 'csv': '.csv'}
+PART_SUFFIX = '.part'
+# Output file being rewritten without a replaced record
+REWRITE_SUFFIX = '.rewrite'
+
+
+def default_queue_path(directory: str) -> str:
+    """Queue database for a watched folder, kept locally (SQLite locking is unreliable on network shares)"""
+    key = hashlib.sha256(os.path.abspath(directory).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(DEFAULT_CACHE_DIR, f'watch_queue-{key}.sqlite')
+
+
+def _percentile(ordered: List[float], fraction: float) -> Optional[float]:
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class WorkQueue:
+    """
+    Durable queue of settled images, kept in SQLite.
+
+    enqueue() is a no-op for an image already queued or processed with the
+    same size and mtime, and puts a modified one back to pending. claim()
+    hands out pending images in arrival order; finish() records the outcome
+    once the image's record is written, along with where it went (the
+    database row id, or the output file and the record's byte range), so
+    the record of a modified image can replace the previous one. Images that were running when a
+    worker or the daemon died are retries: the daemon claims those one at a
+    time and runs each alone, so a screenshot that crashes its worker uses
+    up only its own attempts. `counts` accumulates over a run.
+    """
+
+    def __init__(self, path: str, max_attempts: int = MAX_ATTEMPTS):
+        self.path = path
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS work_queue (
+                path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                state TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                enqueued_at REAL NOT NULL,
+                started_at REAL,
+                finished_at REAL,
+                elapsed REAL,
+                error TEXT,
+                row_id INTEGER,
+                output TEXT,
+                record_offset INTEGER,
+                record_length INTEGER,
+                record_hash TEXT
+            )""")
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(work_queue)')}
+        for column, kind in (('row_id', 'INTEGER'), ('output', 'TEXT'),
+                             ('record_offset', 'INTEGER'), ('record_length', 'INTEGER'), ('record_hash', 'TEXT')):
+            if column not in columns:
+                self.conn.execute(f'ALTER TABLE work_queue ADD COLUMN {column} {kind}')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS work_queue_enqueued ON work_queue (state, enqueued_at)')
+        self.conn.execute('CREATE INDEX IF NOT EXISTS work_queue_finished ON work_queue (state, finished_at)')
+        self.conn.commit()
+        self.counts = {'enqueued': 0, DONE: 0, FAILED: 0, 'requeued': 0}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def recover(self) -> int:
+        """Put images a stopped daemon left running back in the queue; returns how many"""
+        cursor = self.conn.execute('UPDATE work_queue SET state = ?, started_at = NULL WHERE state = ?',
+                                   (PENDING, RUNNING))
+        self.conn.commit()
+        self.counts['requeued'] += cursor.rowcount
+        return cursor.rowcount
+
+    def retry_failed(self) -> int:
+        """Queue every failed image again; returns how many"""
+        cursor = self.conn.execute(
+            'UPDATE work_queue SET state = ?, attempts = 0, enqueued_at = ?, error = NULL WHERE state = ?',
+            (PENDING, time.time(), FAILED)
+        )
+        self.conn.commit()
+        return cursor.rowcount
+
+    def enqueue(self, path: str, size: int, mtime_ns: int) -> bool:
+        """Queue a settled image; False when it is already queued or processed as it is"""
+        cursor = self.conn.execute(
+            'INSERT INTO work_queue (path, size, mtime_ns, state, enqueued_at) VALUES (?, ?, ?, ?, ?) '
+            'ON CONFLICT (path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, '
+            'state = excluded.state, attempts = 0, enqueued_at = excluded.enqueued_at, '
+            'started_at = NULL, finished_at = NULL, elapsed = NULL, error = NULL '
+            'WHERE work_queue.size != excluded.size OR work_queue.mtime_ns != excluded.mtime_ns',
+            (path, size, mtime_ns, PENDING, time.time())
+        )
+        self.conn.commit()
+        self.counts['enqueued'] += cursor.rowcount
+        return cursor.rowcount > 0
+
+    def depth(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM work_queue WHERE state = ?', (PENDING,)).fetchone()[0]
+
+    def has_retries(self) -> bool:
+        return self.conn.execute('SELECT 1 FROM work_queue WHERE state = ? AND attempts > 0 LIMIT 1',
+                                 (PENDING,)).fetchone() is not None
+
+    def claim(self, limit: int, retries: bool = False) -> List[str]:
+        """Mark up to `limit` of the oldest pending new images (or retries) running and return their paths"""
+        if limit <= 0:
+            return []
+        paths = [row[0] for row in self.conn.execute(
+            'SELECT path FROM work_queue WHERE state = ? AND (attempts > 0) = ? ORDER BY enqueued_at LIMIT ?',
+            (PENDING, retries, limit)
+        )]
+        self.conn.executemany(
+            'UPDATE work_queue SET state = ?, attempts = attempts + 1, started_at = ? WHERE path = ?',
+            [(RUNNING, time.time(), path) for path in paths]
+        )
+        self.conn.commit()
+        return paths
+
+    def finish(self, path: str, elapsed: Optional[float] = None, error: Optional[str] = None,
+               row_id: Optional[int] = None, record: Optional[Tuple[str, int, int, str]] = None):
+        """
+        Record a claimed image as done, with its database row id or the
+        (output file, offset, length, hash) of its record, or as failed with
+        its error (its previous record, if any, stays in place)
+        """
+        if error:
+            self.conn.execute(
+                'UPDATE work_queue SET state = ?, finished_at = ?, elapsed = ?, error = ? WHERE path = ? AND state = ?',
+                (FAILED, time.time(), elapsed, error, path, RUNNING)
+            )
+        else:
+            output, offset, length, digest = record or (None, None, None, None)
+            self.conn.execute(
+                'UPDATE work_queue SET state = ?, finished_at = ?, elapsed = ?, error = NULL, row_id = ?, '
+                'output = ?, record_offset = ?, record_length = ?, record_hash = ? WHERE path = ? AND state = ?',
+                (DONE, time.time(), elapsed, row_id, output, offset, length, digest, path, RUNNING)
+            )
+        self.conn.commit()
+        self.counts[FAILED if error else DONE] += 1
+
+    def previous(self, path: str) -> Dict[str, Any]:
+        """Where the image's last record went: row_id, or output, record_offset, record_length and record_hash"""
+        columns = ('row_id', 'output', 'record_offset', 'record_length', 'record_hash')
+        row = self.conn.execute(f"SELECT {', '.join(columns)} FROM work_queue WHERE path = ?", (path,)).fetchone()
+        return dict(zip(columns, row or (None,) * len(columns)))
+
+    def record_removed(self, output: str, offset: int, length: int):
+        """Forget a record cut out of an output file, moving the records after it up"""
+        self.conn.execute('UPDATE work_queue SET output = NULL, record_offset = NULL, record_length = NULL, '
+                          'record_hash = NULL WHERE output = ? AND record_offset = ?', (output, offset))
+        self.conn.execute('UPDATE work_queue SET record_offset = record_offset - ? '
+                          'WHERE output = ? AND record_offset > ?', (length, output, offset))
+        self.conn.commit()
+
+    def release(self, path: str, error: str) -> bool:
+        """Return a claimed image whose worker died; False once it failed for good after max_attempts claims"""
+        cursor = self.conn.execute(
+            'UPDATE work_queue SET state = CASE WHEN attempts >= ? THEN ? ELSE ? END, '
+            'started_at = NULL, finished_at = ?, error = ? WHERE path = ? AND state = ?',
+            (self.max_attempts, FAILED, PENDING, time.time(), error, path, RUNNING)
+        )
+        self.conn.commit()
+        state = self.conn.execute('SELECT state FROM work_queue WHERE path = ?', (path,)).fetchone()
+        if cursor.rowcount and state and state[0] == FAILED:
+            self.counts[FAILED] += 1
+            return False
+        return True
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Queue depth per state, the age of the oldest pending image, and over
+        the last LATENCY_WINDOW finished images the p50/p90 latency from
+        being queued to being written and the mean processing time
+        """
+        states = dict(self.conn.execute('SELECT state, COUNT(*) FROM work_queue GROUP BY state'))
+        oldest = self.conn.execute('SELECT MIN(enqueued_at) FROM work_queue WHERE state = ?',
+                                   (PENDING,)).fetchone()[0]
+        recent = self.conn.execute(
+            'SELECT finished_at - enqueued_at, elapsed FROM work_queue WHERE state = ? '
+            'ORDER BY finished_at DESC LIMIT ?', (DONE, LATENCY_WINDOW)
+        ).fetchall()
+        latencies = sorted(latency for latency, _ in recent)
+        elapsed = [seconds for _, seconds in recent if seconds is not None]
+        failures = self.conn.execute(
+            'SELECT path, error FROM work_queue WHERE state = ? ORDER BY finished_at DESC LIMIT 5', (FAILED,)
+        ).fetchall()
+        return {
+            PENDING: states.get(PENDING, 0),
+            RUNNING: states.get(RUNNING, 0),
+            DONE: states.get(DONE, 0),
+            FAILED: states.get(FAILED, 0),
+            'oldest_pending_seconds': time.time() - oldest if oldest is not None else None,
+            'latency_p50': _percentile(latencies, 0.5),
+            'latency_p90': _percentile(latencies, 0.9),
+            'processing_mean': sum(elapsed) / len(elapsed) if elapsed else None,
+            'recent_failures': [{'path': path, 'error': error} for path, error in failures],
+        }
+
+    def close(self):
+        self.conn.close()
+
+
+def format_queue_report(stats: Dict[str, Any]) -> str:
+    report = f"Queue: {stats[PENDING]} pending"
+    if stats['oldest_pending_seconds'] is not None:
+        report += f" (oldest {stats['oldest_pending_seconds']:.0f}s)"
+    report += f", {stats[RUNNING]} running, {stats[DONE]} done, {stats[FAILED]} failed"
+    if stats['latency_p50'] is not None:
+        report += f"; latency p50 {stats['latency_p50']:.1f}s, p90 {stats['latency_p90']:.1f}s"
+    if stats['processing_mean'] is not None:
+        report += f", {stats['processing_mean']:.1f}s processing per image"
+    return report
+
+
+def _snapshot(directory: str, recursive: bool) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime_ns) of every image in the folder"""
+    snapshot = {}
+    for path in collect_image_paths([directory], recursive=recursive):
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        snapshot[path] = (st.st_size, st.st_mtime_ns)
+    return snapshot
+
+
+class PollingWatcher:
+    """Finds new and modified images by listing the folder every `interval` seconds"""
+
+    name = 'polling'
+
+    def __init__(self, directory: str, recursive: bool = False, interval: float = DEFAULT_POLL_INTERVAL):
+        self.directory = directory
+        self.recursive = recursive
+        self.interval = interval
+        self._snapshot = {}
+        self._next_scan = 0.0
+
+    def scan(self) -> List[str]:
+        """Every image in the folder now"""
+        self._snapshot = _snapshot(self.directory, self.recursive)
+        self._next_scan = time.monotonic() + self.interval
+        return list(self._snapshot)
+
+    def changes(self, timeout: float) -> List[str]:
+        """Images added or modified since the last scan, waiting up to `timeout` seconds for one to be due"""
+        wait = self._next_scan - time.monotonic()
+        if wait > timeout:
+            time.sleep(timeout)
+            return []
+        time.sleep(max(0.0, wait))
+        previous = self._snapshot
+        self.scan()
+        return [path for path, signature in self._snapshot.items() if previous.get(path) != signature]
+
+    def close(self):
+        pass
+
+
+class InotifyWatcher:
+    """
+    Finds new and modified images through Linux inotify events, through
+    ctypes so no extension module is needed. Raises OSError where inotify is
+    unavailable or the watch limit is reached; create_watcher() then polls.
+    """
+
+    name = 'inotify'
+    # inotify(7) constants
+    IN_MODIFY = 0x2
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+    # struct inotify_event header: wd, mask, cookie, len
+    EVENT_HEADER = 16
+
+    def __init__(self, directory: str, recursive: bool = False):
+        if not sys.platform.startswith('linux'):
+            raise OSError(errno.ENOSYS, 'inotify is only available on Linux')
+        import ctypes
+        self._ctypes = ctypes
+        self._libc = ctypes.CDLL(None, use_errno=True)
+        self._libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self.directory = directory
+        self.recursive = recursive
+        self._fd = self._libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+        # watch descriptor -> directory
+        self._dirs: Dict[int, str] = {}
+        try:
+            self._watch_tree(directory)
+        except OSError:
+            self.close()
+            raise
+
+    def _watch_tree(self, directory: str):
+        self._watch(directory)
+        if self.recursive:
+            for root, subdirs, _ in os.walk(directory):
+                for subdir in subdirs:
+                    self._watch(os.path.join(root, subdir))
+
+    def _watch(self, directory: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(directory), self.MASK)
+        if wd < 0:
+            code = self._ctypes.get_errno()
+            raise OSError(code, f"inotify_add_watch failed: {os.strerror(code)}", directory)
+        self._dirs[wd] = directory
+
+    def scan(self) -> List[str]:
+        """Every image in the folder now"""
+        return list(_snapshot(self.directory, self.recursive))
+
+    def changes(self, timeout: float) -> List[str]:
+        """Images created, written or moved in, waiting up to `timeout` seconds for an event"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        paths = {}
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = (int.from_bytes(data[offset + i:offset + i + 4], sys.byteorder)
+                                       for i in (0, 4, 8, 12))
+                name = data[offset + self.EVENT_HEADER:offset + self.EVENT_HEADER + length].rstrip(b'\0')
+                offset += self.EVENT_HEADER + length
+                if mask & self.IN_Q_OVERFLOW:
+                    # Events were dropped: everything may have changed
+                    paths.update(dict.fromkeys(self.scan()))
+                    continue
+                if mask & self.IN_IGNORED:
+                    self._dirs.pop(wd, None)
+                    continue
+                directory = self._dirs.get(wd)
+                if directory is None:
+                    continue
+                path = os.path.join(directory, os.fsdecode(name))
+                if mask & self.IN_ISDIR:
+                    if self.recursive and mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                        try:
+                            self._watch_tree(path)
+                        except OSError:
+                            # Removed again before it could be watched
+                            continue
+                        # Files may have landed before the watch was added
+                        paths.update(dict.fromkeys(_snapshot(path, True)))
+                elif is_image_file(path) and not os.path.basename(path).startswith('.'):
+                    paths[path] = None
+        return list(paths)
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(directory: str, recursive: bool = False, poll: bool = False,
+                   poll_interval: float = DEFAULT_POLL_INTERVAL):
+    """inotify watcher for the folder, or a polling one when asked for or when inotify is unavailable"""
+    if not poll:
+        try:
+            return InotifyWatcher(directory, recursive)
+        except OSError:
+            pass
+    return PollingWatcher(directory, recursive, poll_interval)
+
+
+class Debouncer:
+    """
+    Holds back changed files until they are complete: a file is ready once
+    it is non-empty and its size and mtime have not changed for `settle`
+    seconds. Files last modified longer ago than that (already there at
+    startup, or moved in whole) are ready as soon as they are seen.
+    """
+
+    def __init__(self, settle: float = DEFAULT_SETTLE):
+        self.settle = settle
+        # path -> (size, mtime_ns, monotonic time the signature was first seen), None until stat'ed
+        self._files: Dict[str, Optional[Tuple[int, int, float]]] = {}
+
+    def __len__(self):
+        return len(self._files)
+
+    def add(self, path: str):
+        self._files.setdefault(path, None)
+
+    def ready(self) -> List[Tuple[str, int, int]]:
+        """(path, size, mtime_ns) of the files that have settled, which are then forgotten"""
+        now, settled = time.monotonic(), []
+        for path, state in list(self._files.items()):
+            try:
+                st = os.stat(path)
+            except OSError:
+                # Deleted or renamed before it settled
+                del self._files[path]
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if st.st_size and (time.time() - st.st_mtime >= self.settle
+                               or state is not None and state[:2] == signature and now - state[2] >= self.settle):
+                settled.append((path, *signature))
+                del self._files[path]
+            elif state is None or state[:2] != signature:
+                self._files[path] = (*signature, now)
+        return settled
+
+
+class RotatingOutput:
+    """
+    Writes records to a series of output files in `directory`.
+
+    Each file is written as NAME.part through a ResultWriter and, once it
+    holds `max_records` records or has been open for `max_seconds`, is
+    terminated (e.g. the COPY end marker), synced and renamed to NAME, so
+    anything loading the directory only sees complete files. .part files a
+    killed daemon left behind are terminated and renamed on startup. An
+    image is finished in the queue once its record is flushed to the file.
+    When a modified image is written again, its previous record is cut out
+    of the file holding it (published first if it is the open one), so the
+    directory keeps one record per image. A record whose bytes no longer
+    match its hash, or whose file was moved away, is left alone.
+    """
+
+    def __init__(self, queue: WorkQueue, directory: str, output_format: str = 'sql',
+                 max_records: int = DEFAULT_ROTATE_RECORDS, max_seconds: float = DEFAULT_ROTATE_SECONDS):
+        self.queue = queue
+        self.directory = directory
+        self.output_format = output_format
+        self.max_records = max(1, max_records)
+        self.max_seconds = max_seconds
+        self.files_written = 0
+        self.records_written = 0
+        self.records_replaced = 0
+        self._stream = None
+        self._writer = None
+        self._path = None
+        self._records = 0
+        self._opened_at = 0.0
+        self._sequence = 0
+        os.makedirs(directory, exist_ok=True)
+        self._recover()
+
+    def _recover(self):
+        formats = {extension: output_format for output_format, extension in OUTPUT_EXTENSIONS.items()}
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith(REWRITE_SUFFIX):
+                # The rewrite never replaced its file, which still holds every record
+                os.remove(os.path.join(self.directory, name))
+            if not name.endswith(PART_SUFFIX):
+                continue
+            final = name[:-len(PART_SUFFIX)]
+            # Longest extension first: '.copy.sql' before '.sql'
+            extension = max((ext for ext in formats if final.endswith(ext)), key=len, default=None)
+            if extension is None:
+                continue
+            path = os.path.join(self.directory, name)
+            epilogue = output_epilogue(formats[extension])
+            with open(path, 'r+', encoding='utf-8') as f:
+                if not f.read().endswith(epilogue):
+                    f.write(epilogue)
+            os.replace(path, os.path.join(self.directory, final))
+            self.files_written += 1
+
+    def _open(self):
+        while True:
+            self._sequence += 1
+            name = (f"properties-{time.strftime('%Y%m%d-%H%M%S')}-{self._sequence:04d}"
+                    f"{OUTPUT_EXTENSIONS[self.output_format]}")
+            self._path = os.path.join(self.directory, name)
+            if not os.path.exists(self._path) and not os.path.exists(self._path + PART_SUFFIX):
+                break
+        # No newline translation, so record byte offsets match the file
+        self._stream = open(self._path + PART_SUFFIX, 'w', encoding='utf-8', newline='')
+        self._writer = ResultWriter(self._stream, self.output_format)
+        self._records = 0
+        self._opened_at = time.monotonic()
+
+    def write(self, result: Dict[str, Any]):
+        if self._writer is None:
+            self._open()
+        offset = self._writer.bytes_written
+        data = self._writer.write(result).encode('utf-8')
+        # Only summaries of the open file are kept
+        self._writer.summaries.clear()
+        record = None
+        if not result['error']:
+            record = self._replace_previous(result['path'], (os.path.basename(self._path), offset, len(data),
+                                                             hashlib.sha256(data).hexdigest()))
+        self.queue.finish(result['path'], result.get('elapsed'), result['error'], record=record)
+        self.records_written += 1
+        self._records += 1
+        if self._records >= self.max_records:
+            self.rotate()
+
+    def _replace_previous(self, path: str, record: Tuple[str, int, int, str]) -> Tuple[str, int, int, str]:
+        """Cut the image's previous record out of its file; returns the new record's location after the cut"""
+        previous = self.queue.previous(path)
+        if previous['output'] is None:
+            return record
+        name, offset, length = previous['output'], previous['record_offset'], previous['record_length']
+        if name == record[0]:
+            # Only published files are rewritten
+            self.rotate()
+        if self._cut(name, offset, length, previous['record_hash']) and name == record[0] and record[1] > offset:
+            record = (record[0], record[1] - length, record[2], record[3])
+        return record
+
+    def _cut(self, name: str, offset: int, length: int, digest: str) -> bool:
+        path = os.path.join(self.directory, name)
+        try:
+            source = open(path, 'rb')
+        except FileNotFoundError:
+            # Already collected by whatever loads the directory
+            return False
+        with source:
+            source.seek(offset)
+            if hashlib.sha256(source.read(length)).hexdigest() != digest:
+                return False
+            source.seek(0)
+            with open(path + REWRITE_SUFFIX, 'wb') as target:
+                target.write(source.read(offset))
+                source.seek(offset + length)
+                shutil.copyfileobj(source, target)
+                target.flush()
+                os.fsync(target.fileno())
+        os.replace(path + REWRITE_SUFFIX, path)
+        self.queue.record_removed(name, offset, length)
+        self.records_replaced += 1
+        return True
+
+    def rotate(self):
+        """Terminate, sync and publish the open file"""
+        if self._writer is None:
+            return
+        self._writer.close()
+        os.fsync(self._stream.fileno())
+        self._stream.close()
+        os.replace(self._path + PART_SUFFIX, self._path)
+        self._writer = self._stream = None
+        self.files_written += 1
+
+    def tick(self, idle: bool):
+        if self._writer is not None and time.monotonic() - self._opened_at >= self.max_seconds:
+            self.rotate()
+
+    def stats(self) -> Dict[str, Any]:
+        return {'files_written': self.files_written, 'records_written': self.records_written,
+                'records_replaced': self.records_replaced}
+
+    def close(self):
+        self.rotate()
+
+
+class DatabaseOutput:
+    """
+    Loads records into the database through a PropertyLoader on one
+    connection, so a flush returning means its rows are committed. Images
+    are finished in the queue once their batch is committed, each with the
+    outcome of its own row: a row the database rejected fails its image. A
+    modified image's row replaces the one it loaded before, in the same
+    transaction. Failed images are finished straight away, as they load
+    nothing.
+    """
+
+    def __init__(self, queue: WorkQueue, loader: PropertyLoader):
+        self.queue = queue
+        self.loader = loader
+        # Elapsed time of the images whose rows are buffered in the loader,
+        # and the time when the first was added
+        self._buffered: Dict[str, Optional[float]] = {}
+        self._buffered_at = 0.0
+
+    def write(self, result: Dict[str, Any]):
+        path = result['path']
+        if result['error']:
+            self.queue.finish(path, result.get('elapsed'), result['error'])
+            return
+        if not self._buffered:
+            self._buffered_at = time.monotonic()
+        self._buffered[path] = result.get('elapsed')
+        # Flushes by itself once batch_size rows are buffered
+        self.loader.add(result['sql'], source=path, replaces=self.queue.previous(path)['row_id'])
+        self._finish(self.loader.take_outcomes())
+
+    def commit(self):
+        """Flush the buffered rows and finish their images"""
+        if not self._buffered:
+            return
+        self.loader.flush()
+        self._finish(self.loader.take_outcomes())
+
+    def _finish(self, outcomes: List[Tuple[str, Optional[int], Optional[str]]]):
+        for path, row_id, error in outcomes:
+            self.queue.finish(path, self._buffered.pop(path, None),
+                              error and f"database rejected the row: {error}", row_id=row_id)
+
+    def tick(self, idle: bool):
+        if self._buffered and (idle or time.monotonic() - self._buffered_at >= DB_FLUSH_SECONDS):
+            self.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        stats = self.loader.stats()
+        return {'rows_loaded': stats['rows_loaded'], 'rows_failed': stats['rows_failed']}
+
+    def close(self):
+        self.commit()
+        self.loader.close()
+
+
+def write_status_file(path: str, status: Dict[str, Any]):
+    """Replace the JSON status file in one step, so a monitor never reads it half written"""
+    temporary = f"{path}.tmp"
+    with open(temporary, 'w', encoding='utf-8') as f:
+        json.dump(status, f, indent=2)
+    os.replace(temporary, path)
+
+
+def run_watch(args):
+    """Watch args.directory and process images as they settle, until stopped (or drained with --once)"""
+    log = quiet_print if args.quiet else functools.partial(print, file=sys.stderr, flush=True)
+    directory = os.path.abspath(args.directory)
+    queue = WorkQueue(args.queue or default_queue_path(directory), max_attempts=args.max_attempts)
+    if args.status:
+        print(json.dumps(queue.stats(), indent=2))
+        queue.close()
+        return
+    if args.retry_failed:
+        log(f"Requeued {queue.retry_failed()} failed images")
+    requeued = queue.recover()
+    if requeued:
+        log(f"Requeued {requeued} images left running by a previous run")
+
+    output_format = 'row' if args.load else args.format
+    try:
+        if args.load:
+            # One connection: a flush returns once its rows are committed
+            sink = DatabaseOutput(queue, PropertyLoader(args.dsn, batch_size=args.batch_size, pool_size=1,
+                                                        method=args.load_method))
+        else:
+            sink = RotatingOutput(queue, args.output_dir, args.format, args.rotate_records, args.rotate_seconds)
+    except Exception as e:
+        print(f"Error: {str(e)}")
+        queue.close()
+        sys.exit(1)
+    generator_kwargs = generator_kwargs_from_args(args, output_format, gazetteer=gazetteer_from_args(args))
+
+    watcher = create_watcher(directory, args.recursive, args.poll, args.poll_interval)
+    debouncer = Debouncer(args.settle)
+    # Catch up on images dropped while the daemon was not running
+    for path in watcher.scan():
+        debouncer.add(path)
+
+    stopping = []
+
+    def stop(signum, frame):
+        stopping.append(signum)
+
+    # Installed before the pool forks, so a Ctrl-C lets workers finish their image too
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    # Imported here like in batch_processor: only the daemon loop needs it
+    from concurrent.futures import FIRST_COMPLETED, wait
+    from concurrent.futures.process import BrokenProcessPool
+    pools = [start_worker_pool(PropertySQLGenerator, args.jobs, generator_kwargs)]
+
+    def replace_pool(broken_pool):
+        """Swap a pool broken by a crashed worker for a fresh one (once per broken pool)"""
+        if broken_pool is pools[-1]:
+            broken_pool.shutdown(wait=False)
+            pools.append(start_worker_pool(PropertySQLGenerator, args.jobs, generator_kwargs))
+
+    def release(path):
+        if not queue.release(path, 'worker process died'):
+            print(f"Failed {path}: worker process died {args.max_attempts} times", file=sys.stderr, flush=True)
+
+    log(f"Watching {directory} ({watcher.name}) with {args.jobs} worker(s); queue: {queue.path}")
+
+    started = time.monotonic()
+    # future -> (image path, pool it was submitted to)
+    in_flight = {}
+    isolating = False
+    next_status, last_report = 0.0, None
+
+    def status() -> Dict[str, Any]:
+        return {'directory': directory, 'watcher': watcher.name, 'pid': os.getpid(),
+                'updated_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+                'uptime_seconds': time.monotonic() - started, 'settling': len(debouncer),
+                'in_flight': len(in_flight), 'processed': dict(queue.counts), **sink.stats(),
+                **queue.stats()}
+
+    try:
+        while True:
+            if not stopping:
+                for path in watcher.changes(timeout=0 if in_flight else TICK):
+                    debouncer.add(path)
+                for path, size, mtime_ns in debouncer.ready():
+                    queue.enqueue(path, size, mtime_ns)
+                if isolating:
+                    claimed = []
+                elif queue.has_retries():
+                    # Wait for the images in flight, then run one retry alone
+                    claimed = [] if in_flight else queue.claim(1, retries=True)
+                    isolating = bool(claimed)
+                else:
+                    claimed = queue.claim(2 * args.jobs - len(in_flight))
+                for path in claimed:
+                    pool = pools[-1]
+                    try:
+                        in_flight[submit_image(pool, path, args.verbose)] = (path, pool)
+                    except BrokenProcessPool:
+                        release(path)
+                        replace_pool(pool)
+            if in_flight:
+                done, _ = wait(in_flight, timeout=TICK, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, pool = in_flight.pop(future)
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        # A worker crashed (e.g. killed for memory); every image in flight
+                        # is retried on a fresh pool, up to --max-attempts times
+                        release(path)
+                        replace_pool(pool)
+                        continue
+                    sink.write(result)
+                    if result['error']:
+                        print(f"Failed {path}: {result['error']}", file=sys.stderr, flush=True)
+                    else:
+                        log(f"Processed {path} in {result['elapsed']:.1f}s")
+            if not in_flight:
+                isolating = False
+            sink.tick(idle=not in_flight)
+
+            if time.monotonic() >= next_status:
+                next_status = time.monotonic() + args.status_interval
+                current = status()
+                report = format_queue_report(current)
+                if args.status_file:
+                    write_status_file(args.status_file, current)
+                # Log only when the queue changed, so an idle daemon stays quiet
+                if report.split(';')[0] != last_report:
+                    last_report = report.split(';')[0]
+                    log(report)
+
+            if stopping and not in_flight:
+                break
+            if args.once and not in_flight and not len(debouncer) and not queue.depth():
+                break
+    finally:
+        # Images still running stay claimed and are requeued by the next run
+        pools[-1].shutdown(wait=True, cancel_futures=True)
+        sink.close()
+        watcher.close()
+        final = status()
+        if args.status_file:
+            write_status_file(args.status_file, final)
+        queue.close()
+    log(format_queue_report(final))
+    if args.load:
+        log(format_load_report(sink.loader.stats()))
+    if stopping:
+        log("Stopped; pending images stay queued for the next run.")
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog='property_sql_generator.py watch',
+        description='Watch a folder and generate SQL for listing screenshots as they are dropped into it'
+    )
+    parser.add_argument(
+        'directory',
+        help='Folder to watch for new screenshots'
+    )
+    parser.add_argument(
+        '-r', '--recursive',
+        action='store_true',
+        help='Watch subfolders too'
+    )
+    parser.add_argument(
+        '-j', '--jobs',
+        type=int,
+        default=os.cpu_count() or 1,
+        help='Number of worker processes (default: CPU count)'
+    )
+    parser.add_argument(
+        '-v', '--verbose',
+        action='store_true',
+        help='Enable verbose output showing OCR results and parsing steps'
+    )
+    parser.add_argument(
+        '--output-dir',
+        help='Folder for the rotating output files (required unless --load or --status)'
+    )
+    parser.add_argument(
+        '--rotate-records',
+        type=int,
+        default=DEFAULT_ROTATE_RECORDS,
+        help='Start a new output file after this many records (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--rotate-seconds',
+        type=float,
+        default=DEFAULT_ROTATE_SECONDS,
+        help='Start a new output file once the open one is this old (default: %(default)s)'
+    )
+    add_output_arguments(parser)
+    parser.add_argument(
+        '--queue',
+        metavar='PATH',
+        help=f'Work queue database (default: one per watched folder in {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--settle',
+        type=float,
+        default=DEFAULT_SETTLE,
+        help="Seconds a new file's size and mtime must stay unchanged before it is processed "
+             "(default: %(default)s)"
+    )
+    parser.add_argument(
+        '--poll',
+        action='store_true',
+        help='Poll the folder instead of using inotify (needed for network shares)'
+    )
+    parser.add_argument(
+        '--poll-interval',
+        type=float,
+        default=DEFAULT_POLL_INTERVAL,
+        help='Seconds between folder listings when polling (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--max-attempts',
+        type=int,
+        default=MAX_ATTEMPTS,
+        help='Times an image whose worker crashed is retried before it fails (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--status-file',
+        metavar='PATH',
+        help='Keep queue depth, latency and failure counts in this JSON file'
+    )
+    parser.add_argument(
+        '--status-interval',
+        type=float,
+        default=DEFAULT_STATUS_INTERVAL,
+        help='Seconds between status updates in the log and the status file (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--status',
+        action='store_true',
+        help='Print the queue statistics as JSON and exit'
+    )
+    parser.add_argument(
+        '--retry-failed',
+        action='store_true',
+        help='Queue the images that failed before again'
+    )
+    parser.add_argument(
+        '--once',
+        action='store_true',
+        help='Exit once the folder and the queue are drained instead of watching for new images'
+    )
+    add_generator_arguments(parser)
+    parser.add_argument(
+        '-q', '--quiet',
+        action='store_true',
+        help='Suppress progress output; failures are still reported'
+    )
+
+    args = parser.parse_args(argv)
+    if not os.path.isdir(args.directory):
+        parser.error(f'{args.directory} is not a directory')
+    if not (args.load or args.status or args.output_dir):
+        parser.error('--output-dir is required unless --load is given')
+    args.jobs = max(1, args.jobs)
+    run_watch(args)
+
+
+if __name__ == "__main__":
+    main()